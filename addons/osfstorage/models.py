@@ -8,12 +8,13 @@ from modularodm import Q
 from psycopg2._psycopg import AsIs
 
 from addons.base.models import BaseNodeSettings, BaseStorageAddon
+from addons.osfstorage import utils as osfstorage_utils
 from osf.exceptions import InvalidTagError, NodeStateError, TagNotFoundError
 from osf.models import (File, FileVersion, Folder, Guid,
                         TrashedFileNode, BaseFileNode)
+from osf.utils import identity_map
 from osf.utils.auth import Auth
 from website.files import exceptions
-from website.files import utils as files_utils
 from website.util import permissions
 
 settings = apps.get_app_config('addons_osfstorage')
@@ -26,6 +27,10 @@ class OsfStorageFileNode(BaseFileNode):
 
     @property
     def materialized_path(self):
+        # Stored on save; files saved before it was stored have it computed until they are
+        # backfilled by scripts/osfstorage/backfill_materialized_paths.py
+        if self._materialized_path:
+            return self._materialized_path
         sql = """
             WITH RECURSIVE materialized_path_cte(parent_id, GEN_PATH) AS (
               SELECT
@@ -138,6 +143,9 @@ class OsfStorageFileNode(BaseFileNode):
         self._materialized_path = self.materialized_path
         return super(OsfStorageFileNode, self).delete(user=user, parent=parent, **kwargs)
 
+    def copy_under(self, destination_parent, name=None):
+        return osfstorage_utils.copy_files(self, destination_parent.node, destination_parent, name=name)
+
     def move_under(self, destination_parent, name=None):
         if self.is_checked_out:
             raise exceptions.FileNodeCheckedOutError()
@@ -187,10 +195,47 @@ class OsfStorageFileNode(BaseFileNode):
             if save:
                 self.save()
 
+    def _compute_materialized_path(self):
+        """Return the materialized path and depth of self, from those of its parent."""
+        name = (self.name or '') + ('' if self.is_file else '/')
+        parent = self.parent
+        if parent is None:
+            return name, 0
+        return parent.materialized_path + name, parent.depth + 1 if parent.depth is not None else None
+
+    def _update_descendant_paths(self, node_id, old_path, old_depth):
+        """Rewrite the stored paths and depths of the files under a folder that used to be
+        at ``old_path`` and ``old_depth`` on the node with pk ``node_id``, with one query.
+        """
+        prefix = old_path.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        delta = self.depth - old_depth if self.depth is not None and old_depth is not None else None
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE %s
+                SET _materialized_path = %s || substr(_materialized_path, %s), depth = depth + %s
+                WHERE node_id = %s AND type IN %s AND _materialized_path LIKE %s AND id != %s
+                RETURNING id
+            """, [
+                AsIs(self._meta.db_table), self._materialized_path, len(old_path) + 1, delta,
+                node_id, (OsfStorageFile._typedmodels_type, OsfStorageFolder._typedmodels_type), prefix, self.pk,
+            ])
+            # Files loaded earlier in this request would keep their old paths
+            identity_map.evict_rows(BaseFileNode, [row[0] for row in cursor.fetchall()])
+
     def save(self):
         self._path = ''
-        self._materialized_path = ''
-        return super(OsfStorageFileNode, self).save()
+        old = None
+        if self.pk and not self.is_file:
+            old = BaseFileNode.objects.filter(pk=self.pk).values_list(
+                'node_id', 'type', '_materialized_path', 'depth'
+            ).first()
+        self._materialized_path, self.depth = self._compute_materialized_path()
+        ret = super(OsfStorageFileNode, self).save()
+        # Only rewrite under folders that were already active here, restored folders' old
+        # paths may since have been reused
+        if old and old[1] == self.type and old[2] and (old[2], old[3]) != (self._materialized_path, self.depth):
+            self._update_descendant_paths(old[0], old[2], old[3])
+        return ret
 
 
 class OsfStorageFile(OsfStorageFileNode, File):
@@ -382,7 +427,7 @@ class NodeSettings(BaseStorageAddon, BaseNodeSettings):
         if not self.root_node:
             self.on_add()
 
-        clone.root_node = files_utils.copy_files(self.get_root(), clone.owner)
+        clone.root_node = osfstorage_utils.copy_files(self.get_root(), clone.owner)
         clone.save()
 
         return clone, None
@@ -6,12 +6,15 @@ import unittest
 import pytest
 import pytz
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from nose.tools import *  # noqa
 
 from addons.osfstorage.models import OsfStorageFile, OsfStorageFileNode, OsfStorageFolder
 from osf.exceptions import ValidationError
 from osf.models import Contributor
+from osf.utils import identity_map
 from tests.factories import ProjectFactory
 
 from addons.osfstorage.tests import factories
@@ -250,6 +253,51 @@ class TestOsfstorageFileNode(StorageTestCase):
         child = self.node_settings.get_root().append_folder('Cloud').append_file('Carp')
         assert_equals('/Cloud/Carp', child.materialized_path)
 
+    def test_materialized_path_is_stored(self):
+        child = self.node_settings.get_root().append_folder('Cloud').append_file('Carp')
+        child = OsfStorageFile.load(child._id)
+        assert_equal(child._materialized_path, '/Cloud/Carp')
+        assert_equal(child.depth, 2)
+        with CaptureQueriesContext(connection) as queries:
+            assert_equal(child.materialized_path, '/Cloud/Carp')
+        assert_equal(len(queries), 0)
+
+    def test_rename_folder_updates_descendant_paths(self):
+        folder = self.node_settings.get_root().append_folder('Cloud')
+        child = folder.append_folder('Carp').append_file('Tuna')
+        sibling = self.node_settings.get_root().append_file('Cloud_file')
+        folder.name = 'Sky'
+        folder.save()
+        child.reload()
+        sibling.reload()
+        assert_equal(child.materialized_path, '/Sky/Carp/Tuna')
+        assert_equal(sibling.materialized_path, '/Cloud_file')
+
+    def test_rename_folder_evicts_descendants_from_identity_map(self):
+        folder = self.node_settings.get_root().append_folder('Cloud')
+        child = folder.append_folder('Carp').append_file('Tuna')
+        identity_map.identity_map_before_request()
+        try:
+            assert_equal(OsfStorageFile.load(child._id).materialized_path, '/Cloud/Carp/Tuna')
+            folder.name = 'Sky'
+            folder.save()
+            assert_equal(OsfStorageFile.load(child._id).materialized_path, '/Sky/Carp/Tuna')
+        finally:
+            identity_map.identity_map_after_request()
+
+    def test_move_folder_updates_descendant_paths(self):
+        new_project = ProjectFactory()
+        move_to = new_project.get_addon('osfstorage').get_root().append_folder('Cloud')
+        to_move = self.node_settings.get_root().append_folder('Carp')
+        child = to_move.append_folder('A dee um').append_file('Tuna')
+
+        to_move.move_under(move_to)
+        child.reload()
+
+        assert_equal(child.node, new_project)
+        assert_equal(child.materialized_path, '/Cloud/Carp/A dee um/Tuna')
+        assert_equal(child.depth, 4)
+
     def test_copy(self):
         to_copy = self.node_settings.get_root().append_file('Carp')
         copy_to = self.node_settings.get_root().append_folder('Cloud')
@@ -288,6 +336,40 @@ class TestOsfstorageFileNode(StorageTestCase):
         assert_equal(copied.parent, copy_to)
         assert_equal(to_copy.parent, self.node_settings.get_root())
 
+    def test_copy_folder(self):
+        to_copy = self.node_settings.get_root().append_folder('Carp')
+        child = to_copy.append_folder('A dee um').append_file('Tuna')
+        version = factories.FileVersionFactory()
+        child.versions.add(version)
+        to_copy.append_file('Trashed').delete()
+        copy_to = ProjectFactory().get_addon('osfstorage').get_root().append_folder('Cloud')
+
+        copied = to_copy.copy_under(copy_to, name='Bass')
+
+        assert_true(isinstance(copied, OsfStorageFolder))
+        assert_equal(copied.copied_from, to_copy)
+        assert_equal([c.name for c in copied.children], ['A dee um'])
+        copied_child = copied.children[0].children[0]
+        assert_true(isinstance(copied_child, OsfStorageFile))
+        assert_equal(copied_child.copied_from, child)
+        assert_equal(copied_child.node, copy_to.node)
+        assert_equal(copied_child.materialized_path, '/Cloud/Bass/A dee um/Tuna')
+        assert_equal(copied_child.depth, 4)
+        assert_equal(list(copied_child.versions.all()), [version])
+        assert_equal(list(child.versions.all()), [version])
+
+    def test_copy_folder_query_count_does_not_grow(self):
+        small = self.node_settings.get_root().append_folder('Small')
+        small.append_file('Carp')
+        large = self.node_settings.get_root().append_folder('Large')
+        for i in range(3):
+            large.append_folder('Folder {}'.format(i)).append_file('Carp')
+        with CaptureQueriesContext(connection) as few:
+            small.copy_under(self.node_settings.get_root(), name='Small copy')
+        with CaptureQueriesContext(connection) as many:
+            large.copy_under(self.node_settings.get_root(), name='Large copy')
+        assert_equal(len(many), len(few))
+
     def test_move(self):
         to_move = self.node_settings.get_root().append_file('Carp')
         move_to = self.node_settings.get_root().append_folder('Cloud')
@@ -6,7 +6,9 @@ import httplib
 import logging
 import functools
 
+from django.db import connection, transaction
 from modularodm.exceptions import ValidationValueError
+from psycopg2._psycopg import AsIs
 
 from framework.exceptions import HTTPError
 from framework.analytics import update_counter
@@ -111,24 +113,106 @@ def must_be(_type):
     return _must_be
 
 
-def copy_files(src, target_settings, parent=None, name=None):
-    """Copy the files from src to the target nodesettings
-    :param OsfStorageFileNode src: The source to copy children from
-    :param NodeSettings target_settings: The node settings of the project to copy files to
-    :param OsfStorageFileNode parent: The parent of to attach the clone of src to, if applicable
-    """
-    cloned = src.clone()
-    cloned.parent = parent
-    cloned.name = name or cloned.name
-    cloned.node_settings = target_settings
-
-    if src.is_file:
-        cloned.versions = src.versions
-
-    cloned.save()
+def copy_files(src, target_node, parent=None, name=None):
+    """Copy a file, or a folder and everything in it, to the target node with a fixed number
+    of queries: one to read the tree, one to insert the copies and one for their versions.
+    Behaves like ``website.files.utils.copy_files``.
 
-    if src.is_folder:
-        for child in src.children:
-            copy_files(child, target_settings, parent=cloned)
-
-    return cloned
+    :param OsfStorageFileNode src: The file or folder to copy
+    :param Node target_node: The node to copy files to
+    :param OsfStorageFolder parent: The parent of to attach the clone of src to, if applicable
+    :param str name: Name for the copy of src, defaults to its name
+    :return: The copy of src
+    """
+    from addons.osfstorage.models import OsfStorageFile, OsfStorageFolder
+    from osf.models import BaseFileNode
+    from osf.models.base import generate_object_id
+    from website.search import search
+
+    assert not parent or not parent.is_file, 'Parent must be a folder'
+    table = BaseFileNode._meta.db_table
+    folder_type = OsfStorageFolder._typedmodels_type
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Parents come before their children; new ids are taken from the table's sequence
+            cursor.execute("""
+                WITH RECURSIVE tree(id, parent_id, name, type, depth) AS (
+                  SELECT id, parent_id, name, type, 0
+                  FROM %(table)s
+                  WHERE id = %(src)s
+                  UNION ALL
+                  SELECT T.id, T.parent_id, T.name, T.type, R.depth + 1
+                  FROM tree AS R
+                    JOIN %(table)s AS T ON T.parent_id = R.id
+                  WHERE T.type IN %(types)s
+                )
+                SELECT id, parent_id, name, type, nextval(pg_get_serial_sequence('%(table)s', 'id'))
+                FROM tree
+                ORDER BY depth
+            """, {
+                'table': AsIs(table),
+                'src': src.pk,
+                'types': (OsfStorageFile._typedmodels_type, folder_type),
+            })
+            tree = cursor.fetchall()
+
+            # Materialized paths and depths, as OsfStorageFileNode._compute_materialized_path
+            new_ids, paths, depths = {}, {}, {}
+            rows = []
+            for old_id, old_parent_id, file_name, type_, new_id in tree:
+                if old_id == src.pk:
+                    file_name = name or file_name
+                    new_parent_id = parent.pk if parent else None
+                    parent_path, parent_depth = (parent.materialized_path, parent.depth) if parent else ('', -1)
+                else:
+                    new_parent_id = new_ids[old_parent_id]
+                    parent_path, parent_depth = paths[old_parent_id], depths[old_parent_id]
+                path = parent_path + (file_name or '') + ('/' if type_ == folder_type else '')
+                depth = parent_depth + 1 if parent_depth is not None else None
+                new_ids[old_id], paths[old_id], depths[old_id] = new_id, path, depth
+                rows.append((old_id, new_id, new_parent_id, generate_object_id(), file_name, path, depth))
+
+            columns = zip(*rows)
+            cursor.execute("""
+                INSERT INTO %(table)s (
+                  id, _id, guid_string, content_type_pk, type, last_touched, _history, provider, name,
+                  _path, _materialized_path, depth, node_id, parent_id, copied_from_id
+                )
+                SELECT
+                  C.new_id, C._id, F.guid_string, F.content_type_pk, F.type, F.last_touched, F._history,
+                  F.provider, C.name, '', C.path, C.depth, %(node)s, C.parent_id, F.id
+                FROM unnest(
+                  %(old_ids)s::INTEGER[], %(new_ids)s::INTEGER[], %(parent_ids)s::INTEGER[],
+                  %(_ids)s::TEXT[], %(names)s::TEXT[], %(paths)s::TEXT[], %(depths)s::INTEGER[]
+                ) AS C(old_id, new_id, parent_id, _id, name, path, depth)
+                  JOIN %(table)s AS F ON F.id = C.old_id
+                ORDER BY C.new_id
+            """, {
+                'table': AsIs(table),
+                'node': target_node.pk,
+                'old_ids': list(columns[0]),
+                'new_ids': list(columns[1]),
+                'parent_ids': list(columns[2]),
+                '_ids': list(columns[3]),
+                'names': list(columns[4]),
+                'paths': list(columns[5]),
+                'depths': list(columns[6]),
+            })
+            cursor.execute("""
+                INSERT INTO %(through)s (basefilenode_id, fileversion_id)
+                SELECT C.new_id, V.fileversion_id
+                FROM unnest(%(old_ids)s::INTEGER[], %(new_ids)s::INTEGER[]) AS C(old_id, new_id)
+                  JOIN %(through)s AS V ON V.basefilenode_id = C.old_id
+                ORDER BY V.id
+            """, {
+                'through': AsIs(BaseFileNode.versions.through._meta.db_table),
+                'old_ids': list(columns[0]),
+                'new_ids': list(columns[1]),
+            })
+
+    if target_node.is_public:
+        # Copies into private nodes have nothing to index
+        for copied in OsfStorageFile.objects.filter(id__in=new_ids.values()):
+            search.update_file(copied)
+    return BaseFileNode.objects.get(pk=new_ids[src.pk])
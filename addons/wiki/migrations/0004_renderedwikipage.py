@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9 on 2017-04-24 15:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import osf.utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0013_nodeclosure'),
+        ('addons_wiki', '0003_auto_20170403_2228'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedWikiPage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('html', models.TextField(blank=True)),
+                ('raw_text', models.TextField(blank=True)),
+                ('date_accessed', osf.utils.fields.NonNaiveDateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='osf.AbstractNode')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renderings', to='addons_wiki.NodeWikiPage')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='renderedwikipage',
+            unique_together=set([('page', 'node', 'content_hash')]),
+        ),
+    ]
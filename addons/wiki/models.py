@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import datetime
 import functools
+import hashlib
 import logging
 import urllib
 
@@ -8,13 +9,15 @@ import markdown
 import pytz
 from addons.base.models import BaseNodeSettings
 from bleach.callbacks import nofollow
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 from framework.forms.utils import sanitize
 from markdown.extensions import codehilite, fenced_code, wikilinks
 from osf.models import AbstractNode, NodeLog
 from osf.models.base import BaseModel, GuidMixin
 from osf.utils.fields import NonNaiveDateTimeField
 from website import settings
+from addons.wiki import settings as wiki_settings
 from addons.wiki import utils as wiki_utils
 from website.exceptions import NodeStateError
 from website.util import api_v2_url
@@ -97,6 +100,21 @@ def build_wiki_url(node, label, base, end):
     return '/{pid}/wiki/{wname}/'.format(pid=node._id, wname=label)
 
 
+def render_html(content, node):
+    """The cleaned and linkified HTML of ``content``"""
+    sanitized_content = render_content(content, node=node)
+    try:
+        from bleach import linkify
+
+        return linkify(
+            sanitized_content,
+            [nofollow, ],
+        )
+    except TypeError:
+        logger.warning('Returning unlinkified content.')
+        return sanitized_content
+
+
 class NodeWikiPage(GuidMixin, BaseModel):
     page_name = models.CharField(max_length=200, validators=[validate_page_name, ])
     version = models.IntegerField(default=1)
@@ -157,24 +175,33 @@ class NodeWikiPage(GuidMixin, BaseModel):
     def get_absolute_url(self):
         return self.absolute_api_v2_url
 
+    @property
+    def content_hash(self):
+        content = u'{}:{}'.format(wiki_settings.RENDER_CACHE_VERSION, self.content)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
     def html(self, node):
         """The cleaned HTML of the page"""
-        sanitized_content = render_content(self.content, node=node)
-        try:
-            from bleach import linkify
-
-            return linkify(
-                sanitized_content,
-                [nofollow, ],
-            )
-        except TypeError:
-            logger.warning('Returning unlinkified content.')
-            return sanitized_content
+        return self.get_rendered(node).html
 
     def raw_text(self, node):
         """ The raw text of the page, suitable for using in a test search"""
+        return self.get_rendered(node).raw_text
 
-        return sanitize(self.html(node), tags=[], strip=True)
+    def get_rendered(self, node):
+        """Return the rendering of this version of the page on ``node``, from the
+        cache if its content has been rendered before.
+        """
+        cacheable = wiki_settings.RENDER_CACHE_ENABLED and self.pk and node.pk
+        if cacheable:
+            rendered = RenderedWikiPage.objects.filter(page=self, node=node, content_hash=self.content_hash).first()
+            if rendered:
+                rendered.touch()
+                return rendered
+        rendered = RenderedWikiPage.render(self, node)
+        if cacheable:
+            rendered.store()
+        return rendered
 
     def get_draft(self, node):
         """
@@ -217,7 +244,8 @@ class NodeWikiPage(GuidMixin, BaseModel):
     def save(self, *args, **kwargs):
         rv = super(NodeWikiPage, self).save(*args, **kwargs)
         if self.node:
-            self.node.update_search()
+            self.get_rendered(self.node)
+            self.node.update_search(saved_fields=['wiki_pages_current'])
         return rv
 
     def rename(self, new_name, save=True):
@@ -267,6 +295,83 @@ class NodeWikiPage(GuidMixin, BaseModel):
         return copy
 
 
+class RenderedWikiPage(BaseModel):
+    """Cached rendering of a version of a wiki page on a node. Renderings are keyed by
+    a hash of the page's content, so they are never served for content that changed.
+    """
+    page = models.ForeignKey(NodeWikiPage, related_name='renderings')
+    # Wiki links are rendered relative to the node the page is shown on
+    node = models.ForeignKey('osf.AbstractNode', related_name='+')
+    content_hash = models.CharField(max_length=64)
+    html = models.TextField(blank=True)
+    raw_text = models.TextField(blank=True)
+    date_accessed = NonNaiveDateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ('page', 'node', 'content_hash')
+
+    @classmethod
+    def render(cls, page, node):
+        html = render_html(page.content, node)
+        return cls(
+            page=page,
+            node=node,
+            content_hash=page.content_hash,
+            html=html,
+            raw_text=sanitize(html, tags=[], strip=True),
+        )
+
+    @classmethod
+    def evict(cls, max_age=None):
+        """Delete renderings that have not been read for ``max_age``. Returns the number deleted."""
+        max_age = max_age or wiki_settings.RENDER_CACHE_MAX_AGE
+        deleted, _ = cls.objects.filter(date_accessed__lt=timezone.now() - max_age).delete()
+        return deleted
+
+    @classmethod
+    def get_cached(cls, pages):
+        """Return the stored renderings of ``pages``, (page, node) pairs, with one query, touching
+        the ones that are due with one more. Pages that were not rendered yet are left out.
+
+        :return dict: (page pk, node pk) -> RenderedWikiPage
+        """
+        if not wiki_settings.RENDER_CACHE_ENABLED or not pages:
+            return {}
+        hashes = {(page.pk, node.pk): page.content_hash for page, node in pages}
+        renderings = {
+            (rendered.page_id, rendered.node_id): rendered
+            for rendered in cls.objects.filter(
+                page_id__in={page.pk for page, node in pages},
+                node_id__in={node.pk for page, node in pages},
+                content_hash__in=set(hashes.values()),
+            )
+            if hashes.get((rendered.page_id, rendered.node_id)) == rendered.content_hash
+        }
+        now = timezone.now()
+        due = [rendered for rendered in renderings.values() if now - rendered.date_accessed >= wiki_settings.RENDER_CACHE_TOUCH_INTERVAL]
+        if due:
+            cls.objects.filter(pk__in=[rendered.pk for rendered in due]).update(date_accessed=now)
+            for rendered in due:
+                rendered.date_accessed = now
+        return renderings
+
+    def store(self):
+        """Save this rendering, replacing renderings of the page's previous content."""
+        RenderedWikiPage.objects.filter(page=self.page, node=self.node).exclude(content_hash=self.content_hash).delete()
+        try:
+            with transaction.atomic():
+                self.save()
+        except IntegrityError:
+            # Rendered concurrently by another request
+            pass
+
+    def touch(self):
+        now = timezone.now()
+        if now - self.date_accessed >= wiki_settings.RENDER_CACHE_TOUCH_INTERVAL:
+            RenderedWikiPage.objects.filter(pk=self.pk).update(date_accessed=now)
+            self.date_accessed = now
+
+
 class NodeSettings(BaseNodeSettings):
     complete = True
     has_auth = True
@@ -13,3 +13,12 @@ SHAREJS_DB_URL = 'mongodb://{}:{}/{}'.format(settings.DB_HOST, settings.DB_PORT,
 
 # TODO: Change to release date for wiki change
 WIKI_CHANGE_DATE = datetime.datetime.utcfromtimestamp(1423760098).replace(tzinfo=pytz.utc)
+
+# Rendered page HTML is cached in RenderedWikiPage, keyed by page version and content hash
+RENDER_CACHE_ENABLED = True
+# Bump to re-render every page, e.g. after changing the markdown extensions or whitelist
+RENDER_CACHE_VERSION = 1
+# Cached renderings that have not been read for this long are evicted
+RENDER_CACHE_MAX_AGE = datetime.timedelta(days=90)
+# Read times are recorded at most this often per rendering
+RENDER_CACHE_TOUCH_INTERVAL = datetime.timedelta(days=1)
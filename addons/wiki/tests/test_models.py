@@ -1,9 +1,12 @@
+import datetime
+
+import mock
 import pytest
 from urllib import quote
 
 from modularodm.exceptions import ValidationValueError
 
-from addons.wiki.models import NodeWikiPage
+from addons.wiki.models import NodeWikiPage, RenderedWikiPage
 from addons.wiki.tests.factories import NodeWikiFactory
 from osf_tests.factories import NodeFactory, UserFactory, ProjectFactory
 from tests.base import OsfTestCase
@@ -49,6 +52,54 @@ class TestNodeWikiPageModel:
         assert ver.is_current is False
 
 
+class TestRenderedWikiPage:
+
+    def test_rendering_is_cached_on_save(self):
+        page = NodeWikiFactory(content='Some *content*')
+        rendered = RenderedWikiPage.objects.get(page=page, node=page.node)
+        assert rendered.content_hash == page.content_hash
+        assert rendered.html == page.html(page.node)
+        assert page.raw_text(page.node) == 'Some content'
+
+    def test_cached_rendering_is_not_re_rendered(self):
+        page = NodeWikiFactory()
+        with mock.patch('addons.wiki.models.render_html') as mock_render:
+            page.html(page.node)
+            page.raw_text(page.node)
+        assert not mock_render.called
+
+    def test_changed_content_is_re_rendered(self):
+        page = NodeWikiFactory(content='Old content')
+        page.content = 'New content'
+        assert 'New content' in page.html(page.node)
+        assert RenderedWikiPage.objects.filter(page=page, node=page.node).count() == 1
+
+    def test_renderings_are_per_node(self):
+        page = NodeWikiFactory()
+        other = NodeFactory()
+        page.html(other)
+        assert RenderedWikiPage.objects.filter(page=page).count() == 2
+
+    def test_get_cached(self):
+        page, changed, other_node = NodeWikiFactory(), NodeWikiFactory(), NodeFactory()
+        changed.content = 'Changed since it was rendered'
+        RenderedWikiPage.objects.filter(page=page).update(
+            date_accessed=RenderedWikiPage.objects.get(page=page).date_accessed - datetime.timedelta(days=365)
+        )
+        renderings = RenderedWikiPage.get_cached([(page, page.node), (changed, changed.node), (page, other_node)])
+        assert renderings.keys() == [(page.pk, page.node.pk)]
+        assert renderings[(page.pk, page.node.pk)].raw_text == page.raw_text(page.node)
+        assert RenderedWikiPage.objects.get(page=page).date_accessed == renderings[(page.pk, page.node.pk)].date_accessed
+
+    def test_evict(self):
+        page = NodeWikiFactory()
+        RenderedWikiPage.objects.filter(page=page).update(
+            date_accessed=RenderedWikiPage.objects.get(page=page).date_accessed - datetime.timedelta(days=365)
+        )
+        assert RenderedWikiPage.evict() == 1
+        assert not RenderedWikiPage.objects.filter(page=page).exists()
+
+
 class TestNodeWikiPage(OsfTestCase):
 
     def setUp(self):
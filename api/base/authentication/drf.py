@@ -11,7 +11,8 @@ from api.base.exceptions import (UnconfirmedAccountError, UnclaimedAccountError,
                                  MergedAccountError, InvalidAccountError, TwoFactorRequiredError)
 from framework.auth import cas
 from framework.auth.core import get_user
-from osf.models import OSFUser, Session
+from framework.sessions.store import get_store
+from osf.models import OSFUser
 from website import settings
 
 
@@ -24,11 +25,7 @@ def get_session_from_cookie(cookie_val):
     """
 
     session_id = itsdangerous.Signer(settings.SECRET_KEY).unsign(cookie_val)
-    try:
-        session = Session.objects.get(_id=session_id)
-        return session
-    except Session.DoesNotExist:
-        return None
+    return get_store().load(session_id)
 
 
 def check_user(user):
@@ -194,21 +191,39 @@ class OSFCASAuthentication(authentication.BaseAuthentication):
         except (cas.CasTokenError, KeyError):
             return None
 
-        try:
-            cas_auth_response = client.profile(auth_token)
-        except cas.CasHTTPError:
-            raise exceptions.NotAuthenticated(_('User provided an invalid OAuth2 access token'))
+        cached = cas.profile_cache.get(auth_token)
+        if cached is not None:
+            cas_auth_response = cached.response
+            if cas_auth_response is None:
+                raise exceptions.NotAuthenticated(_('User provided an invalid OAuth2 access token'))
+        else:
+            # Read before asking CAS, so that a revocation while waiting on it is not missed
+            generations = cas.profile_cache.generations(auth_token)
+            try:
+                cas_auth_response = client.profile(auth_token)
+            except cas.CasHTTPError as error:
+                # Don't remember tokens as invalid because CAS itself is failing
+                if error.code < 500:
+                    cas.profile_cache.set(auth_token, None, generations=generations)
+                raise exceptions.NotAuthenticated(_('User provided an invalid OAuth2 access token'))
 
         if cas_auth_response.authenticated is False:
+            if cached is None:
+                cas.profile_cache.set(auth_token, cas_auth_response, generations=generations)
             raise exceptions.NotAuthenticated(_('CAS server failed to authenticate this token'))
 
         try:
-            user = OSFUser.objects.get(guids___id=cas_auth_response.user)
+            if cached is not None:
+                user = OSFUser.objects.get(pk=cached.user_pk)
+            else:
+                user = OSFUser.objects.get(guids___id=cas_auth_response.user)
         except OSFUser.DoesNotExist:
             user = None
         if not user:
             raise exceptions.AuthenticationFailed(_('Could not find the user associated with this token'))
 
+        if cached is None:
+            cas.profile_cache.set(auth_token, cas_auth_response, user.pk, generations)
         check_user(user)
         return user, cas_auth_response
 
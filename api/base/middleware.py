@@ -21,6 +21,10 @@ from framework.celery_tasks.handlers import (
     celery_after_request,
     celery_teardown_request
 )
+from osf.utils.identity_map import (
+    identity_map_after_request,
+    identity_map_before_request
+)
 from .api_globals import api_globals
 from api.base import settings as api_settings
 
@@ -113,12 +117,15 @@ class CorsMiddleware(corsheaders.middleware.CorsMiddleware):
 
 class PostcommitTaskMiddleware(object):
     """
-    Handle postcommit tasks for django.
+    Handle postcommit tasks and the request-scoped identity map for django.
     """
     def process_request(self, request):
+        identity_map_before_request()
         postcommit_before_request()
 
     def process_response(self, request, response):
+        # Postcommit tasks must not see objects cached during the request
+        identity_map_after_request()
         postcommit_after_request(response=response, base_status_error_code=400)
         return response
 
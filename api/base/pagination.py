@@ -1,3 +1,6 @@
+import base64
+import json
+
 from django.utils import six
 from collections import OrderedDict
 from django.core.urlresolvers import reverse
@@ -7,12 +10,14 @@ from django.db.models import QuerySet
 from rest_framework import pagination
 from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.utils.urls import (
     replace_query_param, remove_query_param
 )
+from api.base.exceptions import InvalidQueryStringError
 from api.base.serializers import is_anonymized
 from api.base.settings import MAX_PAGE_SIZE
-from api.base.utils import absolute_reverse
+from api.base.utils import absolute_reverse, is_truthy
 
 from framework.guid.model import Guid
 from website.project.model import Node, Comment
@@ -25,10 +30,19 @@ class JSONAPIPagination(pagination.PageNumberPagination):
 
     Properly handles pagination of embedded objects.
 
+    Views that set ``cursor_ordering``, e.g. ``('-date', '-id')``, can also be paginated by
+    cursor: ``?page[cursor]=`` returns the first page, and the prev and next links carry the
+    cursors of the pages around it. Pages are found by comparing their keys with the cursor,
+    so deep pages cost no more than the first, and the total is only counted when asked for
+    with ``page[total]=true``.
     """
 
     page_size_query_param = 'page[size]'
     max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = 'page[cursor]'
+    total_query_param = 'page[total]'
+
+    cursor_ordering = None
 
     def page_number_query(self, url, page_number):
         """
@@ -42,33 +56,54 @@ class JSONAPIPagination(pagination.PageNumberPagination):
 
         return paginated_url
 
+    def cursor_query(self, url, cursor):
+        """
+        Builds uri and adds cursor param.
+        """
+        url = remove_query_param(self.request.build_absolute_uri(url), '_')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
     def get_self_real_link(self, url):
+        if self.cursor_ordering:
+            return self.cursor_query(url, self.request.query_params[self.cursor_query_param])
         page_number = self.page.number
         return self.page_number_query(url, page_number)
 
     def get_first_real_link(self, url):
+        if self.cursor_ordering:
+            return self.cursor_query(url, '') if self.has_previous else None
         if not self.page.has_previous():
             return None
         return self.page_number_query(url, 1)
 
     def get_last_real_link(self, url):
-        if not self.page.has_next():
+        if self.cursor_ordering or not self.page.has_next():
             return None
         page_number = self.page.paginator.num_pages
         return self.page_number_query(url, page_number)
 
     def get_previous_real_link(self, url):
+        if self.cursor_ordering:
+            return self.cursor_query(url, self.encode_cursor(self.cursor_bounds[0], reverse=True)) if self.has_previous else None
         if not self.page.has_previous():
             return None
         page_number = self.page.previous_page_number()
         return self.page_number_query(url, page_number)
 
     def get_next_real_link(self, url):
+        if self.cursor_ordering:
+            return self.cursor_query(url, self.encode_cursor(self.cursor_bounds[1])) if self.has_next else None
         if not self.page.has_next():
             return None
         page_number = self.page.next_page_number()
         return self.page_number_query(url, page_number)
 
+    def get_total(self):
+        return self.total if self.cursor_ordering else self.page.paginator.count
+
+    def get_per_page(self):
+        return self.page_size if self.cursor_ordering else self.page.paginator.per_page
+
     def get_response_dict_deprecated(self, data, url):
         return OrderedDict([
             ('data', data),
@@ -78,8 +113,8 @@ class JSONAPIPagination(pagination.PageNumberPagination):
                 ('prev', self.get_previous_real_link(url)),
                 ('next', self.get_next_real_link(url)),
                 ('meta', OrderedDict([
-                    ('total', self.page.paginator.count),
-                    ('per_page', self.page.paginator.per_page),
+                    ('total', self.get_total()),
+                    ('per_page', self.get_per_page()),
                 ]))
             ])),
         ])
@@ -88,8 +123,8 @@ class JSONAPIPagination(pagination.PageNumberPagination):
         return OrderedDict([
             ('data', data),
             ('meta', OrderedDict([
-                ('total', self.page.paginator.count),
-                ('per_page', self.page.paginator.per_page),
+                ('total', self.get_total()),
+                ('per_page', self.get_per_page()),
             ])),
             ('links', OrderedDict([
                 ('self', self.get_self_real_link(url)),
@@ -157,9 +192,82 @@ class JSONAPIPagination(pagination.PageNumberPagination):
             self.request = request
             return list(self.page)
 
+        elif self.cursor_query_param in request.query_params and getattr(view, 'cursor_ordering', None):
+            return self.paginate_queryset_by_cursor(queryset, request, view)
+
         else:
             return super(JSONAPIPagination, self).paginate_queryset(queryset, request, view=None)
 
+    def paginate_queryset_by_cursor(self, queryset, request, view):
+        """Return the page of ``queryset`` after (or, for prev links, before) the cursor, in the
+        order of ``view.cursor_ordering``. All its fields must be sorted in the same direction.
+        """
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            raise InvalidQueryStringError(
+                detail='Lists paginated by cursor can not be sorted.', parameter=self.cursor_query_param
+            )
+        self.request = request
+        self.cursor_ordering = ordering = view.cursor_ordering
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(queryset.model, request.query_params[self.cursor_query_param])
+
+        # Rows without a key can't be found again from a cursor
+        for field_name in ordering:
+            if queryset.model._meta.get_field(field_name.lstrip('-')).null:
+                queryset = queryset.exclude(**{field_name.lstrip('-'): None})
+        self.total = queryset.count() if is_truthy(request.query_params.get(self.total_query_param, '')) else None
+
+        descending = ordering[0].startswith('-') != reverse
+        if position is not None:
+            # Compared as a row so that Postgres can seek to the cursor in an index on the fields
+            columns = ', '.join(
+                '"{}"."{}"'.format(queryset.model._meta.db_table, queryset.model._meta.get_field(field_name.lstrip('-')).column)
+                for field_name in ordering
+            )
+            queryset = queryset.extra(where=['({}) {} ({})'.format(
+                columns, '<' if descending else '>', ', '.join(['%s'] * len(position))
+            )], params=position)
+        queryset = queryset.order_by(*(
+            ('-' if descending else '') + field_name.lstrip('-') for field_name in ordering
+        ))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = position is not None, has_more
+        if results:
+            self.cursor_bounds = (self.get_position(results[0]), self.get_position(results[-1]))
+        else:
+            # A cursor past either end of the list; link back to the rows on the other side of it
+            self.cursor_bounds = (position, position)
+        return results
+
+    def get_position(self, obj):
+        return [getattr(obj, field_name.lstrip('-')) for field_name in self.cursor_ordering]
+
+    def encode_cursor(self, position, reverse=False):
+        position = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        return base64.urlsafe_b64encode(json.dumps({'position': position, 'reverse': reverse}))
+
+    def decode_cursor(self, model, cursor):
+        """Return the key values and direction of ``cursor``; an empty cursor is the start of the list."""
+        if not cursor:
+            return None, False
+        try:
+            decoded = json.loads(base64.urlsafe_b64decode(str(cursor)))
+            position = [
+                model._meta.get_field(field_name.lstrip('-')).to_python(value)
+                for field_name, value in zip(self.cursor_ordering, decoded['position'])
+            ]
+            assert len(position) == len(self.cursor_ordering)
+            return position, bool(decoded['reverse'])
+        except Exception:
+            raise InvalidQueryStringError(detail='Invalid cursor.', parameter=self.cursor_query_param)
+
 
 class MaxSizePagination(JSONAPIPagination):
     page_size = 1000
@@ -206,9 +314,13 @@ class NodeContributorPagination(JSONAPIPagination):
         response = super(NodeContributorPagination, self).get_paginated_response(data)
         response_dict = response.data
         kwargs = self.request.parser_context['kwargs'].copy()
-        node_id = kwargs.get('node_id', None)
-        node = Node.load(node_id)
-        total_bibliographic = node.visible_contributors.count()
+        if getattr(self.request.parser_context['view'], 'is_embed_batch', False):
+            # Contributors embedded in a list of nodes are loaded together, see BaseContributorList.get_embed_batch
+            total_bibliographic = len([contributor for contributor in self.page.paginator.object_list if contributor.visible])
+        else:
+            node_id = kwargs.get('node_id', None)
+            node = Node.load(node_id)
+            total_bibliographic = node.visible_contributors.count()
         if self.request.version < '2.1':
             response_dict['links']['meta']['total_bibliographic'] = total_bibliographic
         else:
@@ -337,8 +449,8 @@ class SearchPagination(JSONAPIPagination):
                     ('institutions', self.get_search_field('institution', query)),
                 ])),
                 ('meta', OrderedDict([
-                    ('total', self.page.paginator.count),
-                    ('per_page', self.page.paginator.per_page),
+                    ('total', self.get_total()),
+                    ('per_page', self.get_per_page()),
                 ])),
                 ('links', OrderedDict([
                     ('self', self.get_self_real_link(url)),
@@ -17,6 +17,7 @@ from api.base.exceptions import TargetNotSupportedError
 from api.base.exceptions import RelationshipPostMakesNoChanges
 from api.base.settings import BULK_SETTINGS
 from api.base.utils import absolute_reverse, extend_querystring_params, get_user_auth, extend_querystring_if_key_exists
+from api.caching import representations
 from framework.auth import core as auth_core
 from website import settings
 from website import util as website_utils
@@ -512,11 +513,11 @@ class RelationshipField(ser.HyperlinkedIdentityField):
                 field_counts_requested = self.process_related_counts_parameters(show_related_counts, value)
 
                 if utils.is_truthy(show_related_counts):
-                    meta[key] = website_utils.rapply(meta_data[key], _url_val, obj=value, serializer=self.parent, request=self.context['request'])
+                    meta[key] = self.get_related_count(meta_data[key], value)
                 elif utils.is_falsy(show_related_counts):
                     continue
                 elif self.field_name in field_counts_requested:
-                    meta[key] = website_utils.rapply(meta_data[key], _url_val, obj=value, serializer=self.parent, request=self.context['request'])
+                    meta[key] = self.get_related_count(meta_data[key], value)
                 else:
                     continue
             elif key == 'projects_in_common':
@@ -529,6 +530,15 @@ class RelationshipField(ser.HyperlinkedIdentityField):
                 meta[key] = website_utils.rapply(meta_data[key], _url_val, obj=value, serializer=self.parent, request=self.context['request'])
         return meta
 
+    def get_related_count(self, meta_value, value):
+        """
+        Returns a count from the meta information, using the value a list view loaded for the whole page if there is one.
+        """
+        related_counts = getattr(value, '_related_counts', None) or {}
+        if isinstance(meta_value, basestring) and meta_value in related_counts:
+            return related_counts[meta_value]
+        return website_utils.rapply(meta_value, _url_val, obj=value, serializer=self.parent, request=self.context['request'])
+
     def lookup_attribute(self, obj, lookup_field):
         """
         Returns attribute from target object unless attribute surrounded in angular brackets where it returns the lookup field.
@@ -1030,6 +1040,9 @@ class JSONAPISerializer(PrefetchRelationshipsSerializer):
         'nodes:node-registrations',
     }
 
+    # Set to True to cache serialized payloads across requests, see api.caching.representations
+    cache_representation = False
+
     # overrides Serializer
     @classmethod
     def many_init(cls, *args, **kwargs):
@@ -1083,6 +1096,13 @@ class JSONAPISerializer(PrefetchRelationshipsSerializer):
             context_envelope = None
         enable_esi = self.context.get('enable_esi', False)
         is_anonymous = is_anonymized(self.context['request'])
+
+        cache_key = representations.get_cache_key(self, obj, envelope, is_anonymous)
+        if cache_key:
+            cached = representations.get_representation(cache_key)
+            if cached is not None:
+                return cached
+
         to_be_removed = set()
         if is_anonymous and hasattr(self, 'non_anonymized_fields'):
             # Drop any fields that are not specified in the `non_anonymized_fields` variable.
@@ -1165,6 +1185,9 @@ class JSONAPISerializer(PrefetchRelationshipsSerializer):
                 ret['meta'] = {'anonymous': True}
         else:
             ret = data
+
+        if cache_key:
+            representations.set_representation(cache_key, ret)
         return ret
 
     def get_absolute_url(self, obj):
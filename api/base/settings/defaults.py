@@ -275,6 +275,11 @@ ENABLE_ESI = osf_settings.ENABLE_ESI
 VARNISH_SERVERS = osf_settings.VARNISH_SERVERS
 ESI_MEDIA_TYPES = osf_settings.ESI_MEDIA_TYPES
 
+# Cross-request cache of serialized resources for serializers with `cache_representation = True`
+REPRESENTATION_CACHE_ENABLED = False
+REPRESENTATION_CACHE_ALIAS = 'default'
+REPRESENTATION_CACHE_TIMEOUT = 60 * 60 * 24
+
 ADDONS_FOLDER_CONFIGURABLE = ['box', 'dropbox', 's3', 'googledrive', 'figshare', 'owncloud']
 ADDONS_OAUTH = ADDONS_FOLDER_CONFIGURABLE + ['dataverse', 'github', 'mendeley', 'zotero', 'forward']
 
@@ -1,5 +1,9 @@
+from collections import defaultdict
+
+from django.apps import apps
 from django.conf import settings as django_settings
 from django.db import transaction
+from django.db.models import Count
 from django.http import JsonResponse
 from rest_framework import generics
 from rest_framework import permissions as drf_permissions
@@ -32,6 +36,9 @@ from website import maintenance
 
 class JSONAPIBaseView(generics.GenericAPIView):
 
+    # Set on embedded list views whose results were loaded by _get_embed_batch, which then hold all results
+    is_embed_batch = False
+
     def __init__(self, **kwargs):
         assert getattr(self, 'view_name', None), 'Must specify view_name on view.'
         assert getattr(self, 'view_category', None), 'Must specify view_category on view.'
@@ -105,7 +112,12 @@ class JSONAPIBaseView(generics.GenericAPIView):
                 if not isinstance(view, ListModelMixin):
                     ret = ser.to_representation(item)
                 else:
+                    # Evaluated lazily, so when a batch is used this only runs the view's permission checks
                     queryset = view.filter_queryset(view.get_queryset())
+                    batch = self._get_embed_batch(view, field_name, item, cache)
+                    if batch is not None:
+                        queryset = batch.get(item.pk, [])
+                        view.is_embed_batch = True
                     page = view.paginate_queryset(getattr(queryset, '_results_cache', None) or queryset)
 
                     ret = ser.to_representation(page or queryset)
@@ -129,6 +141,65 @@ class JSONAPIBaseView(generics.GenericAPIView):
 
         return partial
 
+    def _get_embed_batch(self, view, field_name, item, cache):
+        """Resolve the embedded list ``field_name`` for every item on the current page
+        with a single query, if the embedded view supports it by implementing
+        ``get_embed_batch(parents)``.
+
+        :return dict: item pk -> results for that item, or None to resolve ``item`` by itself
+        """
+        if not hasattr(view, 'get_embed_batch'):
+            return None
+        parents = [parent for parent in getattr(self, '_embed_parents', None) or [] if type(parent) is type(item)]
+        if len(parents) < 2 or item not in parents:
+            return None
+        key = ('embed_batch', type(view), field_name)
+        if key not in cache:
+            cache[key] = view.get_embed_batch(parents)
+        return cache[key]
+
+    def paginate_queryset(self, queryset):
+        page = super(JSONAPIBaseView, self).paginate_queryset(queryset)
+        # Lists embedded in the items of this page are resolved for all of them at once, see _get_embed_batch
+        self._embed_parents = page
+        if page:
+            self.load_related_counts(page)
+        return page
+
+    def load_related_counts(self, objects):
+        """Load the relationship counts requested with the related_counts query param for all ``objects``
+        with one grouped query per relationship, for the counts listed in the serializer's
+        ``related_count_queries``. RelationshipField reads them from ``obj._related_counts``.
+        """
+        serializer_class = self.get_serializer_class()
+        count_queries = getattr(serializer_class, 'related_count_queries', None)
+        show_related_counts = self.request.query_params.get('related_counts', False)
+        if not count_queries or self.kwargs.get('is_embedded') or utils.is_falsy(show_related_counts):
+            return
+        requested = None if utils.is_truthy(show_related_counts) else show_related_counts.split(',')
+
+        methods = set()
+        for field_name, field in serializer_class._declared_fields.items():
+            # Unwrap fields like HideIfRegistration
+            field = getattr(field, 'field', field)
+            method = (getattr(field, 'related_meta', None) or {}).get('count')
+            if method in count_queries and (requested is None or field_name in requested):
+                methods.add(method)
+
+        counts = {}
+        for method in methods:
+            model_name, foreign_key, filters = count_queries[method]
+            counts[method] = dict(
+                apps.get_model(model_name).objects
+                .filter(**{'{}__in'.format(foreign_key): objects})
+                .filter(**filters)
+                .order_by()
+                .values_list(foreign_key)
+                .annotate(count=Count('pk'))
+            )
+        for obj in objects:
+            obj._related_counts = {method: method_counts.get(obj.pk, 0) for method, method_counts in counts.items()}
+
     def get_serializer_context(self):
         """Inject request into the serializer context. Additionally, inject partial functions
         (request, object -> embed items) if the query string contains embeds.  Allows
@@ -798,6 +869,16 @@ class BaseContributorList(JSONAPIBaseView, generics.ListAPIView, ListFilterMixin
 
         return node.contributor_set.all()
 
+    def get_embed_batch(self, parents):
+        """Load the contributors of all nodes in ``parents`` with one query, for embedding
+        contributors in a list of nodes.
+        """
+        contributors = defaultdict(list)
+        queryset = Contributor.objects.filter(node__in=parents).select_related('user').prefetch_related('user__guids')
+        for contributor in queryset.order_by('node_id', '_order'):
+            contributors[contributor.node_id].append(contributor)
+        return contributors
+
     def get_queryset(self):
         queryset = self.get_queryset_from_request()
         # If bulk request, queryset only contains contributors in request
@@ -1,8 +1,28 @@
-from api.caching.tasks import ban_url
-from framework.postcommit_tasks.handlers import enqueue_postcommit_task
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from modularodm import signals
 
+from api.base import settings as api_settings
+from api.caching.representations import invalidate_representations
+from api.caching.tasks import enqueue_ban
+from osf.models import Embargo, EmbargoTerminationApproval, RegistrationApproval, Retraction
+
+# Sanctions whose state is serialized with their registrations (withdrawn, pending_withdrawal,
+# pending_embargo_approval, embargo_end_date, ...) without touching the registrations
+REGISTRATION_SANCTIONS = (Embargo, EmbargoTerminationApproval, RegistrationApproval, Retraction)
+
 @signals.save.connect
 def ban_object_from_cache(sender, instance, fields_changed, cached_data):
     if hasattr(instance, 'absolute_api_v2_url'):
-        enqueue_postcommit_task(ban_url, (instance, ), {}, celery=False, once_per_request=True)
+        invalidate_representations(instance)
+        enqueue_ban(instance)
+
+@receiver(post_save)
+def invalidate_cached_representations(sender, instance, **kwargs):
+    if not api_settings.REPRESENTATION_CACHE_ENABLED:
+        return
+    if isinstance(instance, REGISTRATION_SANCTIONS):
+        for registration in instance.registrations.all():
+            invalidate_representations(registration)
+    elif hasattr(instance, 'absolute_api_v2_url') or hasattr(instance, 'node'):
+        invalidate_representations(instance)
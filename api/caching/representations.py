@@ -0,0 +1,83 @@
+"""Cross-request cache of serialized JSON-API resources.
+
+Serializers opt in by setting ``cache_representation = True``. Payloads are cached
+per serializer, object, API version and anonymity, and keyed on the object's
+``date_modified``, so a saved object is never served stale. Every key also includes
+a per-object generation that ``invalidate_representations`` bumps, which is called
+from the same save hooks that ban the object from Varnish (see ``api.caching.listeners``)
+to catch changes that do not touch ``date_modified``, and for registrations whenever one
+of their sanctions is saved.
+
+Only requests whose representation cannot depend on the requesting user are cached:
+no authenticated user, no embeds and no ``related_counts``. Nor are ``view_only`` requests,
+since serializers add the private link's key to every link they write.
+"""
+from django.core.cache import caches
+
+from api.base import settings as api_settings
+
+CACHEABLE_QUERY_PARAMS = {'page', 'page[size]', 'sort', 'version', 'format'}
+
+
+def get_cache():
+    return caches[api_settings.REPRESENTATION_CACHE_ALIAS]
+
+
+def _generation_key(obj):
+    return 'api:representation:generation:{}:{}'.format(obj._meta.concrete_model._meta.label_lower, obj.pk)
+
+
+def _is_cacheable_request(request, context):
+    if not request.user.is_anonymous() or context.get('embed') or context.get('enable_esi'):
+        return False
+    return all(
+        param in CACHEABLE_QUERY_PARAMS or param.startswith('filter[')
+        for param in request.query_params.keys()
+    )
+
+
+def get_cache_key(serializer, obj, envelope, is_anonymous):
+    """Return the key the representation of ``obj`` is cached under, or ``None``
+    if it should not be cached for this request.
+    """
+    if not (api_settings.REPRESENTATION_CACHE_ENABLED and getattr(serializer, 'cache_representation', False)):
+        return None
+    date_modified = getattr(obj, 'date_modified', None)
+    request = serializer.context.get('request')
+    if date_modified is None or getattr(obj, 'pk', None) is None or request is None:
+        return None
+    if not _is_cacheable_request(request, serializer.context):
+        return None
+    generation = get_cache().get(_generation_key(obj), 0)
+    return 'api:representation:{serializer}:{pk}:{generation}:{modified}:{version}:{anonymous}:{envelope}'.format(
+        serializer=type(serializer).__name__,
+        pk=obj.pk,
+        generation=generation,
+        modified=date_modified.isoformat(),
+        version=getattr(request, 'version', None),
+        anonymous=is_anonymous,
+        envelope=serializer.context.get('envelope', envelope),
+    )
+
+
+def get_representation(cache_key):
+    return get_cache().get(cache_key)
+
+
+def set_representation(cache_key, representation):
+    get_cache().set(cache_key, representation, api_settings.REPRESENTATION_CACHE_TIMEOUT)
+
+
+def invalidate_representations(instance):
+    """Invalidate cached representations of ``instance`` and of the node it belongs to, if any."""
+    if not api_settings.REPRESENTATION_CACHE_ENABLED:
+        return
+    cache = get_cache()
+    for obj in (instance, getattr(instance, 'node', None)):
+        if getattr(obj, 'pk', None) is None or not hasattr(obj, '_meta'):
+            continue
+        key = _generation_key(obj)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
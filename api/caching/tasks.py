@@ -1,85 +1,178 @@
+import logging
+import re
+import threading
+import time
+import urllib
 import urlparse
 
 import requests
-import logging
+from gevent.pool import Pool
+
+from framework.postcommit_tasks.handlers import enqueue_postcommit_task, postcommit_queue
 from website.project.model import Comment
 
 from website import settings
 
 logger = logging.getLogger(__name__)
 
+_local = threading.local()
+
+# One keep-alive connection pool per varnish server, shared by every request in this process
+_sessions = {}
+
+BAN_TIMEOUT = 0.3  # 300ms timeout for bans
+
+# Varnish bans ``obj.http.x-url ~ req.url``, so the pattern is sent as the request path. These
+# characters are left unquoted so that varnish sees the regex rather than its escaped form.
+BAN_PATTERN_SAFE = '/^()|.*\\'
+
+ban_stats = {
+    'batches': 0,
+    'bans': 0,
+    'failures': 0,
+    'paths': 0,
+}
+
 
 def get_varnish_servers():
     #  TODO: this should get the varnish servers from HAProxy or a setting
     return settings.VARNISH_SERVERS
 
 
-def get_bannable_urls(instance):
-    bannable_urls = []
-    parsed_absolute_url = {}
-
+def get_bannable_paths(instance):
+    """Return the API paths that must be banned when ``instance`` changes."""
     if not hasattr(instance, 'absolute_api_v2_url'):
         logger.warning('Tried to ban {}:{} but it didn\'t have a absolute_api_v2_url method'.format(instance.__class__, instance))
+        return []
+
+    paths = [urlparse.urlparse(instance.absolute_api_v2_url).path]
+    if isinstance(instance, Comment):
+        try:
+            paths.append(urlparse.urlparse(instance.target.referent.absolute_api_v2_url).path)
+        except AttributeError:
+            # some referents don't have an absolute_api_v2_url
+            # I'm looking at you NodeWikiPage
+            pass
+        try:
+            paths.append(urlparse.urlparse(instance.root_target.referent.absolute_api_v2_url).path)
+        except AttributeError:
+            # some root_targets don't have an absolute_api_v2_url
+            pass
+    return paths
+
+
+def get_bannable_urls(instance):
+    bannable_urls = []
+    paths = get_bannable_paths(instance)
+    if not paths:
         return [], ''
 
     for host in get_varnish_servers():
-        # add instance url
         varnish_parsed_url = urlparse.urlparse(host)
-        parsed_absolute_url = urlparse.urlparse(instance.absolute_api_v2_url)
-        url_string = '{scheme}://{netloc}{path}.*'.format(scheme=varnish_parsed_url.scheme,
-                                                          netloc=varnish_parsed_url.netloc,
-                                                          path=parsed_absolute_url.path)
-        bannable_urls.append(url_string)
-        if isinstance(instance, Comment):
-            try:
-                parsed_target_url = urlparse.urlparse(instance.target.referent.absolute_api_v2_url)
-            except AttributeError:
-                # some referents don't have an absolute_api_v2_url
-                # I'm looking at you NodeWikiPage
-                pass
-            else:
-                url_string = '{scheme}://{netloc}{path}.*'.format(scheme=varnish_parsed_url.scheme,
-                                                                  netloc=varnish_parsed_url.netloc,
-                                                                  path=parsed_target_url.path)
-                bannable_urls.append(url_string)
-
-            try:
-                parsed_root_target_url = urlparse.urlparse(instance.root_target.referent.absolute_api_v2_url)
-            except AttributeError:
-                # some root_targets don't have an absolute_api_v2_url
-                pass
-            else:
-                url_string = '{scheme}://{netloc}{path}.*'.format(scheme=varnish_parsed_url.scheme,
-                                                              netloc=varnish_parsed_url.netloc,
-                                                              path=parsed_root_target_url.path)
-                bannable_urls.append(url_string)
-
-    return bannable_urls, parsed_absolute_url.hostname
+        for path in paths:
+            bannable_urls.append('{scheme}://{netloc}{path}.*'.format(scheme=varnish_parsed_url.scheme,
+                                                                      netloc=varnish_parsed_url.netloc,
+                                                                      path=path))
+
+    return bannable_urls, urlparse.urlparse(instance.absolute_api_v2_url).hostname
+
+
+def get_ban_pattern(paths):
+    """Merge ``paths`` into a single ban regex that matches every URL under any of them."""
+    return '^({}).*'.format('|'.join(re.escape(path) for path in sorted(set(paths))))
+
+
+def get_ban_url(server, pattern):
+    """Return the URL of the BAN request for ``pattern`` on varnish ``server``."""
+    parsed = urlparse.urlparse(server)
+    return '{}://{}{}'.format(parsed.scheme, parsed.netloc, urllib.quote(pattern, safe=BAN_PATTERN_SAFE))
+
+
+def _get_session(server):
+    if server not in _sessions:
+        _sessions[server] = requests.Session()
+    return _sessions[server]
+
+
+def _send_ban(server, pattern, hostname):
+    session = _get_session(server)
+    start = time.time()
+    request = session.prepare_request(requests.Request('BAN', server, headers={'Host': hostname}))
+    # requests would quote the regex metacharacters again, see BAN_PATTERN_SAFE
+    request.url = get_ban_url(server, pattern)
+    try:
+        response = session.send(request, timeout=BAN_TIMEOUT)
+    except Exception as ex:
+        ban_stats['failures'] += 1
+        logger.error('Banning {} on {} failed after {:.0f}ms: {}'.format(
+            pattern, server, (time.time() - start) * 1000, ex.message
+        ))
+        return False
+    latency = (time.time() - start) * 1000
+    if not response.ok:
+        ban_stats['failures'] += 1
+        logger.error('Banning {} on {} failed after {:.0f}ms: {}'.format(pattern, server, latency, response.text))
+        return False
+    logger.info('Banning {} on {} succeeded in {:.0f}ms'.format(pattern, server, latency))
+    return True
+
+
+def ban_paths(paths, hostname):
+    """Ban every URL under ``paths`` with a single regex ban per varnish server,
+    sent to all servers concurrently.
+    """
+    if not settings.ENABLE_VARNISH or not paths:
+        return
+    servers = get_varnish_servers()
+    pattern = get_ban_pattern(paths)
+    pool = Pool(len(servers) or 1)
+    for server in servers:
+        pool.spawn(_send_ban, server, pattern, hostname)
+    pool.join(timeout=BAN_TIMEOUT * 2)
+    ban_stats['batches'] += 1
+    ban_stats['bans'] += len(servers)
+    ban_stats['paths'] += len(set(paths))
 
 
 def ban_url(instance):
-    # TODO: Refactor; Pull url generation into postcommit_task handling so we only ban urls once per request
-    timeout = 0.3  # 300ms timeout for bans
+    """Immediately ban all cached URLs for ``instance``."""
     if settings.ENABLE_VARNISH:
-        bannable_urls, hostname = get_bannable_urls(instance)
-
-        for url_to_ban in set(bannable_urls):
-            try:
-                response = requests.request('BAN', url_to_ban, timeout=timeout, headers=dict(
-                    Host=hostname
-                ))
-            except Exception as ex:
-                logger.error('Banning {} failed: {}'.format(
-                    url_to_ban,
-                    ex.message
-                ))
-            else:
-                if not response.ok:
-                    logger.error('Banning {} failed: {}'.format(
-                        url_to_ban,
-                        response.text
-                    ))
-                else:
-                    logger.info('Banning {} succeeded'.format(
-                        url_to_ban
-                    ))
+        paths = get_bannable_paths(instance)
+        if paths:
+            ban_paths(paths, urlparse.urlparse(instance.absolute_api_v2_url).hostname)
+
+
+class BanCollector(object):
+    """Collects the bannable paths of every object changed during a request, so
+    that they are banned together once the request has been committed.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.paths = set()
+        self.hostname = None
+
+    def add(self, instance):
+        paths = get_bannable_paths(instance)
+        if paths:
+            self.paths.update(paths)
+            self.hostname = self.hostname or urlparse.urlparse(instance.absolute_api_v2_url).hostname
+
+    def flush(self):
+        paths, self.paths = self.paths, set()
+        ban_paths(paths, self.hostname)
+
+
+def enqueue_ban(instance):
+    """Ban cached URLs for ``instance`` after the current request is committed.
+    All bans enqueued during one request are merged into a single ban per varnish server.
+    """
+    if not settings.ENABLE_VARNISH:
+        return
+    queue = postcommit_queue()
+    collector = getattr(_local, 'ban_collector', None)
+    # The postcommit queue is replaced at the start of every request
+    if collector is None or collector.queue is not queue:
+        collector = _local.ban_collector = BanCollector(queue)
+        enqueue_postcommit_task(collector.flush, (), {}, celery=False, once_per_request=True)
+    collector.add(instance)
@@ -0,0 +1,107 @@
+import re
+import urlparse
+
+import mock
+import pytest
+
+from api.caching import tasks
+from framework.postcommit_tasks.handlers import postcommit_before_request, postcommit_queue
+from osf_tests.factories import ProjectFactory
+from tests.stub_server import StubHandler, StubServer
+
+pytestmark = pytest.mark.django_db
+
+VARNISH_SERVERS = ['http://varnish-1:8080', 'http://varnish-2:8080']
+
+
+@pytest.fixture()
+def varnish():
+    with mock.patch('api.caching.tasks.settings.ENABLE_VARNISH', True), \
+            mock.patch('api.caching.tasks.settings.VARNISH_SERVERS', VARNISH_SERVERS), \
+            mock.patch.object(tasks, '_sessions', {}):
+        with mock.patch('api.caching.tasks.requests.Session') as mock_session:
+            mock_session.return_value.send.return_value = mock.Mock(ok=True)
+            yield mock_session.return_value
+
+
+class VarnishHandler(StubHandler):
+
+    def do_BAN(self):
+        self.server.stub.bans.append((self.path, self.headers.getheader('host')))
+        self.respond(500 if self.server.stub.failing else 200)
+
+
+class VarnishServer(StubServer):
+
+    handler_class = VarnishHandler
+
+    def __init__(self):
+        super(VarnishServer, self).__init__()
+        self.bans = []
+
+
+class TestBanPipeline:
+
+    def test_ban_pattern_merges_paths(self):
+        pattern = tasks.get_ban_pattern(['/v2/nodes/abcde/', '/v2/users/fghij/', '/v2/nodes/abcde/'])
+        assert pattern.startswith('^(')
+        assert pattern.endswith(').*')
+        assert pattern.count('|') == 1
+
+    def test_enqueued_bans_are_merged_into_one_ban_per_server(self, varnish):
+        first, second = ProjectFactory(), ProjectFactory()
+        postcommit_before_request()
+        tasks.enqueue_ban(first)
+        tasks.enqueue_ban(second)
+        tasks.enqueue_ban(first)
+
+        assert len(postcommit_queue()) == 1
+        for task in postcommit_queue().values():
+            task()
+
+        assert varnish.send.call_count == len(VARNISH_SERVERS)
+        ban_url = varnish.send.call_args[0][0].url
+        assert first._id in ban_url
+        assert second._id in ban_url
+
+    def test_ban_pattern_is_sent_as_the_request_path(self):
+        first, second = ProjectFactory(), ProjectFactory()
+        with VarnishServer() as server, \
+                mock.patch('api.caching.tasks.settings.ENABLE_VARNISH', True), \
+                mock.patch('api.caching.tasks.settings.VARNISH_SERVERS', [server.url]), \
+                mock.patch.object(tasks, '_sessions', {}):
+            tasks.ban_paths(
+                [urlparse.urlparse(node.absolute_api_v2_url).path for node in (first, second)],
+                'api.osf.io'
+            )
+
+        assert len(server.bans) == 1
+        path, host = server.bans[0]
+        assert host == 'api.osf.io'
+        # varnish bans ``obj.http.x-url ~ req.url``
+        assert path == tasks.get_ban_pattern([
+            urlparse.urlparse(node.absolute_api_v2_url).path for node in (first, second)
+        ])
+        for node in (first, second):
+            assert re.match(path, urlparse.urlparse(node.absolute_api_v2_url).path + 'children/?page=2')
+        assert not re.match(path, urlparse.urlparse(ProjectFactory().absolute_api_v2_url).path)
+
+    def test_new_request_gets_new_collector(self, varnish):
+        first, second = ProjectFactory(), ProjectFactory()
+        postcommit_before_request()
+        tasks.enqueue_ban(first)
+        postcommit_before_request()
+        tasks.enqueue_ban(second)
+        assert len(postcommit_queue()) == 1
+
+    def test_failures_are_counted(self, varnish):
+        varnish.send.return_value = mock.Mock(ok=False, text='nope')
+        failures = tasks.ban_stats['failures']
+        tasks.ban_url(ProjectFactory())
+        assert tasks.ban_stats['failures'] == failures + len(VARNISH_SERVERS)
+
+    def test_disabled_varnish_enqueues_nothing(self):
+        project = ProjectFactory()
+        postcommit_before_request()
+        tasks.enqueue_ban(project)
+        assert len(postcommit_queue()) == 0
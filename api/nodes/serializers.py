@@ -127,6 +127,8 @@ class NodeSerializer(JSONAPISerializer):
         'preprint'
     ])
 
+    cache_representation = True
+
     non_anonymized_fields = [
         'id',
         'title',
@@ -324,7 +326,12 @@ class NodeSerializer(JSONAPISerializer):
         user = self.context['request'].user
         if user.is_anonymous():
             return ['read']
-        permissions = obj.get_permissions(user=user)
+        node_permissions = self.context.get('node_permissions')
+        if node_permissions and obj.id in node_permissions:
+            # Resolved for the whole page by the list view
+            permissions = [perm for perm in osf_permissions.PERMISSIONS if perm in node_permissions[obj.id]]
+        else:
+            permissions = obj.get_permissions(user=user)
         if not permissions:
             permissions = ['read']
         return permissions
@@ -337,6 +344,14 @@ class NodeSerializer(JSONAPISerializer):
     class Meta:
         type_ = 'nodes'
 
+    # Counts that list views load for a whole page with one grouped query each, see
+    # JSONAPIBaseView.load_related_counts. Maps the count method to (model, foreign key to the node, filters).
+    related_count_queries = {
+        'get_contrib_count': ('osf.Contributor', 'node', {}),
+        'get_logs_count': ('osf.NodeLog', 'node', {}),
+        'get_pointers_count': ('osf.NodeRelation', 'parent', {'is_node_link': True}),
+    }
+
     def get_absolute_url(self, obj):
         return obj.get_absolute_url()
 
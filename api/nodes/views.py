@@ -47,7 +47,7 @@ from api.base.views import (
     LinkedNodesRelationship,
     LinkedRegistrationsRelationship
 )
-from api.caching.tasks import ban_url
+from api.caching.tasks import enqueue_ban
 from api.citations.utils import render_citation
 from api.comments.permissions import CanCommentOrPublic
 from api.comments.serializers import (CommentCreateSerializer,
@@ -97,7 +97,6 @@ from api.registrations.serializers import RegistrationSerializer
 from api.users.views import UserMixin
 from api.wikis.serializers import NodeWikiSerializer
 from framework.auth.oauth_scopes import CoreScopes
-from framework.postcommit_tasks.handlers import enqueue_postcommit_task
 from osf.models import AbstractNode
 from osf.models import (Node, PrivateLink, NodeLog, Institution, Comment, DraftRegistration, PreprintService, FileNode)
 from osf.models import OSFUser as User
@@ -106,7 +105,7 @@ from osf.models import BaseFileNode
 from osf.models.files import File, Folder
 from addons.wiki.models import NodeWikiPage
 from website.exceptions import NodeStateError
-from website.util.permissions import ADMIN, PERMISSIONS
+from website.util.permissions import ADMIN, PERMISSIONS, WRITE
 
 
 class NodeMixin(object):
@@ -279,6 +278,10 @@ class NodeList(JSONAPIBaseView, bulk_views.BulkUpdateJSONAPIView, bulk_views.Bul
 
     + `page=<Int>` -- page number of results to view, default 1
 
+    + `page[cursor]=<Str>` -- page through the nodes by cursor instead of page number; empty for the first page. The
+    `prev` and `next` links carry the cursors of the neighbouring pages, and `meta.total` is only counted with `page[total]=true`.
+    Can not be combined with `sort`.
+
     + `filter[<fieldname>]=<Str>` -- fields and values to filter the search results on.
 
     + `view_only=<Str>` -- Allow users with limited access keys to access this node. Note that some keys are anonymous,
@@ -307,6 +310,7 @@ class NodeList(JSONAPIBaseView, bulk_views.BulkUpdateJSONAPIView, bulk_views.Bul
     view_name = 'node-list'
 
     ordering = ('-date_modified', )  # default ordering
+    cursor_ordering = ('-date_modified', '-id')
 
     # overrides FilterMixin
     def postprocess_query_param(self, key, field_name, operation):
@@ -340,20 +344,21 @@ class NodeList(JSONAPIBaseView, bulk_views.BulkUpdateJSONAPIView, bulk_views.Bul
             auth = get_user_auth(self.request)
 
             nodes = AbstractNode.find(query)
+            permissions = AbstractNode.objects.permissions_for(auth.user, [node.id for node in nodes])
 
             # If skip_uneditable=True in query_params, skip nodes for which the user
             # does not have EDIT permissions.
             if is_truthy(self.request.query_params.get('skip_uneditable', False)):
                 has_permission = []
                 for node in nodes:
-                    if node.can_edit(auth):
+                    if WRITE in permissions[node.id]:
                         has_permission.append(node)
 
                 query = MQ('_id', 'in', [node._id for node in has_permission])
                 return AbstractNode.find(query)
 
             for node in nodes:
-                if not node.can_edit(auth):
+                if WRITE not in permissions[node.id]:
                     raise PermissionDenied
             return nodes
         else:
@@ -370,6 +375,20 @@ class NodeList(JSONAPIBaseView, bulk_views.BulkUpdateJSONAPIView, bulk_views.Bul
         else:
             return NodeSerializer
 
+    # overrides GenericAPIView
+    def paginate_queryset(self, queryset):
+        page = super(NodeList, self).paginate_queryset(queryset)
+        if page is not None:
+            user = get_user_auth(self.request).user
+            self.node_permissions = AbstractNode.objects.permissions_for(user, [node.id for node in page])
+        return page
+
+    # overrides JSONAPIBaseView
+    def get_serializer_context(self):
+        context = super(NodeList, self).get_serializer_context()
+        context['node_permissions'] = getattr(self, 'node_permissions', None)
+        return context
+
     # overrides ListBulkCreateJSONAPIView
     def perform_create(self, serializer):
         """Create a node.
@@ -383,9 +402,10 @@ class NodeList(JSONAPIBaseView, bulk_views.BulkUpdateJSONAPIView, bulk_views.Bul
     # overrides BulkDestroyJSONAPIView
     def allow_bulk_destroy_resources(self, user, resource_list):
         """User must have admin permissions to delete nodes."""
+        permissions = AbstractNode.objects.permissions_for(user, [node.id for node in resource_list])
         if is_truthy(self.request.query_params.get('skip_uneditable', False)):
-            return any([node.has_permission(user, ADMIN) for node in resource_list])
-        return all([node.has_permission(user, ADMIN) for node in resource_list])
+            return any([ADMIN in permissions[node.id] for node in resource_list])
+        return all([ADMIN in permissions[node.id] for node in resource_list])
 
     def bulk_destroy_skip_uneditable(self, resource_object_list, user, object_type):
         """
@@ -2625,6 +2645,9 @@ class NodeLogList(JSONAPIBaseView, generics.ListAPIView, NodeMixin, ODMFilterMix
 
     Logs may be filtered by their `action` and `date`.
 
+    Logs may be paged through by cursor with `page[cursor]=`, which returns the first page; follow the `prev` and `next`
+    links from there. Such pages only count `meta.total` with `page[total]=true`.
+
     #This Request/Response
 
     """
@@ -2639,6 +2662,7 @@ class NodeLogList(JSONAPIBaseView, generics.ListAPIView, NodeMixin, ODMFilterMix
     log_lookup_url_kwarg = 'node_id'
 
     ordering = ('-date', )
+    cursor_ordering = ('-date', '-id')
 
     permission_classes = (
         drf_permissions.IsAuthenticatedOrReadOnly,
@@ -3456,7 +3480,7 @@ class NodeViewOnlyLinkDetail(JSONAPIBaseView, generics.RetrieveUpdateDestroyAPIV
         assert isinstance(link, PrivateLink), 'link must be a PrivateLink'
         link.is_deleted = True
         link.save()
-        enqueue_postcommit_task(ban_url, (self.get_node(),), {}, celery=True, once_per_request=True)
+        enqueue_ban(self.get_node())
 
 
 class NodeIdentifierList(NodeMixin, IdentifierList):
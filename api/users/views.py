@@ -496,6 +496,7 @@ class UserNodes(JSONAPIBaseView, generics.ListAPIView, UserMixin, NodeODMFilterM
     view_name = 'user-nodes'
 
     ordering = ('-date_modified',)
+    cursor_ordering = ('-date_modified', '-id')
 
     # overrides ODMFilterMixin
     def get_default_odm_query(self):
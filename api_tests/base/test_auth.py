@@ -139,6 +139,86 @@ class TestOAuthValidation(ApiTestCase):
         res = self.app.get(self.unreachable_url, auth='some_valid_token', auth_type='jwt', expect_errors=True)
         assert_equal(res.status_code, 403, msg=res.json)
 
+    @mock.patch('framework.auth.cas.CasClient.profile')
+    def test_valid_token_is_cached(self, mock_user_info):
+        mock_user_info.return_value = cas.CasResponse(authenticated=True, user=self.user1._id,
+                                                      attributes={'accessTokenScope': ['osf.full_read']})
+
+        for _ in range(2):
+            res = self.app.get(self.reachable_url, auth='some_valid_token', auth_type='jwt')
+            assert_equal(res.status_code, 200, msg=res.json)
+        assert_equal(mock_user_info.call_count, 1)
+        assert_true(cas.profile_cache.stats['hits'] >= 1)
+
+    def test_non_ascii_token_can_be_cached(self):
+        assert_equal(cas.ProfileCache._key(u'jet\xf3n'), cas.ProfileCache._key(u'jet\xf3n'.encode('utf-8')))
+        assert_equal(cas.ProfileCache._key(u'some_valid_token'), cas.ProfileCache._key('some_valid_token'))
+
+    @mock.patch('framework.auth.cas.CasClient.profile')
+    def test_invalid_token_is_cached(self, mock_user_info):
+        mock_user_info.return_value = cas.CasResponse(authenticated=False, user=None,
+                                                      attributes={'accessTokenScope': ['osf.full_read']})
+
+        for _ in range(2):
+            res = self.app.get(self.reachable_url, auth='invalid_token', auth_type='jwt', expect_errors=True)
+            assert_equal(res.status_code, 401, msg=res.json)
+        assert_equal(mock_user_info.call_count, 1)
+
+    @mock.patch('framework.auth.cas.CasClient.profile')
+    def test_cas_server_errors_are_not_cached(self, mock_user_info):
+        mock_user_info.side_effect = cas.CasHTTPError(500, 'Unexpected response from CAS server', {}, '')
+
+        for _ in range(2):
+            res = self.app.get(self.reachable_url, auth='some_valid_token', auth_type='jwt', expect_errors=True)
+            assert_equal(res.status_code, 401, msg=res.json)
+        assert_equal(mock_user_info.call_count, 2)
+
+    @mock.patch('framework.auth.cas.requests.post')
+    @mock.patch('framework.auth.cas.CasClient.profile')
+    def test_revoked_token_is_not_cached(self, mock_user_info, mock_post):
+        mock_user_info.return_value = cas.CasResponse(authenticated=True, user=self.user1._id,
+                                                      attributes={'accessTokenScope': ['osf.full_read']})
+        mock_post.return_value = mock.Mock(status_code=204)
+
+        self.app.get(self.reachable_url, auth='some_valid_token', auth_type='jwt')
+        cas.get_client().revoke_tokens({'token': 'some_valid_token'})
+        mock_user_info.return_value = cas.CasResponse(authenticated=False)
+        res = self.app.get(self.reachable_url, auth='some_valid_token', auth_type='jwt', expect_errors=True)
+        assert_equal(res.status_code, 401, msg=res.json)
+        assert_equal(mock_user_info.call_count, 2)
+
+    @mock.patch('framework.auth.cas.CasClient.profile')
+    def test_token_revoked_by_another_process_is_not_cached(self, mock_user_info):
+        mock_user_info.return_value = cas.CasResponse(authenticated=True, user=self.user1._id,
+                                                      attributes={'accessTokenScope': ['osf.full_read']})
+        self.app.get(self.reachable_url, auth='some_valid_token', auth_type='jwt')
+        # Another process has its own cache, but shares the record of revocations
+        cas.ProfileCache().invalidate('some_valid_token')
+
+        mock_user_info.return_value = cas.CasResponse(authenticated=False)
+        res = self.app.get(self.reachable_url, auth='some_valid_token', auth_type='jwt', expect_errors=True)
+        assert_equal(res.status_code, 401, msg=res.json)
+        assert_equal(mock_user_info.call_count, 2)
+
+    @mock.patch('framework.auth.cas.CasClient.profile')
+    def test_tokens_revoked_by_client_in_another_process_are_not_cached(self, mock_user_info):
+        mock_user_info.return_value = cas.CasResponse(authenticated=True, user=self.user1._id,
+                                                      attributes={'accessTokenScope': ['osf.full_read']})
+        self.app.get(self.reachable_url, auth='some_valid_token', auth_type='jwt')
+        invalidations = cas.profile_cache.stats['invalidations']
+        cas.ProfileCache().invalidate_all()
+
+        self.app.get(self.reachable_url, auth='some_valid_token', auth_type='jwt')
+        assert_equal(mock_user_info.call_count, 2)
+        assert_equal(cas.profile_cache.stats['invalidations'], invalidations + 1)
+
+    def test_revocation_while_asking_cas_is_not_missed(self):
+        cache = cas.ProfileCache()
+        generations = cache.generations('some_valid_token')
+        cas.ProfileCache().invalidate('some_valid_token')
+        cache.set('some_valid_token', cas.CasResponse(authenticated=True, user=self.user1._id), self.user1.pk, generations)
+        assert_is_none(cache.get('some_valid_token'))
+
 
 class TestOAuthScopedAccess(ApiTestCase):
     """Verify that OAuth2 scopes restrict APIv2 access for a few sample views. These tests cover basic mechanics,
@@ -9,6 +9,8 @@ import urllib
 from nose.tools import *  # flake8: noqa
 import re
 
+import mock
+
 from tests.base import ApiTestCase, DbTestCase
 from osf_tests import factories
 from tests.utils import make_drf_request_with_version
@@ -16,8 +18,10 @@ from tests.utils import make_drf_request_with_version
 from api.base.settings.defaults import API_BASE
 from api.base.serializers import JSONAPISerializer
 from api.base import serializers as base_serializers
+from api.caching import representations
 from api.nodes.serializers import NodeSerializer, RelationshipField
 from api.registrations.serializers import RegistrationSerializer
+from osf.models import Retraction
 
 
 class FakeModel(object):
@@ -229,6 +233,87 @@ class TestApiBaseSerializers(ApiTestCase):
 
 
 
+@mock.patch('api.base.settings.REPRESENTATION_CACHE_ENABLED', True)
+class TestRepresentationCache(ApiTestCase):
+
+    def setUp(self):
+        super(TestRepresentationCache, self).setUp()
+        representations.get_cache().clear()
+        self.user = factories.AuthUserFactory()
+        self.node = factories.ProjectFactory(creator=self.user, is_public=True)
+        self.url = '/{}nodes/{}/'.format(API_BASE, self.node._id)
+
+    def patch_permissions(self):
+        return mock.patch.object(NodeSerializer, 'get_current_user_permissions', return_value=['read'])
+
+    def test_anonymous_representation_is_cached(self):
+        with self.patch_permissions() as mock_permissions:
+            first = self.app.get(self.url)
+            second = self.app.get(self.url)
+        assert_equal(mock_permissions.call_count, 1)
+        assert_equal(first.json, second.json)
+
+    def test_authenticated_representation_is_not_cached(self):
+        with self.patch_permissions() as mock_permissions:
+            self.app.get(self.url, auth=self.user.auth)
+            self.app.get(self.url, auth=self.user.auth)
+        assert_equal(mock_permissions.call_count, 2)
+
+    def test_embeds_and_related_counts_are_not_cached(self):
+        with self.patch_permissions() as mock_permissions:
+            self.app.get(self.url, params={'embed': 'contributors'})
+            self.app.get(self.url, params={'related_counts': 'true'})
+            self.app.get(self.url, params={'related_counts': 'true'})
+        assert_equal(mock_permissions.call_count, 3)
+
+    def test_view_only_requests_are_not_cached(self):
+        first_link = factories.PrivateLinkFactory(anonymous=False)
+        second_link = factories.PrivateLinkFactory(anonymous=False)
+        first_link.nodes.add(self.node)
+        second_link.nodes.add(self.node)
+
+        first = self.app.get(self.url, params={'view_only': first_link.key})
+        second = self.app.get(self.url, params={'view_only': second_link.key})
+        anonymous = self.app.get(self.url)
+
+        assert_in(first_link.key, first.body)
+        assert_in(second_link.key, second.body)
+        assert_not_in(first_link.key, second.body)
+        assert_not_in(first_link.key, anonymous.body)
+        assert_not_in(second_link.key, anonymous.body)
+
+    def test_saving_node_invalidates_representation(self):
+        self.app.get(self.url)
+        self.node.title = 'A new title'
+        self.node.save()
+        res = self.app.get(self.url)
+        assert_equal(res.json['data']['attributes']['title'], 'A new title')
+
+    def test_invalidate_representations_changes_key(self):
+        self.app.get(self.url)
+        with self.patch_permissions() as mock_permissions:
+            representations.invalidate_representations(self.node)
+            self.app.get(self.url)
+        assert_equal(mock_permissions.call_count, 1)
+
+    def test_saving_sanction_invalidates_registration_representation(self):
+        retraction = factories.RetractionFactory(user=self.user)
+        registration = retraction.registrations.get()
+        key = representations._generation_key(registration)
+        generation = representations.get_cache().get(key, 0)
+        retraction.state = Retraction.APPROVED
+        retraction.save()
+        assert_equal(representations.get_cache().get(key), generation + 1)
+
+    def test_disabled_cache_is_not_touched_on_save(self):
+        with mock.patch('api.base.settings.REPRESENTATION_CACHE_ENABLED', False), \
+                mock.patch.object(representations, 'get_cache') as mock_get_cache:
+            self.node.title = 'A new title'
+            self.node.save()
+        assert_false(mock_get_cache.called)
+
+
+
 @pytest.mark.django_db
 class TestRelationshipField:
 
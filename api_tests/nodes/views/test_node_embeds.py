@@ -1,9 +1,13 @@
 from nose.tools import *  # flake8: noqa
 import functools
 
+import mock
+
 from framework.auth.core import Auth
 
 from api.base.settings.defaults import API_BASE
+from api.base.views import BaseContributorList
+from api.nodes.views import NodeContributorsList
 from tests.base import ApiTestCase
 from osf_tests.factories import (
     ProjectFactory,
@@ -98,3 +102,33 @@ class TestNodeEmbeds(ApiTestCase):
         res = self.app.get(url, auth=self.contrib1.auth)
         assert_equal(res.status_code, 200)
         assert_equal(res.json['data']['embeds']['contributors']['meta']['total_bibliographic'], 3)
+
+    def test_embed_contributors_in_node_list(self):
+        url = '/{}nodes/?embed=contributors'.format(API_BASE)
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        nodes = {node['id']: node for node in res.json['data']}
+        for node in (self.root_node, self.child1, self.child2):
+            embedded = nodes[node._id]['embeds']['contributors']
+            expected = ['{}-{}'.format(node._id, contributor._id) for contributor in node.contributors]
+            assert_equal([contrib['id'] for contrib in embedded['data']], expected)
+            assert_equal(embedded['links']['meta']['total_bibliographic'], len(node.visible_contributors))
+
+    def test_embed_contributors_in_node_list_loads_contributors_once(self):
+        url = '/{}nodes/?embed=contributors'.format(API_BASE)
+        with mock.patch.object(NodeContributorsList, 'get_embed_batch', autospec=True,
+                               side_effect=BaseContributorList.get_embed_batch) as mock_batch:
+            res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_equal(mock_batch.call_count, 1)
+        parents = mock_batch.call_args[0][1]
+        assert_equal({node._id for node in parents}, {node['id'] for node in res.json['data']})
+
+    def test_embed_contributors_in_filtered_node_list_loads_contributors_once(self):
+        # Filters and sorting in the query string apply to the node list, not to the embedded contributors
+        url = '/{}nodes/?embed=contributors&filter[category]=project&sort=-date_created'.format(API_BASE)
+        with mock.patch.object(NodeContributorsList, 'get_embed_batch', autospec=True,
+                               side_effect=BaseContributorList.get_embed_batch) as mock_batch:
+            res = self.app.get(url, auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_equal(mock_batch.call_count, 1)
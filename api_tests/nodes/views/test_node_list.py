@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from nose.tools import *  # flake8: noqa
+import mock
 import pytest
 
 from django.db.models import F
@@ -115,6 +116,21 @@ class TestNodeList(ApiTestCase):
             project = Node.load(project_json['id'])
             assert_equal(project_json['embeds']['root']['data']['id'], project.root._id)
 
+    def test_node_list_related_counts_are_loaded_per_page(self):
+        self.public.add_contributor(UserFactory(), auth=Auth(self.user), save=True)
+        url = self.url + '?related_counts=contributors,logs'
+        with mock.patch('api.nodes.serializers.NodeSerializer.get_contrib_count') as mock_contrib_count, \
+                mock.patch('api.nodes.serializers.NodeSerializer.get_logs_count') as mock_logs_count:
+            res = self.app.get(url, auth=self.user.auth)
+        assert_false(mock_contrib_count.called)
+        assert_false(mock_logs_count.called)
+        for project_json in res.json['data']:
+            project = Node.load(project_json['id'])
+            relationships = project_json['relationships']
+            assert_equal(relationships['contributors']['links']['related']['meta']['count'], len(project.contributors))
+            assert_equal(relationships['logs']['links']['related']['meta']['count'], project.logs.count())
+            assert_not_in('count', relationships['children']['links']['related']['meta'])
+
 
 class TestNodeFiltering(ApiTestCase):
 
@@ -150,3 +150,74 @@ class TestNodeLogFiltering(TestNodeLogList):
         assert_equal(res.status_code, 200)
         assert_equal(len(res.json['data']), 1)
         assert_equal(res.json['data'][0]['attributes']['action'], 'project_created')
+
+
+class TestNodeLogCursorPagination(ApiTestCase):
+
+    def setUp(self):
+        super(TestNodeLogCursorPagination, self).setUp()
+        self.user = AuthUserFactory()
+        self.project = ProjectFactory(is_public=True, creator=self.user)
+        for i in range(6):
+            self.project.add_tag('tag{}'.format(i), auth=Auth(self.user))
+        # Ties on date are broken by id
+        NodeLog.objects.filter(node=self.project, action='tag_added').update(date=self.project.logs.latest().date)
+        self.url = '/{}nodes/{}/logs/?version=2.2&page[size]=3&page[cursor]='.format(API_BASE, self.project._id)
+
+    def test_pages_cover_logs_in_order(self):
+        expected = list(self.project.logs.order_by('-date', '-id').values_list('id', flat=True))
+        seen = []
+        url = self.url
+        while url:
+            res = self.app.get(url, auth=self.user.auth)
+            assert_equal(res.status_code, 200)
+            assert_equal(res.json['meta']['total'], None)
+            seen.extend(log['id'] for log in res.json['data'])
+            url = res.json['links']['next']
+        assert_equal(len(seen), len(expected))
+        assert_equal(seen, [log._id for log in NodeLog.objects.filter(id__in=expected).order_by('-date', '-id')])
+
+    def test_prev_link(self):
+        first = self.app.get(self.url, auth=self.user.auth).json
+        assert_equal(first['links']['prev'], None)
+        second = self.app.get(first['links']['next'], auth=self.user.auth).json
+        assert_equal(second['links']['first'], first['links']['self'])
+        previous = self.app.get(second['links']['prev'], auth=self.user.auth).json
+        assert_equal([log['id'] for log in previous['data']], [log['id'] for log in first['data']])
+        assert_equal(previous['links']['prev'], None)
+
+    def test_cursor_past_the_end(self):
+        first = self.app.get(self.url, auth=self.user.auth).json
+        first_ids = [log['id'] for log in first['data']]
+        self.project.logs.exclude(_id__in=first_ids).delete()
+        res = self.app.get(first['links']['next'], auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_equal(res.json['data'], [])
+        assert_equal(res.json['links']['next'], None)
+        previous = self.app.get(res.json['links']['prev'], auth=self.user.auth).json
+        assert_equal([log['id'] for log in previous['data']], first_ids)
+
+    def test_cursor_before_the_start(self):
+        first = self.app.get(self.url, auth=self.user.auth).json
+        second = self.app.get(first['links']['next'], auth=self.user.auth).json
+        second_ids = [log['id'] for log in second['data']]
+        self.project.logs.filter(_id__in=[log['id'] for log in first['data']]).delete()
+        res = self.app.get(second['links']['prev'], auth=self.user.auth)
+        assert_equal(res.status_code, 200)
+        assert_equal(res.json['data'], [])
+        assert_equal(res.json['links']['prev'], None)
+        following = self.app.get(res.json['links']['next'], auth=self.user.auth).json
+        assert_equal([log['id'] for log in following['data']], second_ids)
+
+    def test_total_on_request(self):
+        res = self.app.get(self.url + '&page[total]=true', auth=self.user.auth)
+        assert_equal(res.json['meta']['total'], self.project.logs.count())
+
+    def test_cursor_can_not_be_sorted(self):
+        res = self.app.get(self.url + '&sort=date', auth=self.user.auth, expect_errors=True)
+        assert_equal(res.status_code, 400)
+        assert_equal(res.json['errors'][0]['source']['parameter'], 'page[cursor]')
+
+    def test_invalid_cursor(self):
+        res = self.app.get(self.url + 'nope', auth=self.user.auth, expect_errors=True)
+        assert_equal(res.status_code, 400)
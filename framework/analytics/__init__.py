@@ -1,13 +1,14 @@
 #!/usr/bin/env python
 # encoding: utf-8
 
+import atexit
 import functools
 import logging
 
 from flask import request
 
 from framework.celery_tasks import app
-from framework.postcommit_tasks.handlers import run_postcommit
+from framework.postcommit_tasks.handlers import enqueue_postcommit_task, run_postcommit
 
 logger = logging.getLogger(__name__)
 
@@ -50,14 +51,32 @@ def build_page(rex, kwargs):
     except KeyError:
         return None
 
+def flush_page_counters():
+    from osf.models.analytics import page_counter_buffer
+    page_counter_buffer.flush()
+
+
+def _flush_page_counters_at_exit():
+    try:
+        flush_page_counters()
+    except Exception:
+        logger.exception('Could not write buffered page counts')
+
+atexit.register(_flush_page_counters_at_exit)
+
+
 def update_counter(page, node_info=None, db=None):
-    """Update counters for page.
+    """Update counters for page. Counts are buffered and written in the background,
+    or after the request once ``settings.PAGE_COUNTER_MAX_PENDING`` pages have pending counts.
 
     :param str page: Colon-delimited page key in analytics collection
     :param db: MongoDB database or `None`
     """
-    from osf.models import PageCounter
-    return PageCounter.update_counter(page, node_info)
+    from osf.models.analytics import PageCounter, page_counter_buffer
+    ret = PageCounter.update_counter(page, node_info)
+    if page_counter_buffer.is_due():
+        enqueue_postcommit_task(flush_page_counters, (), {}, celery=False, once_per_request=True)
+    return ret
 
 def update_counters(rex, node_info=None, db=None):
     """Create a decorator that updates analytics in `pagecounters` when the
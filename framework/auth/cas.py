@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
 
+import collections
 import furl
+import hashlib
 import httplib as http
 import json
+import threading
+import time
 import urllib
 
+from django.core.cache import caches
 from lxml import etree
 import requests
 
@@ -185,11 +190,145 @@ class CasClient(object):
 
         resp = requests.post(url, data=payload)
         if resp.status_code == 204:
+            # Tokens revoked by client id can't be told apart in the cache, so all are dropped
+            if 'token' in payload:
+                profile_cache.invalidate(payload['token'])
+            else:
+                profile_cache.invalidate_all()
             return True
         else:
             self._handle_error(resp)
 
 
+class ProfileCache(object):
+    """Bounded, per-process cache of the CAS profiles of OAuth2 access tokens, so that API
+    requests with a bearer token don't all wait on CAS.
+
+    Valid tokens are kept for ``CAS_PROFILE_CACHE_TTL`` seconds along with the primary key of
+    their user. Invalid tokens are kept for ``CAS_PROFILE_CACHE_NEGATIVE_TTL`` seconds. Setting
+    ``CAS_PROFILE_CACHE_TTL`` to 0 disables the cache.
+
+    Revocations are counted in the shared ``CAS_PROFILE_CACHE_ALIAS`` Django cache, per token and
+    for all tokens, and every entry remembers the counts it was cached under, so a token revoked
+    in any process is dropped from every process's cache the next time it is used.
+    """
+
+    Entry = collections.namedtuple('Entry', ['expires', 'response', 'user_pk', 'generations'])
+
+    REVOKED_ALL_KEY = 'cas:profile:revoked'
+    REVOKED_KEY = 'cas:profile:revoked:{}'
+
+    def __init__(self):
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+
+    @staticmethod
+    def _key(access_token):
+        # Don't keep the tokens themselves in memory
+        if isinstance(access_token, unicode):
+            access_token = access_token.encode('utf-8')
+        return hashlib.sha256(access_token).hexdigest()
+
+    @staticmethod
+    def _shared_cache():
+        return caches[settings.CAS_PROFILE_CACHE_ALIAS]
+
+    def _generations(self, key):
+        token_key = self.REVOKED_KEY.format(key)
+        revoked = self._shared_cache().get_many([self.REVOKED_ALL_KEY, token_key])
+        return revoked.get(self.REVOKED_ALL_KEY, 0), revoked.get(token_key, 0)
+
+    def generations(self, access_token):
+        """Return the revocation counts of ``access_token``, to be passed to ``set`` once CAS
+        has been asked about it, so that a revocation in the meantime is not missed.
+        """
+        if not settings.CAS_PROFILE_CACHE_TTL:
+            return None
+        return self._generations(self._key(access_token))
+
+    def get(self, access_token):
+        """Return the cached ``Entry`` for ``access_token``, or None. The response of an entry is
+        None if CAS rejected the token, or a ``CasResponse`` that may not be authenticated.
+        """
+        key = self._key(access_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.time():
+                del self._entries[key]
+                entry = None
+        if entry is not None and entry.generations != self._generations(key):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                self.stats['invalidations'] += 1
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.stats['misses'] += 1
+            elif entry.response is None or not entry.response.authenticated:
+                self.stats['negative_hits'] += 1
+            else:
+                self.stats['hits'] += 1
+        return entry
+
+    def set(self, access_token, response, user_pk=None, generations=None):
+        if not settings.CAS_PROFILE_CACHE_TTL:
+            return
+        if response is None or not response.authenticated:
+            ttl = settings.CAS_PROFILE_CACHE_NEGATIVE_TTL
+        else:
+            ttl = settings.CAS_PROFILE_CACHE_TTL
+        key = self._key(access_token)
+        if generations is None:
+            generations = self._generations(key)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = self.Entry(time.time() + ttl, response, user_pk, generations)
+            while len(self._entries) > settings.CAS_PROFILE_CACHE_MAX_SIZE:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _revoke(self, shared_key, timeout):
+        cache = self._shared_cache()
+        try:
+            cache.incr(shared_key)
+        except ValueError:
+            cache.set(shared_key, 1, timeout)
+
+    def invalidate(self, access_token):
+        """Drop ``access_token`` from the caches of all processes."""
+        key = self._key(access_token)
+        # Outlives every entry cached before the revocation
+        self._revoke(self.REVOKED_KEY.format(key), max(settings.CAS_PROFILE_CACHE_TTL, settings.CAS_PROFILE_CACHE_NEGATIVE_TTL))
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.stats['invalidations'] += 1
+
+    def invalidate_all(self):
+        """Drop every token from the caches of all processes."""
+        self._revoke(self.REVOKED_ALL_KEY, None)
+        self.clear()
+
+    def clear(self):
+        """Drop every token from this process's cache."""
+        with self._lock:
+            self.stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+profile_cache = ProfileCache()
+
+
 def parse_auth_header(header):
     """
     Given an Authorization header string, e.g. 'Bearer abc123xyz',
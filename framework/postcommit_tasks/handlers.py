@@ -3,21 +3,33 @@ import functools
 import hashlib
 import logging
 import threading
+import time
 
 import binascii
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
+from multiprocessing.pool import ThreadPool
 import os
 
 from celery import chain
+from django.db import close_old_connections
 from framework.celery_tasks import app
 from celery.local import PromiseProxy
 from gevent.pool import Pool
 
+from framework import sentry
 from website import settings
 
 _local = threading.local()
 logger = logging.getLogger(__name__)
 
+# Long-lived worker pool of the 'background' executor, created lazily in each process
+_executor = None
+_executor_pid = None
+
+_stats_lock = threading.Lock()
+# task name -> {'calls', 'errors', 'total_ms', 'max_ms'}
+postcommit_stats = defaultdict(lambda: {'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+
 def postcommit_queue():
     if not hasattr(_local, 'postcommit_queue'):
         _local.postcommit_queue = OrderedDict()
@@ -38,6 +50,48 @@ def postcommit_celery_task_wrapper(queue):
     # http://stackoverflow.com/questions/34177131/how-to-solve-python-celery-error-when-using-chain-encodeerrorruntimeerrormaxi?answertab=votes#tab-top
     chain(*queue.values()).apply()
 
+def get_task_name(func):
+    func = getattr(func, 'func', func)  # unwrap functools.partial
+    return '{}.{}'.format(getattr(func, '__module__', None), getattr(func, '__name__', repr(func)))
+
+def run_postcommit_task(func, reraise=True):
+    """Run a queued postcommit task and record its timing in ``postcommit_stats``."""
+    name = get_task_name(func)
+    start = time.time()
+    failed = False
+    try:
+        return func()
+    except Exception:
+        failed = True
+        if reraise:
+            raise
+        logger.exception('Postcommit task {} failed'.format(name))
+        sentry.log_exception()
+    finally:
+        elapsed = (time.time() - start) * 1000
+        with _stats_lock:
+            stats = postcommit_stats[name]
+            stats['calls'] += 1
+            stats['errors'] += int(failed)
+            stats['total_ms'] += elapsed
+            stats['max_ms'] = max(stats['max_ms'], elapsed)
+        if elapsed >= settings.POSTCOMMIT_SLOW_TASK_MS:
+            logger.warning('Postcommit task {} took {:.0f}ms'.format(name, elapsed))
+
+def _run_in_background(func):
+    try:
+        run_postcommit_task(func, reraise=False)
+    finally:
+        # Worker threads outlive requests, so they have to release connections themselves
+        close_old_connections()
+
+def get_postcommit_executor():
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPool(settings.POSTCOMMIT_EXECUTOR_POOL_SIZE)
+        _executor_pid = os.getpid()
+    return _executor
+
 def postcommit_after_request(response, base_status_error_code=500):
     if response.status_code >= base_status_error_code:
         _local.postcommit_queue = OrderedDict()
@@ -45,11 +99,17 @@ def postcommit_after_request(response, base_status_error_code=500):
         return response
     try:
         if postcommit_queue():
-            number_of_threads = 30  # one db connection per greenlet, let's share
-            pool = Pool(number_of_threads)
-            for func in postcommit_queue().values():
-                pool.spawn(func)
-            pool.join(timeout=5.0, raise_error=True)  # 5 second timeout and reraise exceptions
+            if settings.POSTCOMMIT_EXECUTOR == 'background':
+                # Hand the tasks to the long-lived pool without waiting for them
+                executor = get_postcommit_executor()
+                for func in postcommit_queue().values():
+                    executor.apply_async(_run_in_background, (func, ))
+            else:
+                number_of_threads = 30  # one db connection per greenlet, let's share
+                pool = Pool(number_of_threads)
+                for func in postcommit_queue().values():
+                    pool.spawn(run_postcommit_task, func)
+                pool.join(timeout=5.0, raise_error=True)  # 5 second timeout and reraise exceptions
 
         if postcommit_celery_queue():
             if settings.USE_CELERY:
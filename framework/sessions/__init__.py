@@ -16,6 +16,7 @@ from werkzeug.local import LocalProxy
 
 from framework.flask import redirect
 from framework.sessions.model import Session
+from framework.sessions.store import get_store
 from framework.sessions.utils import remove_session
 from website import settings
 
@@ -92,12 +93,12 @@ def create_session(response, data=None):
     current_session = get_session()
     if current_session:
         current_session.data.update(data or {})
-        current_session.save()
+        get_store().save(current_session)
         cookie_value = itsdangerous.Signer(settings.SECRET_KEY).sign(current_session._id)
     else:
         session_id = str(bson.objectid.ObjectId())
         new_session = Session(_id=session_id, data=data or {})
-        new_session.save()
+        get_store().save(new_session)
         cookie_value = itsdangerous.Signer(settings.SECRET_KEY).sign(session_id)
         set_session(new_session)
     if response is not None:
@@ -156,7 +157,7 @@ def before_request():
     if cookie:
         try:
             session_id = itsdangerous.Signer(settings.SECRET_KEY).unsign(cookie)
-            user_session = Session.load(session_id) or Session(_id=session_id)
+            user_session = get_store().load(session_id) or Session(_id=session_id)
         except itsdangerous.BadData:
             return
         if not util_time.throttle_period_expired(user_session.date_created, settings.OSF_SESSION_TIMEOUT):
@@ -175,8 +176,12 @@ def before_request():
 
 
 def after_request(response):
-    if session.data.get('auth_user_id'):
-        session.save()
+    user_session = get_session()
+    if user_session.data.get('auth_user_id'):
+        store = get_store()
+        # Only write sessions that changed during the request, or are due to be touched
+        if store.needs_save(user_session):
+            store.save(user_session)
     # Disallow embedding in frames
     response.headers['X-Frame-Options'] = 'SAMEORIGIN'
     return response
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""Pluggable storage for user sessions.
+
+``get_store()`` returns the store named by ``settings.SESSION_STORE``:
+
+- ``'database'`` keeps sessions in Postgres as ``osf.models.Session`` rows.
+- ``'cache'`` keeps them in the Django cache named by ``settings.SESSION_CACHE_ALIAS``, e.g.
+  redis or memcached. With Django's default local-memory cache this is an in-process
+  store, which is useful for tests and local development.
+
+Stores remember the data each session was loaded or saved with. ``needs_save`` is False for
+a session whose data is unchanged, unless it was last saved more than
+``settings.SESSION_TOUCH_INTERVAL`` seconds ago. Sessions in use are touched this way so
+they don't expire.
+"""
+import abc
+import copy
+import datetime as dt
+
+from django.apps import apps
+from django.core.cache import caches
+from django.utils import timezone
+
+from website import settings
+
+
+class BaseSessionStore(object):
+
+    __metaclass__ = abc.ABCMeta
+
+    @property
+    def model(self):
+        return apps.get_model('osf.Session')
+
+    @abc.abstractmethod
+    def load(self, session_id):
+        """Return the session with ``session_id``, or None if there is none."""
+        pass
+
+    @abc.abstractmethod
+    def save(self, session):
+        """Store ``session``, creating it if it is new."""
+        pass
+
+    @abc.abstractmethod
+    def delete(self, session):
+        """Remove ``session``."""
+        pass
+
+    @abc.abstractmethod
+    def delete_for_user(self, user_id):
+        """Remove every session of the user with GUID ``user_id``."""
+        pass
+
+    @abc.abstractmethod
+    def get_latest_for_user(self, user_id):
+        """Return the most recently saved session of the user with GUID ``user_id``, or None."""
+        pass
+
+    @abc.abstractmethod
+    def clear_expired(self, before, dry_run=False):
+        """Remove sessions last saved before ``before``.
+
+        :return int: Number of sessions removed, or that would be removed with ``dry_run``
+        """
+        pass
+
+    def mark_clean(self, session):
+        session._clean_data = copy.deepcopy(session.data)
+
+    def needs_save(self, session):
+        """Whether ``session`` changed since it was loaded or saved, or is due to be touched."""
+        clean_data = getattr(session, '_clean_data', None)
+        if clean_data is None or session.data != clean_data or session.date_modified is None:
+            return True
+        return timezone.now() - session.date_modified >= dt.timedelta(seconds=settings.SESSION_TOUCH_INTERVAL)
+
+
+class DatabaseSessionStore(BaseSessionStore):
+
+    def load(self, session_id):
+        session = self.model.load(session_id)
+        if session is not None:
+            self.mark_clean(session)
+        return session
+
+    def save(self, session):
+        session.save()
+        self.mark_clean(session)
+
+    def delete(self, session):
+        self.model.objects.filter(_id=session._id).delete()
+
+    def delete_for_user(self, user_id):
+        self.model.objects.filter(data__auth_user_id=user_id).delete()
+
+    def get_latest_for_user(self, user_id):
+        session = self.model.objects.filter(data__auth_user_id=user_id).order_by('-date_modified').first()
+        if session is not None:
+            self.mark_clean(session)
+        return session
+
+    def clear_expired(self, before, dry_run=False):
+        # Deleted in batches so a large backlog doesn't hold locks on the table for long
+        expired = self.model.objects.filter(date_modified__lt=before)
+        if dry_run:
+            return expired.count()
+        deleted = 0
+        while True:
+            pks = list(expired.values_list('pk', flat=True)[:settings.SESSION_SWEEP_BATCH_SIZE])
+            if not pks:
+                return deleted
+            self.model.objects.filter(pk__in=pks).delete()
+            deleted += len(pks)
+
+
+class CacheSessionStore(BaseSessionStore):
+    """Keeps each session under its own key, expiring ``settings.OSF_SESSION_TIMEOUT`` seconds
+    after it was last saved. Removing a user's sessions bumps a per-user generation number
+    instead of finding the sessions; sessions saved under an older generation no longer load.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.SESSION_CACHE_ALIAS]
+
+    def _session_key(self, session_id):
+        return 'osf-session:{}'.format(session_id)
+
+    def _generation_key(self, user_id):
+        return 'osf-session-generation:{}'.format(user_id)
+
+    def _latest_key(self, user_id):
+        return 'osf-session-latest:{}'.format(user_id)
+
+    def load(self, session_id):
+        record = self.cache.get(self._session_key(session_id))
+        if record is None:
+            return None
+        user_id = record['data'].get('auth_user_id')
+        if user_id and record['generation'] != self.cache.get(self._generation_key(user_id), 0):
+            self.cache.delete(self._session_key(session_id))
+            return None
+        session = self.model(
+            _id=session_id,
+            data=record['data'],
+            date_created=record['date_created'],
+            date_modified=record['date_modified'],
+        )
+        self.mark_clean(session)
+        return session
+
+    def save(self, session):
+        now = timezone.now()
+        session.date_created = session.date_created or now
+        session.date_modified = now
+        user_id = session.data.get('auth_user_id')
+        record = {
+            'data': session.data,
+            'date_created': session.date_created,
+            'date_modified': session.date_modified,
+            'generation': self.cache.get(self._generation_key(user_id), 0) if user_id else None,
+        }
+        self.cache.set(self._session_key(session._id), record, settings.OSF_SESSION_TIMEOUT)
+        if user_id:
+            self.cache.set(self._latest_key(user_id), session._id, settings.OSF_SESSION_TIMEOUT)
+        self.mark_clean(session)
+
+    def delete(self, session):
+        self.cache.delete(self._session_key(session._id))
+
+    def delete_for_user(self, user_id):
+        key = self._generation_key(user_id)
+        self.cache.set(key, self.cache.get(key, 0) + 1, settings.OSF_SESSION_TIMEOUT)
+        self.cache.delete(self._latest_key(user_id))
+
+    def get_latest_for_user(self, user_id):
+        session_id = self.cache.get(self._latest_key(user_id))
+        return self.load(session_id) if session_id else None
+
+    def clear_expired(self, before, dry_run=False):
+        # The cache expires sessions by itself
+        return 0
+
+
+STORES = {
+    'database': DatabaseSessionStore,
+    'cache': CacheSessionStore,
+}
+
+
+def get_store():
+    return STORES[settings.SESSION_STORE]()
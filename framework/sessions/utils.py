@@ -1,8 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from modularodm import Q
-
-from framework.sessions.model import Session
+from framework.sessions.store import get_store
 
 
 def remove_sessions_for_user(user):
@@ -13,7 +11,7 @@ def remove_sessions_for_user(user):
     :return:
     """
 
-    Session.remove(Q('data.auth_user_id', 'eq', user._id))
+    get_store().delete_for_user(user._id)
 
 
 def remove_session(session):
@@ -23,4 +21,4 @@ def remove_session(session):
     :param session: Session
     :return:
     """
-    Session.remove_one(session)
+    get_store().delete(session)
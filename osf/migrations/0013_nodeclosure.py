@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9 on 2017-04-18 14:02
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0012_auto_20170411_1548'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeClosure',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closure_descendants', to='osf.AbstractNode')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closure_ancestors', to='osf.AbstractNode')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='nodeclosure',
+            unique_together=set([('ancestor', 'descendant')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='nodeclosure',
+            index_together=set([('descendant', 'depth')]),
+        ),
+        migrations.RunSQL(
+            [
+                """
+                INSERT INTO osf_nodeclosure (ancestor_id, descendant_id, depth)
+                WITH RECURSIVE closure AS (
+                    SELECT parent_id AS ancestor_id, child_id AS descendant_id, 1 AS depth
+                    FROM osf_noderelation
+                    WHERE is_node_link IS FALSE
+                UNION ALL
+                    SELECT C.ancestor_id, R.child_id, C.depth + 1
+                    FROM closure AS C
+                        JOIN osf_noderelation AS R ON R.parent_id = C.descendant_id
+                    WHERE R.is_node_link IS FALSE
+                ) SELECT ancestor_id, descendant_id, MIN(depth)
+                FROM closure
+                GROUP BY ancestor_id, descendant_id;
+                """
+            ], [
+                """
+                DELETE FROM osf_nodeclosure;
+                """
+            ]
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+import osf.utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0013_nodeclosure'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='session',
+            name='date_modified',
+            field=osf.utils.fields.NonNaiveDateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0014_session_date_modified_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageCounterDate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('unique', models.PositiveIntegerField(default=0)),
+                ('counter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dates', to='osf.PageCounter')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='pagecounterdate',
+            unique_together=set([('counter', 'date')]),
+        ),
+        migrations.RunSQL(
+            [
+                """
+                INSERT INTO osf_pagecounterdate (counter_id, date, total, "unique")
+                SELECT C.id, to_date(D.key, 'YYYY/MM/DD'),
+                       COALESCE((D.value->>'total')::integer, 0),
+                       COALESCE((D.value->>'unique')::integer, 0)
+                FROM osf_pagecounter AS C, jsonb_each(C.date) AS D;
+                """
+            ], [
+                'DELETE FROM osf_pagecounterdate;'
+            ]
+        ),
+    ]
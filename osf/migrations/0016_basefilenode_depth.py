@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0015_pagecounterdate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='basefilenode',
+            name='depth',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        # Stored paths are backfilled by scripts/osfstorage/backfill_materialized_paths.py
+        migrations.RunSQL(
+            [
+                """
+                CREATE INDEX osf_basefilenode_osfstorage_materialized_path_index
+                ON public.osf_basefilenode
+                (node_id, _materialized_path text_pattern_ops)
+                WHERE type IN ('osf.osfstoragefile', 'osf.osfstoragefolder');
+                """,
+            ],
+            [
+                """
+                DROP INDEX public.osf_basefilenode_osfstorage_materialized_path_index RESTRICT;
+                """
+            ]
+        ),
+    ]
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0017_nodelog_node_date_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nodelog',
+            name='root',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='osf.AbstractNode'),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE osf_nodelog SET root_id = osf_abstractnode.root_id
+            FROM osf_abstractnode WHERE osf_abstractnode.id = osf_nodelog.node_id;
+            """,
+            migrations.RunSQL.noop
+        ),
+        migrations.AlterIndexTogether(
+            name='nodelog',
+            index_together=set([('node', 'date', 'id'), ('root', 'date', 'id')]),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+import osf.utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0018_nodelog_root'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShareOutboxItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('node', 'Node or registration'), ('preprint', 'Preprint')], max_length=16)),
+                ('object_id', models.PositiveIntegerField()),
+                ('date_modified', osf.utils.fields.NonNaiveDateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt', osf.utils.fields.NonNaiveDateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='shareoutboxitem',
+            unique_together=set([('kind', 'object_id')]),
+        ),
+    ]
@@ -28,7 +28,8 @@ from osf.models.files import (  # noqa
     File, Folder, FileNode,  # noqa
     FileVersion, StoredFileNode, TrashedFile, TrashedFileNode, TrashedFolder,  # noqa
 )  # noqa
-from osf.models.node_relation import NodeRelation  # noqa
-from osf.models.analytics import UserActivityCounter, PageCounter  # noqa
+from osf.models.node_relation import NodeRelation, NodeClosure  # noqa
+from osf.models.analytics import UserActivityCounter, PageCounter, PageCounterDate  # noqa
 from osf.models.admin_profile import AdminProfile  # noqa
 from osf.models.admin_log_entry import AdminLogEntry  # noqa
+from osf.models.share import ShareOutboxItem  # noqa
@@ -1,12 +1,17 @@
 import logging
+import os
+import threading
+import time
 
 from dateutil import parser
-from django.db import models, transaction
+from django.db import IntegrityError, close_old_connections, models, transaction
+from django.db.models import F
 from django.utils import timezone
 
 from framework.sessions import session
 from osf.models.base import BaseModel
 from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
+from website import settings
 
 logger = logging.getLogger(__name__)
 
@@ -53,11 +58,97 @@ class UserActivityCounter(BaseModel):
         return True
 
 
+class PageCounterBuffer(object):
+    """Page view and download counts waiting to be written to ``PageCounter`` and
+    ``PageCounterDate``. Counts are aggregated per page and written with one ``UPDATE``
+    per row, instead of locking the counter on every hit.
+
+    Each process writes its counts from a background thread every
+    ``PAGE_COUNTER_FLUSH_INTERVAL`` seconds, started on the first count the process buffers,
+    and after a request once ``PAGE_COUNTER_MAX_PENDING`` pages have pending counts. Counts
+    not yet written are lost if the process is killed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flusher_pid = None
+
+    @staticmethod
+    def _empty():
+        return {'total': 0, 'unique': 0, 'dates': {}}
+
+    def _add(self, page, counts):
+        current = self._pending.setdefault(page, self._empty())
+        current['total'] += counts['total']
+        current['unique'] += counts['unique']
+        for date, date_counts in counts['dates'].items():
+            current_date = current['dates'].setdefault(date, {'total': 0, 'unique': 0})
+            current_date['total'] += date_counts['total']
+            current_date['unique'] += date_counts['unique']
+
+    def add(self, page, date, total=0, unique=0, date_total=0, date_unique=0):
+        with self._lock:
+            self._start_flusher()
+            self._add(page, {
+                'total': total,
+                'unique': unique,
+                'dates': {date: {'total': date_total, 'unique': date_unique}},
+            })
+
+    def get(self, page):
+        """Return the counts pending for ``page``, or None."""
+        with self._lock:
+            counts = self._pending.get(page)
+            return {'total': counts['total'], 'unique': counts['unique']} if counts else None
+
+    def _start_flusher(self):
+        # Threads don't survive a fork, so each worker process starts its own
+        if not settings.PAGE_COUNTER_FLUSH_THREAD or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        thread = threading.Thread(target=self._run_flusher, name='page-counter-flusher')
+        thread.daemon = True
+        thread.start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(settings.PAGE_COUNTER_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Could not write buffered page counts')
+            finally:
+                close_old_connections()
+
+    def is_due(self):
+        return len(self._pending) >= settings.PAGE_COUNTER_MAX_PENDING
+
+    def flush(self):
+        """Write all pending counts. If writing fails they are kept for the next flush."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            PageCounter.increment_many(pending)
+        except Exception:
+            with self._lock:
+                for page, counts in pending.items():
+                    self._add(page, counts)
+            raise
+
+    def clear(self):
+        with self._lock:
+            self._pending = {}
+
+
 class PageCounter(BaseModel):
     primary_identifier_name = '_id'
 
     _id = models.CharField(max_length=300, null=False, blank=False, db_index=True,
                            unique=True)  # 272 in prod
+    # No longer written; daily counts are in PageCounterDate
     date = DateTimeAwareJSONField(default=dict)
 
     total = models.PositiveIntegerField(default=0)
@@ -73,72 +164,114 @@ class PageCounter(BaseModel):
 
     @classmethod
     def update_counter(cls, page, node_info):
+        """Count a view or download of ``page`` by the current session. The counts are
+        buffered in ``page_counter_buffer`` until it is flushed.
+        """
         cleaned_page = cls.clean_page(page)
-        date = timezone.now()
+        date = timezone.now().date()
         date_string = date.strftime('%Y/%m/%d')
         visited_by_date = session.data.get('visited_by_date', {'date': date_string, 'pages': []})
 
-        with transaction.atomic():
-            model_instance, created = cls.objects.select_for_update().get_or_create(_id=cleaned_page)
-
-            # if they visited something today
-            if date_string == visited_by_date['date']:
-                # if they haven't visited this page today
-                if cleaned_page not in visited_by_date['pages']:
-                    # if the model_instance has today in it
-                    if date_string in model_instance.date.keys():
-                        # increment the number of unique visitors for today
-                        model_instance.date[date_string]['unique'] += 1
-                    else:
-                        # set the number of unique visitors for today to 1
-                        model_instance.date[date_string] = dict(unique=1)
-            # if they haven't visited something today
-            else:
-                # set their visited by date to blank
-                visited_by_date['date'] = date_string
-                visited_by_date['pages'] = []
-                # if the model_instance has today in it
-                if date_string in model_instance.date.keys():
-                    # increment the number of unique visitors for today
-                    model_instance.date[date_string]['unique'] += 1
-                else:
-                    # set the number of unique visitors to 1
-                    model_instance.date[date_string] = dict(unique=1)
+        # if they haven't visited something today
+        if date_string != visited_by_date['date']:
+            # set their visited by date to blank
+            visited_by_date['date'] = date_string
+            visited_by_date['pages'] = []
+        # a unique visitor for today if they haven't visited this page today
+        date_unique = int(cleaned_page not in visited_by_date['pages'])
 
-            # update their sessions
-            visited_by_date['pages'].append(cleaned_page)
-            session.data['visited_by_date'] = visited_by_date
+        # update their sessions
+        visited_by_date['pages'].append(cleaned_page)
+        session.data['visited_by_date'] = visited_by_date
 
-            if date_string in model_instance.date.keys():
-                if 'total' not in model_instance.date[date_string].keys():
-                    model_instance.date[date_string].update(total=0)
-                model_instance.date[date_string]['total'] += 1
-            else:
-                model_instance.date[date_string] = dict(total=1)
+        # if a download counter is being updated, only count the download
+        # if the user who is downloading isn't a contributor to the project
+        page_type = cleaned_page.split(':')[0]
+        if page_type == 'download' and node_info:
+            if node_info['contributors'].filter(guids___id=session.data.get('auth_user_id')).exists():
+                page_counter_buffer.add(cleaned_page, date, date_total=1, date_unique=date_unique)
+                return
 
-            # if a download counter is being updated, only perform the update
-            # if the user who is downloading isn't a contributor to the project
-            page_type = cleaned_page.split(':')[0]
-            if page_type == 'download' and node_info:
-                if node_info['contributors'].filter(guids___id=session.data.get('auth_user_id')).exists():
-                    model_instance.save()
-                    return
+        visited = session.data.get('visited', [])
+        unique = int(page not in visited)
+        if unique:
+            visited.append(page)
+            session.data['visited'] = visited
 
-            visited = session.data.get('visited', [])
-            if page not in visited:
-                model_instance.unique += 1
-                visited.append(page)
-                session.data['visited'] = visited
+        # The session is saved by framework.sessions.after_request
+        page_counter_buffer.add(cleaned_page, date, total=1, unique=unique, date_total=1, date_unique=date_unique)
 
-            session.save()
-            model_instance.total += 1
+    @classmethod
+    def increment_many(cls, increments):
+        """Add buffered counts to the counters, creating the counters that don't exist yet.
+
+        :param dict increments: page -> {'total': int, 'unique': int, 'dates': {date: {'total': int, 'unique': int}}}
+        """
+        # Sorted, so concurrent flushes lock rows in the same order
+        pages = sorted(increments)
+        with transaction.atomic():
+            counter_ids = dict(cls.objects.filter(_id__in=pages).values_list('_id', 'id'))
+            for page in pages:
+                if page not in counter_ids:
+                    counter_ids[page] = cls.objects.get_or_create(_id=page)[0].id
 
-            model_instance.save()
+            for page in pages:
+                counts = increments[page]
+                if counts['total'] or counts['unique']:
+                    cls.objects.filter(id=counter_ids[page]).update(
+                        total=F('total') + counts['total'],
+                        unique=F('unique') + counts['unique'],
+                    )
+                for date, date_counts in sorted(counts['dates'].items()):
+                    PageCounterDate.increment(counter_ids[page], date, date_counts['total'], date_counts['unique'])
 
     @classmethod
     def get_basic_counters(cls, page):
+        """Return ``(unique, total)`` for ``page``, including counts this process has not
+        written yet, or ``(None, None)`` if it was never counted.
+        """
+        cleaned_page = cls.clean_page(page)
+        pending = page_counter_buffer.get(cleaned_page)
         try:
-            counter = cls.objects.get(_id=cls.clean_page(page))
-            return (counter.unique, counter.total)
+            counter = cls.objects.get(_id=cleaned_page)
+            unique, total = counter.unique, counter.total
         except cls.DoesNotExist:
-            return (None, None)
+            if pending is None:
+                return (None, None)
+            unique, total = 0, 0
+        if pending is not None:
+            unique += pending['unique']
+            total += pending['total']
+        return (unique, total)
+
+
+class PageCounterDate(BaseModel):
+    """Views or downloads of a page on one day."""
+    counter = models.ForeignKey(PageCounter, related_name='dates')
+    date = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    unique = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('counter', 'date')
+
+    @classmethod
+    def increment(cls, counter_id, date, total, unique):
+        updated = cls.objects.filter(counter_id=counter_id, date=date).update(
+            total=F('total') + total,
+            unique=F('unique') + unique,
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(counter_id=counter_id, date=date, total=total, unique=unique)
+        except IntegrityError:
+            # Created by a concurrent flush
+            cls.objects.filter(counter_id=counter_id, date=date).update(
+                total=F('total') + total,
+                unique=F('unique') + unique,
+            )
+
+
+page_counter_buffer = PageCounterBuffer()
@@ -13,8 +13,9 @@ from django.db import models
 from django.db.models import ForeignKey
 from django.db.models.expressions import F
 from django.db.models.query_utils import Q
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from osf.utils import identity_map
 from osf.utils.caching import cached_property
 from osf.exceptions import ValidationError
 from osf.modm_compat import to_django_query
@@ -108,6 +109,7 @@ class BaseModel(models.Model):
                      field.is_relation and field.many_to_many and not hasattr(field, 'field')]
 
     @classmethod
+    @identity_map.identity_mapped
     def load(cls, data):
         try:
             if isinstance(data, basestring):
@@ -211,6 +213,7 @@ class Guid(BaseModel):
 
     # Override load in order to load by GUID
     @classmethod
+    @identity_map.identity_mapped
     def load(cls, data):
         try:
             return cls.objects.get(_id=data)
@@ -262,6 +265,7 @@ class ObjectIDMixin(BaseIDMixin):
         return '_id: {}'.format(self._id)
 
     @classmethod
+    @identity_map.identity_mapped
     def load(cls, q):
         try:
             return cls.objects.get(_id=q)
@@ -547,6 +551,7 @@ class GuidMixin(BaseIDMixin):
     _primary_key = _id
 
     @classmethod
+    @identity_map.identity_mapped
     def load(cls, q):
         try:
             queryset = cls.objects.filter(guids___id=q)
@@ -587,3 +592,10 @@ def ensure_guid(sender, instance, created, **kwargs):
             del instance._prefetched_objects_cache['guids']
         Guid.objects.create(object_id=instance.pk, content_type_id=instance.content_type_pk,
                             _id=instance.guid_string)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def evict_from_identity_map(sender, instance, **kwargs):
+    if isinstance(instance, models.Model):
+        identity_map.evict(instance)
@@ -101,6 +101,8 @@ class BaseFileNode(TypedModel, CommentableMixin, OptionalGuidMixin, Taggable, Ob
     name = models.TextField(blank=True, null=True)
     _path = models.TextField(blank=True, null=True)  # 1950 on prod
     _materialized_path = models.TextField(blank=True, null=True)  # 482 on staging
+    # Number of folders above this one, only stored for OsfStorage
+    depth = models.PositiveIntegerField(blank=True, null=True)
 
     is_deleted = False
     deleted_on = NonNaiveDateTimeField(blank=True, null=True)
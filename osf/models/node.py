@@ -1,4 +1,3 @@
-import functools
 import itertools
 import logging
 import re
@@ -16,7 +15,6 @@ from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.functional import cached_property
 from keen import scoped_keys
-from psycopg2._psycopg import AsIs
 from typedmodels.models import TypedModel
 
 from framework import status
@@ -33,7 +31,7 @@ from osf.models.identifiers import Identifier, IdentifierMixin
 from osf.models.licenses import NodeLicenseRecord
 from osf.models.mixins import (AddonModelMixin, CommentableMixin, Loggable,
                                NodeLinkMixin, Taggable)
-from osf.models.node_relation import NodeRelation
+from osf.models.node_relation import NodeClosure, NodeRelation
 from osf.models.nodelog import NodeLog
 from osf.models.sanctions import RegistrationApproval
 from osf.models.private_link import PrivateLink
@@ -74,48 +72,43 @@ class AbstractNodeQuerySet(MODMCompatibilityQuerySet, IncludeQuerySet):
         return self.filter(id__in=self.exclude(type='osf.collection').values_list('root_id', flat=True))
 
     def get_children(self, root, active=False):
-        # If `root` is a root node, we can use the 'descendants' related name
-        # rather than doing a recursive query
-        if root.id == root.root_id:
-            query = root.descendants.exclude(id=root.id)
-            if active:
-                query = query.filter(is_deleted=False)
-            return query
-        else:
-            sql = """
-                WITH RECURSIVE descendants AS (
-                SELECT
-                    parent_id,
-                    child_id,
-                    1 AS LEVEL
-                FROM %s
-                %s
-                WHERE is_node_link IS FALSE %s
-                UNION ALL
-                SELECT
-                    s.parent_id,
-                    d.child_id,
-                    d.level + 1
-                FROM descendants AS d
-                    JOIN %s AS s
-                    ON d.parent_id = s.child_id
-                WHERE s.is_node_link IS FALSE
-                ) SELECT array_agg(DISTINCT child_id)
-                FROM descendants
-                WHERE parent_id = %s;
-            """
-            with connection.cursor() as cursor:
-                node_relation_table = AsIs(NodeRelation._meta.db_table)
-                cursor.execute(sql, [
-                    node_relation_table,
-                    AsIs('LEFT JOIN osf_abstractnode ON {}.child_id = osf_abstractnode.id'.format(node_relation_table) if active else ''),
-                    AsIs('AND osf_abstractnode.is_deleted IS FALSE' if active else ''),
-                    node_relation_table,
-                    root.pk])
-                row = cursor.fetchone()[0]
-                if not row:
-                    return AbstractNode.objects.none()
-                return AbstractNode.objects.filter(id__in=row)
+        query = AbstractNode.objects.filter(closure_ancestors__ancestor=root)
+        if active:
+            query = query.filter(is_deleted=False)
+        return query
+
+    def permissions_for(self, user, node_ids=None):
+        """Resolve the permissions ``user`` holds on many nodes at once.
+
+        Returns a dict mapping each node id to a set of permissions (READ, WRITE, ADMIN),
+        using the same rules as ``AbstractNode.has_permission``: read is also granted
+        by admin permissions on any parent. Takes two queries regardless of the number
+        of nodes. If ``node_ids`` is not given, the nodes in this queryset are used.
+
+        :param User user: User to resolve permissions for
+        :param list node_ids: Primary keys of the nodes to check
+        """
+        if node_ids is None:
+            node_ids = self.values_list('id', flat=True)
+        permissions = {node_id: set() for node_id in node_ids}
+        if not user or not permissions:
+            return permissions
+
+        contributors = Contributor.objects.filter(
+            user=user, node_id__in=permissions.keys()
+        ).values_list('node_id', 'read', 'write', 'admin')
+        for node_id, read, write, admin in contributors:
+            granted = zip((READ, WRITE, ADMIN), (read, write, admin))
+            permissions[node_id].update(perm for perm, has_perm in granted if has_perm)
+
+        admin_parented = NodeClosure.objects.filter(
+            descendant_id__in=permissions.keys(),
+            ancestor__contributor__user=user,
+            ancestor__contributor__admin=True
+        ).values_list('descendant_id', flat=True)
+        for node_id in admin_parented:
+            permissions[node_id].add(READ)
+        return permissions
 
     def can_view(self, user=None, private_link=None):
         qs = self.filter(is_public=True)
@@ -137,19 +130,18 @@ class AbstractNodeQuerySet(MODMCompatibilityQuerySet, IncludeQuerySet):
             qs |= self.filter(contributor__user_id=user, contributor__read=True)
             qs |= self.extra(where=['''
                 "osf_abstractnode".id in (
-                    WITH RECURSIVE implicit_read AS (
-                        SELECT "osf_contributor"."node_id"
-                        FROM "osf_contributor"
-                        WHERE "osf_contributor"."user_id" = %s
-                        AND "osf_contributor"."admin" is TRUE
-                    UNION ALL
-                        SELECT "osf_noderelation"."child_id"
-                        FROM "implicit_read"
-                        LEFT JOIN "osf_noderelation" ON "osf_noderelation"."parent_id" = "implicit_read"."node_id"
-                        WHERE "osf_noderelation"."is_node_link" IS FALSE
-                    ) SELECT * FROM implicit_read
+                    SELECT "osf_contributor"."node_id"
+                    FROM "osf_contributor"
+                    WHERE "osf_contributor"."user_id" = %s
+                    AND "osf_contributor"."admin" is TRUE
+                UNION ALL
+                    SELECT "osf_nodeclosure"."descendant_id"
+                    FROM "osf_contributor"
+                    JOIN "osf_nodeclosure" ON "osf_nodeclosure"."ancestor_id" = "osf_contributor"."node_id"
+                    WHERE "osf_contributor"."user_id" = %s
+                    AND "osf_contributor"."admin" is TRUE
                 )
-            '''], params=(user, ))
+            '''], params=(user, user, ))
 
         return qs.distinct()
 
@@ -640,20 +632,22 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         return csl
 
     @classmethod
-    def bulk_update_search(cls, nodes, index=None):
+    def bulk_update_search(cls, nodes, index=None, saved_fields=None):
         from website import search
         try:
-            serialize = functools.partial(search.search.update_node, index=index, bulk=True, async=False)
-            search.search.bulk_update_nodes(serialize, nodes, index=index)
+            search.search.update_nodes(nodes, index=index, saved_fields=saved_fields)
         except search.exceptions.SearchUnavailableError as e:
             logger.exception(e)
             log_exception()
 
-    def update_search(self):
+    def update_search(self, saved_fields=None):
+        """Update this node's search document. ``saved_fields``, if known, limits what else
+        has to be reindexed, e.g. the node's files are left alone unless their documents change.
+        """
         from website import search
 
         try:
-            search.search.update_node(self, bulk=False, async=True)
+            search.search.update_node(self, bulk=False, async=True, saved_fields=saved_fields)
         except search.exceptions.SearchUnavailableError as e:
             logger.exception(e)
             log_exception()
@@ -759,11 +753,13 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         )
 
     def get_aggregate_logs_query(self, auth):
+        # Logs are read from the range of the (root, date) index for this node's tree, keeping
+        # those of this node and of the components the user can view
+        children = Node.objects.get_children(self).can_view(user=auth.user, private_link=auth.private_link)
         return (
-            (   # TODO: remove `list` call during phase 2
-                Q('node_id', 'in', list(Node.objects.get_children(self).can_view(user=auth.user, private_link=auth.private_link).values_list('id', flat=True))) |
-                Q('node_id', 'eq', self.id)
-            ) & Q('should_hide', 'eq', False)
+            Q('root_id', 'eq', self.root_id) &
+            (Q('node_id', 'in', children.values('id')) | Q('node_id', 'eq', self.id)) &
+            Q('should_hide', 'eq', False)
         )
 
     def get_aggregate_logs_queryset(self, auth):
@@ -999,7 +995,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
 
     # Override Taggable
     def on_tag_added(self, tag):
-        self.update_search()
+        self.update_search(saved_fields=['tags'])
 
     def remove_tag(self, tag, auth, save=True):
         if not tag:
@@ -1021,7 +1017,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             )
             if save:
                 self.save()
-            self.update_search()
+            self.update_search(saved_fields=['tags'])
             return True
 
     def is_contributor(self, user):
@@ -1516,36 +1512,10 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         return self.private_links.filter(is_deleted=True).values_list('key', flat=True)
 
     def get_root(self):
-        sql = """
-            WITH RECURSIVE ascendants AS (
-              SELECT
-                parent_id,
-                child_id,
-                1 AS LEVEL
-              FROM %s
-              WHERE is_node_link IS FALSE
-              UNION ALL
-              SELECT
-                S.parent_id,
-                D.child_id,
-                D.level + 1
-              FROM ascendants AS D
-                JOIN %s AS S
-                  ON D.parent_id = S.child_id
-              WHERE S.is_node_link IS FALSE
-            ) SELECT parent_id
-              FROM ascendants
-              WHERE child_id = %s
-              ORDER BY level DESC
-              LIMIT 1;
-        """
-        with connection.cursor() as cursor:
-            node_relation_table = AsIs(NodeRelation._meta.db_table)
-            cursor.execute(sql, [node_relation_table, node_relation_table, self.pk])
-            res = cursor.fetchone()
-            if res:
-                return AbstractNode.objects.get(pk=res[0])
-            return self
+        closure = self.closure_ancestors.select_related('ancestor').order_by('-depth').first()
+        if closure:
+            return closure.ancestor
+        return self
 
     def find_readable_antecedent(self, auth):
         """ Returns first antecendant node readable by <user>.
@@ -1615,9 +1585,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         registered.alternative_citations.add(*self.alternative_citations.values_list('pk', flat=True))
 
         # Clone each log from the original node for this registration.
-        logs = original.logs.all()
-        for log in logs:
-            log.clone_node_log(registered._id)
+        NodeLog.clone_node_logs(original, registered)
 
         registered.is_public = False
         for node in registered.get_descendants_recursive():
@@ -1725,19 +1693,25 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
     def get_primary(self, node):
         return NodeRelation.objects.filter(parent=self, child=node, is_node_link=False).exists()
 
-    # TODO optimize me
     def get_descendants_recursive(self, primary_only=False):
-        query = self.nodes_primary if primary_only else self._nodes
-        for node in query.all():
-            yield node
-            if not primary_only:
-                primary = self.get_primary(node)
-                if primary:
-                    for descendant in node.get_descendants_recursive(primary_only=primary_only):
-                        yield descendant
-            else:
-                for descendant in node.get_descendants_recursive(primary_only=primary_only):
-                    yield descendant
+        """Yield every component below this node, shallowest first. Unless
+        `primary_only` is set, node links of this node and its components are
+        yielded too, but not followed.
+        """
+        closures = self.closure_descendants.select_related('descendant').order_by('depth', 'id')
+        if primary_only:
+            for closure in closures:
+                yield closure.descendant
+            return
+        descendants = [closure.descendant for closure in closures]
+        for descendant in descendants:
+            yield descendant
+        linked = NodeRelation.objects.filter(
+            parent_id__in=[self.id] + [descendant.id for descendant in descendants],
+            is_node_link=True
+        ).select_related('child')
+        for node_relation in linked:
+            yield node_relation.child
 
     @property
     def nodes_primary(self):
@@ -1753,12 +1727,10 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         """Recursively checks whether the current node or any of its nodes
         contains a pointer.
         """
-        if self.linked_nodes.exists():
-            return True
-        for node in self.nodes_primary:
-            if node.has_pointers_recursive:
-                return True
-        return False
+        return NodeRelation.objects.filter(
+            models.Q(parent=self) | models.Q(parent__closure_ancestors__ancestor=self),
+            is_node_link=True
+        ).exists()
 
     def add_citation(self, auth, save=False, log=True, citation=None, **kwargs):
         if not citation:
@@ -1934,8 +1906,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         )
 
         # Clone each log from the original node for this fork.
-        for log in original.logs.all():
-            log.clone_node_log(forked._id)
+        NodeLog.clone_node_logs(original, forked)
 
         forked.refresh_from_db()
 
@@ -2263,13 +2234,12 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             children = list(self.descendants.filter(node_license=None, is_public=True, is_deleted=False))
             while len(children):
                 batch = children[:99]
-                self.bulk_update_search(batch)
+                self.bulk_update_search(batch, saved_fields=['node_license'])
                 children = children[99:]
 
         return ret
 
     def on_update(self, first_save, saved_fields):
-        User = apps.get_model('osf.OSFUser')
         request, user_id = get_request_and_user_id()
         request_headers = {}
         if not isinstance(request, DummyRequest):
@@ -2288,10 +2258,21 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             for preprint in PreprintService.objects.filter(node_id=self.id, is_published=True):
                 enqueue_task(on_preprint_updated.s(preprint._id))
 
-        user = User.load(user_id)
-        if user and self.check_spam(user, saved_fields, request_headers):
-            # Specifically call the super class save method to avoid recursion into model save method.
-            super(AbstractNode, self).save()
+        if user_id and self._should_check_spam(saved_fields, request_headers):
+            node_tasks.check_node_spam(self._id, user_id, list(saved_fields), request_headers)
+
+    def _should_check_spam(self, saved_fields, request_headers):
+        """Whether a save of ``saved_fields`` could make check_spam call Akismet, from what is
+        known without loading the user, so that most saves don't queue a check at all.
+        """
+        if not settings.SPAM_CHECK_ENABLED or not request_headers.get('Remote-Addr'):
+            return False
+        if settings.SPAM_CHECK_PUBLIC_ONLY and not self.is_public:
+            return False
+        return bool(
+            self.SPAM_CHECK_FIELDS.intersection(saved_fields) or
+            (self.is_public and 'is_public' in saved_fields)
+        )
 
     def _get_spam_content(self, saved_fields):
         NodeWikiPage = apps.get_model('addons_wiki.NodeWikiPage')
@@ -2320,7 +2301,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             return False
         if settings.SPAM_CHECK_PUBLIC_ONLY and not self.is_public:
             return False
-        if 'ham_confirmed' in user.system_tags:
+        if 'ham_confirmed' in user.system_tags or self._is_trusted_spam_user(user):
             return False
 
         content = self._get_spam_content(saved_fields)
@@ -2339,6 +2320,14 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             self._check_spam_user(user)
         return is_spam
 
+    def _is_trusted_spam_user(self, user):
+        return (
+            settings.SPAM_CHECK_TRUSTED_USER_AGE is not None and
+            user.date_confirmed is not None and
+            timezone.now() - user.date_confirmed > settings.SPAM_CHECK_TRUSTED_USER_AGE and
+            'spam_flagged' not in user.system_tags
+        )
+
     def _check_spam_user(self, user):
         if (
             settings.SPAM_ACCOUNT_SUSPENSION_ENABLED
@@ -2985,3 +2974,4 @@ def set_parent_and_root(sender, instance, created, *args, **kwargs):
     if not instance.root:
         instance.root = instance.get_root()
         instance.save()
+        NodeLog.update_root(instance)
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import connection, models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from .base import BaseModel, ObjectIDMixin
 
@@ -25,3 +27,76 @@ class NodeRelation(ObjectIDMixin, BaseModel):
         index_together = (
             ('is_node_link', 'child', 'parent'),
         )
+
+
+class NodeClosure(BaseModel):
+    """Transitive closure of the component (non-node-link) hierarchy.
+
+    Contains one row for every (ancestor, descendant) pair, where ``depth`` is
+    the number of edges between the two, so that ancestors, descendants and
+    roots can be looked up with a single indexed query instead of a
+    ``WITH RECURSIVE`` walk over ``osf_noderelation``. Nodes are not their own
+    ancestors; rows are maintained by the ``NodeRelation`` signal handlers below.
+    """
+    ancestor = models.ForeignKey('AbstractNode', related_name='closure_descendants')
+    descendant = models.ForeignKey('AbstractNode', related_name='closure_ancestors')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('ancestor', 'descendant')
+        index_together = (
+            ('descendant', 'depth'),
+        )
+
+    def __unicode__(self):
+        return 'ancestor={}, descendant={}, depth={}'.format(self.ancestor_id, self.descendant_id, self.depth)
+
+    LINK_QUERY = '''
+        INSERT INTO "{closure}" (ancestor_id, descendant_id, depth)
+        SELECT A.ancestor_id, D.descendant_id, A.depth + D.depth + 1
+        FROM (
+            SELECT ancestor_id, depth FROM "{closure}" WHERE descendant_id = %(parent)s
+            UNION ALL SELECT %(parent)s, 0
+        ) AS A CROSS JOIN (
+            SELECT descendant_id, depth FROM "{closure}" WHERE ancestor_id = %(child)s
+            UNION ALL SELECT %(child)s, 0
+        ) AS D;
+    '''
+
+    UNLINK_QUERY = '''
+        DELETE FROM "{closure}"
+        WHERE ancestor_id IN (
+            SELECT ancestor_id FROM "{closure}" WHERE descendant_id = %(parent)s
+            UNION ALL SELECT %(parent)s
+        ) AND descendant_id IN (
+            SELECT descendant_id FROM "{closure}" WHERE ancestor_id = %(child)s
+            UNION ALL SELECT %(child)s
+        );
+    '''
+
+    @classmethod
+    def _execute(cls, query, parent_id, child_id):
+        with connection.cursor() as cursor:
+            cursor.execute(query.format(closure=cls._meta.db_table), {'parent': parent_id, 'child': child_id})
+
+    @classmethod
+    def link(cls, parent_id, child_id):
+        """Attach the subtree rooted at ``child_id`` below ``parent_id``."""
+        cls._execute(cls.LINK_QUERY, parent_id, child_id)
+
+    @classmethod
+    def unlink(cls, parent_id, child_id):
+        """Detach the subtree rooted at ``child_id`` from ``parent_id`` and its ancestors."""
+        cls._execute(cls.UNLINK_QUERY, parent_id, child_id)
+
+
+@receiver(post_save, sender=NodeRelation)
+def add_node_closure(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not instance.is_node_link:
+        NodeClosure.link(instance.parent_id, instance.child_id)
+
+
+@receiver(post_delete, sender=NodeRelation)
+def remove_node_closure(sender, instance, **kwargs):
+    if not instance.is_node_link:
+        NodeClosure.unlink(instance.parent_id, instance.child_id)
@@ -142,6 +142,9 @@ class NodeLog(ObjectIDMixin, BaseModel):
     node = models.ForeignKey('AbstractNode', related_name='logs',
                              db_index=True, null=True, blank=True)
     original_node = models.ForeignKey('AbstractNode', db_index=True, null=True, blank=True)
+    # The node's root, so that the logs of a whole project can be read in date order from one index;
+    # see AbstractNode.get_aggregate_logs_query. Kept in sync by save and update_root.
+    root = models.ForeignKey('AbstractNode', related_name='+', db_index=False, null=True, blank=True)
 
     def __unicode__(self):
         return ('({self.action!r}, user={self.user!r},, node={self.node!r}, params={self.params!r}) '
@@ -150,6 +153,21 @@ class NodeLog(ObjectIDMixin, BaseModel):
     class Meta:
         ordering = ['-date']
         get_latest_by = 'date'
+        # Log lists are paged through by (date, id), see JSONAPIPagination.paginate_queryset_by_cursor
+        index_together = (
+            ('node', 'date', 'id'),
+            ('root', 'date', 'id'),
+        )
+
+    def save(self, *args, **kwargs):
+        if self.node_id and not self.root_id:
+            self.root_id = self.node.root_id
+        return super(NodeLog, self).save(*args, **kwargs)
+
+    @classmethod
+    def update_root(cls, node):
+        """Point the logs of ``node`` to its current root, after the root was (re)computed."""
+        cls.objects.filter(node_id=node.id).exclude(root_id=node.root_id).update(root_id=node.root_id)
 
     @property
     def absolute_api_v2_url(self):
@@ -181,5 +199,28 @@ class NodeLog(ObjectIDMixin, BaseModel):
         log_clone.save()
         return log_clone
 
+    CLONED_FIELDS = ('date', 'action', 'params', 'should_hide', 'user_id', 'foreign_user', 'original_node_id')
+
+    @classmethod
+    def clone_node_logs(cls, source, target, chunk_size=1000):
+        """
+        Copy all logs of ``source`` to ``target``, ``chunk_size`` rows per query, when a node is
+        forked or registered. Equivalent to calling ``clone_node_log`` for each log.
+
+        :return int: Number of logs copied
+        """
+        logs = source.logs.order_by('id').values_list('id', *cls.CLONED_FIELDS)
+        copied = last_id = 0
+        while True:
+            rows = list(logs.filter(id__gt=last_id)[:chunk_size])
+            if not rows:
+                return copied
+            cls.objects.bulk_create([
+                cls(node_id=target.id, root_id=target.root_id, **dict(zip(cls.CLONED_FIELDS, row[1:])))
+                for row in rows
+            ])
+            copied += len(rows)
+            last_id = rows[-1][0]
+
     def _natural_key(self):
         return self._id
@@ -5,7 +5,8 @@ from osf.utils.fields import NonNaiveDateTimeField
 
 class Session(ObjectIDMixin, BaseModel):
     date_created = NonNaiveDateTimeField(auto_now_add=True)
-    date_modified = NonNaiveDateTimeField(auto_now=True)
+    # Indexed for the expiry sweep, see scripts.clear_sessions
+    date_modified = NonNaiveDateTimeField(auto_now=True, db_index=True)
     data = DateTimeAwareJSONField(default=dict, blank=True)
 
     @property
@@ -0,0 +1,45 @@
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+from osf.models.base import BaseModel
+from osf.utils.fields import NonNaiveDateTimeField
+
+
+class ShareOutboxItem(BaseModel):
+    """A node, registration or preprint whose metadata has to be sent to SHARE.
+
+    Saves only mark objects here. ``website.share.tasks.flush_share_outbox`` sends the current
+    metadata of every marked object in batches, so saving an object many times between two
+    flushes sends it once.
+    """
+    NODE = 'node'
+    PREPRINT = 'preprint'
+    KIND_CHOICES = (
+        (NODE, 'Node or registration'),
+        (PREPRINT, 'Preprint'),
+    )
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    # Last time the object was marked; items marked again while being sent are kept for the next flush
+    date_modified = NonNaiveDateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = NonNaiveDateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __unicode__(self):
+        return '{} {}, attempts={}'.format(self.kind, self.object_id, self.attempts)
+
+    @classmethod
+    def enqueue(cls, kind, object_id):
+        now = timezone.now()
+        if cls.objects.filter(kind=kind, object_id=object_id).update(date_modified=now):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(kind=kind, object_id=object_id, date_modified=now, next_attempt=now)
+        except IntegrityError:
+            # Created by a concurrent save
+            cls.objects.filter(kind=kind, object_id=object_id).update(date_modified=now)
@@ -1,6 +1,8 @@
 import abc
+import hashlib
 import logging
 
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 from osf.exceptions import ValidationValueError, ValidationTypeError
@@ -10,17 +12,30 @@ from osf.utils.fields import NonNaiveDateTimeField
 from website import settings
 from website.project.model import User
 from website.util import akismet
-from website.util.akismet import AkismetClientError
 
 logger = logging.getLogger(__name__)
 
 
+_clients = {}
+
+
 def _get_client():
-    return akismet.AkismetClient(
-        apikey=settings.AKISMET_APIKEY,
-        website=settings.DOMAIN,
-        verify=True
-    )
+    # Clients are kept so that the API key is only verified once per process
+    key = (settings.AKISMET_APIKEY, settings.DOMAIN, settings.AKISMET_API_URL)
+    if key not in _clients:
+        _clients[key] = akismet.AkismetClient(
+            apikey=settings.AKISMET_APIKEY,
+            website=settings.DOMAIN,
+            verify=True,
+            api_url=settings.AKISMET_API_URL
+        )
+    return _clients[key]
+
+
+def _verdict_cache_key(content):
+    if isinstance(content, unicode):
+        content = content.encode('utf-8')
+    return 'spam-verdict:{}'.format(hashlib.sha256(content).hexdigest())
 
 
 def _validate_reports(value, *args, **kwargs):
@@ -185,17 +200,23 @@ class SpamMixin(models.Model):
         pass
 
     def do_check_spam(self, author, author_email, content, request_headers):
+        """Ask Akismet whether ``content`` is spam, unless the same content was checked within
+        ``settings.SPAM_CHECK_CACHE_TIMEOUT`` seconds.
+
+        :raises AkismetClientError: if Akismet can't be reached
+        """
         if self.spam_status == SpamStatus.HAM:
             return False
         if self.is_spammy:
             return True
 
-        client = _get_client()
         remote_addr = request_headers['Remote-Addr']
         user_agent = request_headers.get('User-Agent')
         referer = request_headers.get('Referer')
-        try:
-            is_spam, pro_tip = client.check_comment(
+        cache_key = _verdict_cache_key(content)
+        verdict = cache.get(cache_key)
+        if verdict is None:
+            verdict = _get_client().check_comment(
                 user_ip=remote_addr,
                 user_agent=user_agent,
                 referrer=referer,
@@ -203,9 +224,8 @@ class SpamMixin(models.Model):
                 comment_author=author,
                 comment_author_email=author_email
             )
-        except AkismetClientError:
-            logger.exception('Error performing SPAM check')
-            return False
+            cache.set(cache_key, verdict, settings.SPAM_CHECK_CACHE_TIMEOUT)
+        is_spam, pro_tip = verdict
         self.spam_pro_tip = pro_tip
         self.spam_data['headers'] = {
             'Remote-Addr': remote_addr,
@@ -30,6 +30,7 @@ from framework.auth.exceptions import (ChangePasswordError, ExpiredTokenError,
                                        MergeConfirmedRequiredError,
                                        MergeConflictError)
 from framework.exceptions import PermissionsError
+from framework.sessions.store import get_store
 from framework.sessions.utils import remove_sessions_for_user
 from framework.mongo import get_cache_key
 from modularodm.exceptions import NoResultsFound
@@ -1334,21 +1335,16 @@ class OSFUser(DirtyFieldsMixin, GuidMixin, BaseModel, AbstractBaseUser, Permissi
         :returns: The signed cookie
         """
         secret = secret or settings.SECRET_KEY
-        sessions = Session.find(
-            Q('data.auth_user_id', 'eq', self._id)
-        ).sort(
-            '-date_modified'
-        ).limit(1)
-
-        if sessions.exists():
-            user_session = sessions[0]
-        else:
+        store = get_store()
+        user_session = store.get_latest_for_user(self._id)
+
+        if user_session is None:
             user_session = Session(data={
                 'auth_user_id': self._id,
                 'auth_user_username': self.username,
                 'auth_user_fullname': self.fullname,
             })
-            user_session.save()
+            store.save(user_session)
 
         signer = itsdangerous.Signer(secret)
         return signer.sign(user_session._id)
@@ -1368,7 +1364,7 @@ class OSFUser(DirtyFieldsMixin, GuidMixin, BaseModel, AbstractBaseUser, Permissi
         except itsdangerous.BadSignature:
             return None
 
-        user_session = Session.load(token)
+        user_session = get_store().load(token)
 
         if user_session is None:
             return None
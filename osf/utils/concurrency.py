@@ -0,0 +1,83 @@
+"""
+Helpers for celery tasks that do a lot of slow, independent work, such as sending emails or
+posting to external services, and that must not run twice at the same time.
+"""
+import contextlib
+import threading
+import time
+import zlib
+from multiprocessing.pool import ThreadPool
+
+from django.db import close_old_connections, connection
+
+
+@contextlib.contextmanager
+def advisory_lock(name):
+    """Hold the Postgres advisory lock ``name`` for the duration of the block, if no one else does.
+
+        with advisory_lock('send_users_email:email_digest') as acquired:
+            if not acquired:
+                return
+
+    :param str name: Name of the lock, hashed to the lock's key
+    """
+    key = zlib.crc32(name)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [key])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [key])
+
+
+class ThrottledPool(object):
+    """Calls functions from a pool of ``pool_size`` threads, starting at most ``rate`` calls a second.
+
+    With a ``pool_size`` of 0 calls are made one by one from the calling thread, e.g. the celery
+    worker's; a ``rate`` of 0 means no limit.
+    """
+
+    def __init__(self, pool_size, rate=0):
+        self.pool = ThreadPool(pool_size) if pool_size else None
+        self.interval = 1.0 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next_call = time.time()
+
+    def _wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.time()
+            wait = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def _call(self, func, arg):
+        self._wait()
+        try:
+            return func(arg)
+        finally:
+            if self.pool:
+                # Pool threads have their own database connections
+                close_old_connections()
+
+    def map(self, func, args):
+        """Return ``[func(arg) for arg in args]``, called from the pool."""
+        if self.pool:
+            return self.pool.map(lambda arg: self._call(func, arg), args)
+        return [self._call(func, arg) for arg in args]
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+            self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,139 @@
+"""
+A request-scoped identity map for ``load()``.
+
+While a request is being handled, every object returned by ``BaseModel.load``,
+``Guid.load``, ``GuidMixin.load`` and ``ObjectIDMixin.load`` is remembered, so
+loading the same node or user again in that request does not query the database.
+Each load still returns a new instance, copied from the row as it was loaded, so
+changes made to one instance and not saved are never seen by later loads, as if
+they had queried. The map only exists between the ``before_request`` and
+``after_request`` handlers below; outside of a request (scripts, celery tasks,
+postcommit tasks, tests) ``load()`` always hits the database.
+
+Objects are evicted when any instance of the same row is saved or deleted.
+Queryset ``update()``s and raw SQL are not tracked, so callers relying on those should
+``reload()`` as they would have to anyway, or ``evict_rows`` what they changed.
+"""
+from __future__ import unicode_literals
+
+import copy
+import functools
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class IdentityMap(object):
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # (model, key) -> object
+        self._objects = {}
+        # (concrete model, pk) -> set of (model, key) under which the row is stored
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._objects)
+
+    def get(self, model, key):
+        """Return a copy of the object loaded as ``model.load(key)``. Raises ``KeyError`` on a miss."""
+        try:
+            obj = self._objects[(model, key)]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        return copy_instance(obj)
+
+    def add(self, model, key, obj):
+        # Keep a copy, so that changes to ``obj`` are not handed to later loads
+        self._objects[(model, key)] = copy_instance(obj)
+        self._keys.setdefault((obj._meta.concrete_model, obj.pk), set()).add((model, key))
+
+    def evict(self, obj):
+        self.evict_row(obj._meta.concrete_model, obj.pk)
+
+    def evict_row(self, concrete_model, pk):
+        for key in self._keys.pop((concrete_model, pk), ()):
+            self._objects.pop(key, None)
+
+    def clear(self):
+        self._objects.clear()
+        self._keys.clear()
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
+
+
+def copy_instance(obj):
+    """Return a deep copy of model instance ``obj``, including the results of its prefetched relations."""
+    memo = {}
+    # Deep copies of querysets drop their results, which would have to be queried again
+    for queryset in obj.__dict__.get('_prefetched_objects_cache', {}).values():
+        clone = queryset._clone()
+        clone._result_cache = copy.deepcopy(queryset._result_cache, memo)
+        clone._prefetch_done = queryset._prefetch_done
+        memo[id(queryset)] = clone
+    return copy.deepcopy(obj, memo)
+
+
+def get_identity_map():
+    """Return the identity map for the current request, or ``None`` outside of a request."""
+    return getattr(_local, 'identity_map', None)
+
+
+def identity_map_before_request():
+    _local.identity_map = IdentityMap()
+
+
+def identity_map_after_request(response=None):
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        logger.debug('Identity map: {hits} hits, {misses} misses, {size} objects'.format(**identity_map.stats))
+    _local.identity_map = None
+    return response
+
+
+def evict(obj):
+    identity_map = get_identity_map()
+    if identity_map is not None and obj.pk is not None:
+        identity_map.evict(obj)
+
+
+def evict_rows(model, pks):
+    """Evict the rows of ``model`` with primary keys ``pks``, after changing them without saving instances."""
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        for pk in pks:
+            identity_map.evict_row(model._meta.concrete_model, pk)
+
+
+def identity_mapped(func):
+    """Decorator for ``load`` classmethods that consults the request's identity map."""
+    @functools.wraps(func)
+    def wrapped(cls, key, *args, **kwargs):
+        identity_map = get_identity_map()
+        if identity_map is None or args or kwargs or not isinstance(key, (basestring, int, long)):
+            return func(cls, key, *args, **kwargs)
+        try:
+            return identity_map.get(cls, key)
+        except KeyError:
+            pass
+        obj = func(cls, key)
+        # modm-style loads return None for missing objects; those are not remembered
+        if obj is not None:
+            identity_map.add(cls, key, obj)
+        return obj
+    return wrapped
+
+
+handlers = {
+    'before_request': identity_map_before_request,
+    'after_request': identity_map_after_request,
+    'teardown_request': identity_map_after_request,
+}
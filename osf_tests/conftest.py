@@ -77,6 +77,7 @@ def patched_settings():
     """Patch settings for tests"""
     settings.ENABLE_EMAIL_SUBSCRIPTIONS = False
     settings.BCRYPT_LOG_ROUNDS = 1
+    settings.PAGE_COUNTER_FLUSH_THREAD = False
 
 @pytest.fixture()
 def fake():
@@ -5,6 +5,7 @@ Unit tests for analytics logic in framework/analytics/__init__.py
 
 import unittest
 
+import mock
 import pytest
 from django.utils import timezone
 from nose.tools import *  # flake8: noqa  (PEP8 asserts)
@@ -14,7 +15,9 @@ from datetime import datetime
 
 from framework import analytics, sessions
 from framework.sessions import session
-from osf.models import PageCounter
+from osf.models import PageCounter, PageCounterDate
+from osf.models.analytics import PageCounterBuffer, page_counter_buffer
+from website import settings
 
 from tests.base import OsfTestCase
 from osf_tests.factories import UserFactory, ProjectFactory
@@ -52,9 +55,11 @@ class UpdateCountersTestCase(OsfTestCase):
         self.ctx.push()
         # TODO: Think of something better @sloria @jmcarp
         sessions.set_session(sessions.Session())
+        page_counter_buffer.clear()
 
     def tearDown(self):
         self.ctx.pop()
+        page_counter_buffer.clear()
 
 
 class TestUpdateCounters(UpdateCountersTestCase):
@@ -165,6 +170,68 @@ class TestUpdateCounters(UpdateCountersTestCase):
         count = analytics.get_basic_counters(page, db=None)
         assert_equal(count, (3, 5))
 
+    def test_counts_are_buffered_until_flushed(self):
+        page = 'download:{0}:{1}'.format(self.node._id, self.fid)
+        for _ in range(3):
+            analytics.update_counter(page)
+
+        assert_false(PageCounter.objects.filter(_id=page).exists())
+        assert_equal(analytics.get_basic_counters(page), (1, 3))
+
+        analytics.flush_page_counters()
+
+        counter = PageCounter.objects.get(_id=page)
+        assert_equal((counter.unique, counter.total), (1, 3))
+        day = PageCounterDate.objects.get(counter=counter)
+        assert_equal(day.date, timezone.now().date())
+        assert_equal((day.unique, day.total), (1, 3))
+        assert_equal(analytics.get_basic_counters(page), (1, 3))
+
+        analytics.update_counter(page)
+        analytics.flush_page_counters()
+        assert_equal(analytics.get_basic_counters(page), (1, 4))
+        assert_equal(PageCounterDate.objects.get(counter=counter).total, 4)
+
+    def test_contributor_downloads_only_count_for_the_day(self):
+        page = 'download:{0}:{1}'.format(self.node._id, self.fid)
+        session.data['auth_user_id'] = self.userid
+        analytics.update_counter(page, node_info=self.node_info)
+        analytics.flush_page_counters()
+
+        assert_equal(analytics.get_basic_counters(page), (0, 0))
+        assert_equal(PageCounterDate.objects.get(counter___id=page).total, 1)
+
+    def test_failed_flush_keeps_counts(self):
+        page = 'download:{0}:{1}'.format(self.node._id, self.fid)
+        analytics.update_counter(page)
+        with mock.patch.object(PageCounter, 'increment_many', side_effect=ValueError):
+            with assert_raises(ValueError):
+                analytics.flush_page_counters()
+        analytics.flush_page_counters()
+        assert_equal(PageCounter.objects.get(_id=page).total, 1)
+
+    def test_flusher_thread_is_started_once_per_process(self):
+        buffer = PageCounterBuffer()
+        with mock.patch.object(settings, 'PAGE_COUNTER_FLUSH_THREAD', True), \
+                mock.patch('osf.models.analytics.threading.Thread') as mock_thread:
+            buffer.add('node:abcde', timezone.now().date(), total=1)
+            buffer.add('node:abcde', timezone.now().date(), total=1)
+            assert_equal(mock_thread.return_value.start.call_count, 1)
+            with mock.patch('osf.models.analytics.os.getpid', return_value=-1):
+                buffer.add('node:abcde', timezone.now().date(), total=1)
+            assert_equal(mock_thread.return_value.start.call_count, 2)
+
+    def test_flusher_thread_writes_counts_every_interval(self):
+        page = 'download:{0}:{1}'.format(self.node._id, self.fid)
+        analytics.update_counter(page)
+        # Stop the loop after its first flush
+        with mock.patch('osf.models.analytics.time.sleep', side_effect=[None, KeyboardInterrupt]) as mock_sleep, \
+                mock.patch('osf.models.analytics.close_old_connections'):
+            with assert_raises(KeyboardInterrupt):
+                page_counter_buffer._run_flusher()
+        mock_sleep.assert_called_with(settings.PAGE_COUNTER_FLUSH_INTERVAL)
+        assert_equal(PageCounter.objects.get(_id=page).total, 1)
+
     @unittest.skip('Reverted the fix for #2281. Unskip this once we use GUIDs for keys in the download counts collection')
     def test_update_counters_different_files(self):
         # Regression test for https://github.com/CenterForOpenScience/osf.io/issues/2281
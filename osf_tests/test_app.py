@@ -5,6 +5,7 @@ import framework
 
 from flask import Flask
 from nose.tools import *  # noqa (PEP8 asserts)
+from osf.utils import identity_map
 from website import settings
 from website.app import attach_handlers
 
@@ -24,6 +25,7 @@ def test_attach_handlers():
         framework.postcommit_tasks.handlers.postcommit_before_request,
         framework.sessions.prepare_private_key,
         framework.sessions.before_request,
+        identity_map.identity_map_before_request,
     }
 
     assert_after_funcs = {
@@ -32,12 +34,14 @@ def test_attach_handlers():
         framework.celery_tasks.handlers.celery_after_request,
         framework.transactions.handlers.transaction_after_request,
         framework.sessions.after_request,
+        identity_map.identity_map_after_request,
     }
 
     assert_teardown_funcs = {
         framework.django.handlers.close_old_django_db_connections,
         framework.celery_tasks.handlers.celery_teardown_request,
         framework.transactions.handlers.transaction_teardown_request,
+        identity_map.identity_map_after_request,
     }
 
     # Check that necessary handlers are attached and correctly ordered
@@ -0,0 +1,55 @@
+import threading
+
+import mock
+import pytest
+from django.db import connection
+
+from osf.utils.concurrency import ThrottledPool, advisory_lock
+
+pytestmark = pytest.mark.django_db
+
+
+class TestAdvisoryLock:
+
+    def test_lock_is_held_for_the_block(self):
+        with advisory_lock('test_lock') as acquired:
+            assert acquired
+            # Advisory locks are reentrant within a session, so try from another connection
+            assert _try_lock_from_thread('test_lock') is False
+        assert _try_lock_from_thread('test_lock') is True
+
+
+def _try_lock_from_thread(name):
+    results = []
+
+    def try_lock():
+        try:
+            with advisory_lock(name) as acquired:
+                results.append(acquired)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=try_lock)
+    thread.start()
+    thread.join()
+    return results[0]
+
+
+class TestThrottledPool:
+
+    @pytest.mark.parametrize('pool_size', [0, 3])
+    def test_map_keeps_order(self, pool_size):
+        with ThrottledPool(pool_size) as pool:
+            assert pool.map(lambda x: x * 2, range(10)) == [x * 2 for x in range(10)]
+
+    def test_without_pool_calls_from_calling_thread(self):
+        with ThrottledPool(0) as pool:
+            threads = pool.map(lambda x: threading.current_thread(), range(3))
+        assert set(threads) == {threading.current_thread()}
+
+    def test_rate_is_limited(self):
+        with mock.patch('osf.utils.concurrency.time.sleep') as mock_sleep:
+            with ThrottledPool(0, rate=10) as pool:
+                pool.map(lambda x: x, range(3))
+        assert mock_sleep.call_count == 2
+        assert all(0 < call[0][0] <= 0.1 for call in mock_sleep.call_args_list)
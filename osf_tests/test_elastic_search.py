@@ -955,6 +955,22 @@ class TestSearchFiles(OsfTestCase):
         find = query_file('The Dock of the Bay.mp3')['results']
         assert_equal(len(find), 0)
 
+    def test_rename_node_updates_file_documents(self):
+        self.root.append_file('Mr. Pitiful.mp3')
+        self.node.set_title('Otis Blue', auth=Auth(self.node.creator))
+        with run_celery_tasks():
+            self.node.save()
+        find = query_file('Mr. Pitiful.mp3')['results']
+        assert_equal(find[0]['node_title'], 'Otis Blue')
+
+    def test_unrelated_node_changes_do_not_update_file_documents(self):
+        self.root.append_file('Pain in My Heart.mp3')
+        self.node.description = 'Soul'
+        with mock.patch('website.search.elastic_search.bulk_update_files') as mock_update_files:
+            with run_celery_tasks():
+                self.node.save()
+        assert_false(mock_update_files.called)
+
     def test_file_download_url_guid(self):
         file_ = self.root.append_file('Timber.mp3')
         file_guid = file_.get_guid(create=True)
@@ -0,0 +1,86 @@
+import pytest
+
+from osf.models import Guid, Node, NodeLog, OSFUser
+from osf.utils import identity_map
+from osf_tests.factories import NodeFactory, UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def request_identity_map():
+    identity_map.identity_map_before_request()
+    yield identity_map.get_identity_map()
+    identity_map.identity_map_after_request()
+
+
+class TestIdentityMap:
+
+    def test_disabled_outside_of_requests(self):
+        assert identity_map.get_identity_map() is None
+        user = UserFactory()
+        assert OSFUser.load(user._id) is not OSFUser.load(user._id)
+
+    def test_guid_mixin_load_returns_copy(self, request_identity_map):
+        user = UserFactory()
+        loaded = OSFUser.load(user._id)
+        reloaded = OSFUser.load(user._id)
+        assert reloaded == loaded
+        assert reloaded is not loaded
+        assert request_identity_map.stats == {'hits': 1, 'misses': 1, 'size': 1}
+
+    def test_unsaved_changes_are_not_loaded(self, request_identity_map):
+        node = NodeFactory(title='Original title')
+        loaded = Node.load(node._id)
+        loaded.title = 'Unsaved title'
+        assert Node.load(node._id).title == 'Original title'
+        reloaded = Node.load(node._id)
+        reloaded.title = 'Another unsaved title'
+        assert Node.load(node._id).title == 'Original title'
+
+    def test_changes_to_mutable_fields_are_not_loaded(self, request_identity_map):
+        user = UserFactory()
+        OSFUser.load(user._id).social['twitter'] = 'unsaved'
+        assert 'twitter' not in OSFUser.load(user._id).social
+
+    @pytest.mark.django_assert_num_queries
+    def test_repeated_loads_do_not_query(self, request_identity_map, django_assert_num_queries):
+        node = NodeFactory()
+        Node.load(node._id)
+        with django_assert_num_queries(0):
+            Node.load(node._id)
+            Node.load(node._id)
+
+    def test_guid_and_object_id_loads(self, request_identity_map):
+        node = NodeFactory()
+        log = node.logs.first()
+        assert Guid.load(node._id) == Guid.load(node._id)
+        assert NodeLog.load(log._id) == NodeLog.load(log._id)
+        assert request_identity_map.stats['hits'] == 2
+
+    def test_missing_objects_are_not_cached(self, request_identity_map):
+        assert OSFUser.load('notauser') is None
+        assert len(request_identity_map) == 0
+
+    def test_save_evicts(self, request_identity_map):
+        user = UserFactory()
+        loaded = OSFUser.load(user._id)
+        user.fullname = 'Changed Name'
+        user.save()
+        reloaded = OSFUser.load(user._id)
+        assert reloaded is not loaded
+        assert reloaded.fullname == 'Changed Name'
+
+    def test_delete_evicts(self, request_identity_map):
+        node = NodeFactory()
+        log = NodeLog.load(node.logs.first()._id)
+        log_id = log._id
+        log.delete()
+        assert NodeLog.load(log_id) is None
+
+    def test_after_request_discards_map(self):
+        identity_map.identity_map_before_request()
+        user = UserFactory()
+        OSFUser.load(user._id)
+        identity_map.identity_map_after_request()
+        assert identity_map.get_identity_map() is None
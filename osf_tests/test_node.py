@@ -1,6 +1,8 @@
 import datetime
 
 from django.utils import timezone
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError as DjangoValidationError
 from modularodm import Q
 from modularodm.exceptions import ValidationError as MODMValidationError
@@ -19,6 +21,7 @@ from website.citations.utils import datetime_to_csl
 from website import language, settings
 from website.project.model import ensure_schemas
 from website.project.tasks import on_node_updated
+from website.share.tasks import flush_share_outbox
 
 from osf.models import (
     AbstractNode,
@@ -32,6 +35,7 @@ from osf.models import (
     Registration,
     DraftRegistration,
     DraftRegistrationApproval,
+    ShareOutboxItem,
 )
 from osf.models.node import AbstractNodeQuerySet
 from osf.models.spam import SpamStatus
@@ -1261,6 +1265,34 @@ class TestPermissionMethods:
         contributor.save()
         assert node.get_permissions(user) == [permissions.READ, permissions.WRITE]
 
+    def test_permissions_for(self, project, node):
+        user = UserFactory()
+        child = NodeFactory(parent=project, creator=project.creator)
+        grandchild = NodeFactory(parent=child, creator=project.creator)
+        Contributor.objects.create(node=project, user=user, read=True, write=True, admin=True)
+        Contributor.objects.create(node=node, user=user, read=True, write=False, admin=False)
+
+        result = AbstractNode.objects.permissions_for(user, [project.id, child.id, grandchild.id, node.id])
+        assert result == {
+            project.id: {permissions.READ, permissions.WRITE, permissions.ADMIN},
+            child.id: {permissions.READ},
+            grandchild.id: {permissions.READ},
+            node.id: {permissions.READ},
+        }
+        for each in (project, child, grandchild, node):
+            for perm in permissions.PERMISSIONS:
+                assert (perm in result[each.id]) is each.has_permission(user, perm)
+
+    def test_permissions_for_without_user(self, project):
+        assert AbstractNode.objects.permissions_for(None, [project.id]) == {project.id: set()}
+
+    @pytest.mark.django_assert_num_queries
+    def test_permissions_for_query_count(self, project, django_assert_num_queries):
+        user = UserFactory()
+        node_ids = [project.id] + [NodeFactory(parent=project).id for _ in range(5)]
+        with django_assert_num_queries(2):
+            AbstractNode.objects.permissions_for(user, node_ids)
+
     def test_add_permission(self, node):
         user = UserFactory()
         Contributor.objects.create(
@@ -3031,6 +3063,12 @@ class TestLogMethods:
         # Hidden log is not returned
         assert n_new_logs == n_orig_logs - 1
 
+    def test_get_aggregate_logs_queryset_excludes_private_components(self, parent, node):
+        public = NodeFactory(parent=parent, is_public=True)
+        parent.set_privacy('public')
+        logs = parent.get_aggregate_logs_queryset(Auth(UserFactory()))
+        assert set(logs.values_list('node_id', flat=True)) == {parent.id, public.id}
+
     def test_excludes_logs_for_linked_nodes(self, parent):
         pointee = ProjectFactory()
         n_logs_before = parent.get_aggregate_logs_queryset(auth=Auth(parent.creator)).count()
@@ -3364,28 +3402,30 @@ class TestOnNodeUpdate:
 
     @mock.patch('website.project.tasks.settings.SHARE_URL', None)
     @mock.patch('website.project.tasks.settings.SHARE_API_TOKEN', None)
-    @mock.patch('website.project.tasks.requests')
-    def test_skips_no_settings(self, requests, node, user, request_context):
+    def test_skips_no_settings(self, node, user, request_context):
         on_node_updated(node._id, user._id, False, {'is_public'})
-        assert requests.post.called is False
+        assert not ShareOutboxItem.objects.exists()
 
     @mock.patch('website.project.tasks.settings.SHARE_URL', 'https://share.osf.io')
     @mock.patch('website.project.tasks.settings.SHARE_API_TOKEN', 'Token')
-    @mock.patch('website.project.tasks.requests')
-    def test_updates_share(self, requests, node, user):
+    @mock.patch('website.share.tasks.requests.post')
+    def test_updates_share(self, post, node, user):
         on_node_updated(node._id, user._id, False, {'is_public'})
+        assert ShareOutboxItem.objects.filter(kind=ShareOutboxItem.NODE, object_id=node.id).exists()
+        flush_share_outbox()
 
-        kwargs = requests.post.call_args[1]
+        kwargs = post.call_args[1]
         graph = kwargs['json']['data']['attributes']['data']['@graph']
 
-        assert requests.post.called
+        assert post.called
         assert kwargs['headers']['Authorization'] == 'Bearer Token'
         assert graph[0]['uri'] == '{}{}/'.format(settings.DOMAIN, node._id)
+        assert not ShareOutboxItem.objects.exists()
 
     @mock.patch('website.project.tasks.settings.SHARE_URL', 'https://share.osf.io')
     @mock.patch('website.project.tasks.settings.SHARE_API_TOKEN', 'Token')
-    @mock.patch('website.project.tasks.requests')
-    def test_update_share_correctly(self, requests, node, user, request_context):
+    @mock.patch('website.share.tasks.requests.post')
+    def test_update_share_correctly(self, post, node, user, request_context):
         cases = [{
             'is_deleted': False,
             'attrs': {'is_public': True, 'is_deleted': False, 'spam_status': SpamStatus.HAM}
@@ -3406,8 +3446,9 @@ class TestOnNodeUpdate:
             node.save()
 
             on_node_updated(node._id, user._id, False, {'is_public'})
+            flush_share_outbox()
 
-            kwargs = requests.post.call_args[1]
+            kwargs = post.call_args[1]
             graph = kwargs['json']['data']['attributes']['data']['@graph']
             assert graph[1]['is_deleted'] == case['is_deleted']
 
@@ -3973,3 +4014,28 @@ class TestAdminImplicitRead(object):
 
         assert lvl1component in qs
         assert project not in qs
+
+
+class TestCloneNodeLogs:
+
+    def test_clone_node_logs(self, project, auth):
+        project.add_tag('tardigrade', auth=auth)
+        other = ProjectFactory()
+        last_id = other.logs.latest('id').id
+        assert NodeLog.clone_node_logs(project, other, chunk_size=1) == 2
+        originals = project.logs.order_by('id')
+        clones = other.logs.filter(id__gt=last_id).order_by('id')
+        assert (
+            [(log.date, log.action, log.params, log.user, log.original_node) for log in originals] ==
+            [(log.date, log.action, log.params, log.user, log.original_node) for log in clones]
+        )
+        assert not set(originals.values_list('_id', flat=True)) & set(clones.values_list('_id', flat=True))
+
+    def test_query_count_does_not_grow_with_logs(self, project, auth):
+        for i in range(5):
+            project.add_tag('tag{}'.format(i), auth=auth)
+        other = ProjectFactory()
+        with CaptureQueriesContext(connection) as queries:
+            NodeLog.clone_node_logs(project, other)
+        # One read and one insert, then the read that finds no more logs
+        assert len(queries) == 3
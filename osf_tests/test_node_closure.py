@@ -0,0 +1,107 @@
+import pytest
+
+from osf.models import AbstractNode, NodeClosure, NodeLog, NodeRelation
+from osf_tests.factories import NodeFactory, ProjectFactory, RegistrationFactory, UserFactory
+from osf.utils.auth import Auth
+
+pytestmark = pytest.mark.django_db
+
+
+def closure_pairs(node):
+    return set(NodeClosure.objects.filter(ancestor=node).values_list('descendant_id', 'depth'))
+
+
+class TestNodeClosure:
+
+    @pytest.fixture()
+    def user(self):
+        return UserFactory()
+
+    @pytest.fixture()
+    def root(self, user):
+        return ProjectFactory(creator=user)
+
+    @pytest.fixture()
+    def child(self, root):
+        return NodeFactory(parent=root, creator=root.creator)
+
+    @pytest.fixture()
+    def grandchild(self, child):
+        return NodeFactory(parent=child, creator=child.creator)
+
+    def test_closure_rows_created_for_components(self, root, child, grandchild):
+        assert closure_pairs(root) == {(child.id, 1), (grandchild.id, 2)}
+        assert closure_pairs(child) == {(grandchild.id, 1)}
+        assert closure_pairs(grandchild) == set()
+
+    def test_node_links_are_not_in_closure(self, root, user):
+        linked = ProjectFactory(creator=user)
+        root.add_pointer(linked, auth=Auth(user))
+        assert not NodeClosure.objects.filter(ancestor=root, descendant=linked).exists()
+
+    def test_attaching_subtree_links_all_ancestors(self, root, child, grandchild, user):
+        other = ProjectFactory(creator=user)
+        other_child = NodeFactory(parent=other, creator=user)
+        NodeRelation.objects.create(parent=grandchild, child=other)
+
+        assert closure_pairs(root) == {
+            (child.id, 1), (grandchild.id, 2), (other.id, 3), (other_child.id, 4)
+        }
+
+    def test_removing_relation_unlinks_subtree(self, root, child, grandchild):
+        NodeRelation.objects.get(parent=root, child=child).delete()
+
+        assert closure_pairs(root) == set()
+        assert closure_pairs(child) == {(grandchild.id, 1)}
+
+    def test_get_root(self, root, child, grandchild):
+        assert grandchild.get_root() == root
+        assert child.get_root() == root
+        assert root.get_root() == root
+
+    def test_get_children(self, root, child, grandchild):
+        grandchild.is_deleted = True
+        grandchild.save()
+
+        assert set(AbstractNode.objects.get_children(child)) == {grandchild}
+        assert set(AbstractNode.objects.get_children(root)) == {child, grandchild}
+        assert set(AbstractNode.objects.get_children(root, active=True)) == {child}
+
+    def test_get_descendants_recursive_includes_links(self, root, child, grandchild, user):
+        linked = ProjectFactory(creator=user)
+        child.add_pointer(linked, auth=Auth(user))
+
+        assert list(root.get_descendants_recursive(primary_only=True)) == [child, grandchild]
+        assert list(root.get_descendants_recursive()) == [child, grandchild, linked]
+
+    def test_has_pointers_recursive(self, root, child, grandchild, user):
+        assert root.has_pointers_recursive is False
+        grandchild.add_pointer(ProjectFactory(creator=user), auth=Auth(user))
+        assert root.has_pointers_recursive is True
+        assert child.has_pointers_recursive is True
+
+    def test_can_view_implicit_admin_read(self, root, child, grandchild):
+        admin = UserFactory()
+        child.add_contributor(admin, permissions=['read', 'write', 'admin'], auth=Auth(root.creator))
+        child.save()
+
+        readable = set(AbstractNode.objects.can_view(user=admin))
+        assert {child, grandchild}.issubset(readable)
+        assert root not in readable
+
+    def test_log_roots_follow_node_roots(self, root, child, grandchild, user):
+        assert grandchild.root_id == root.id
+        assert set(NodeLog.objects.filter(node__in=[root, child, grandchild]).values_list('root_id', flat=True)) == {root.id}
+
+        log = grandchild.add_log(NodeLog.TAG_ADDED, params={}, auth=Auth(user))
+        assert log.root_id == root.id
+
+    @pytest.mark.parametrize('copy', ['fork', 'registration'])
+    def test_copied_log_roots_follow_the_copy(self, root, child, user, copy):
+        if copy == 'fork':
+            new_root = root.fork_node(Auth(user))
+        else:
+            new_root = RegistrationFactory(project=root, user=user)
+        new_nodes = AbstractNode.objects.filter(root=new_root)
+        assert new_nodes.count() == 2
+        assert set(NodeLog.objects.filter(node__in=new_nodes).values_list('root_id', flat=True)) == {new_root.id}
@@ -0,0 +1,92 @@
+import threading
+
+import mock
+import pytest
+
+from framework.postcommit_tasks import handlers
+from framework.postcommit_tasks.handlers import (
+    enqueue_postcommit_task,
+    postcommit_after_request,
+    postcommit_before_request,
+    postcommit_queue,
+)
+
+calls = []
+
+
+def record(value):
+    calls.append(value)
+
+
+def fail():
+    raise ValueError('nope')
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    del calls[:]
+    postcommit_before_request()
+    handlers.postcommit_stats.clear()
+
+
+@pytest.fixture()
+def background():
+    with mock.patch.object(handlers.settings, 'POSTCOMMIT_EXECUTOR', 'background'):
+        yield
+
+
+class TestPostcommitExecutor:
+
+    def test_inline_runs_tasks_before_returning(self):
+        enqueue_postcommit_task(record, (1, ), {})
+        postcommit_after_request(mock.Mock(status_code=200))
+        assert calls == [1]
+
+    def test_inline_records_timings(self):
+        enqueue_postcommit_task(record, (1, ), {})
+        enqueue_postcommit_task(record, (2, ), {})
+        postcommit_after_request(mock.Mock(status_code=200))
+        stats = handlers.postcommit_stats['{}.record'.format(__name__)]
+        assert stats['calls'] == 2
+        assert stats['errors'] == 0
+        assert stats['max_ms'] <= stats['total_ms']
+
+    def test_once_per_request(self, background):
+        enqueue_postcommit_task(record, (1, ), {})
+        enqueue_postcommit_task(record, (1, ), {})
+        enqueue_postcommit_task(record, (1, ), {}, once_per_request=False)
+        assert len(postcommit_queue()) == 2
+
+    def test_background_does_not_wait_for_tasks(self, background):
+        started, release, finished = threading.Event(), threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+            calls.append('done')
+            finished.set()
+
+        enqueue_postcommit_task(block, (), {})
+        postcommit_after_request(mock.Mock(status_code=200))
+        assert started.wait(5)
+        assert calls == []
+        release.set()
+        assert finished.wait(5)
+        assert calls == ['done']
+
+    def test_failures_are_counted(self):
+        with mock.patch.object(handlers.sentry, 'log_exception') as mock_log_exception:
+            handlers.run_postcommit_task(fail, reraise=False)
+        assert mock_log_exception.called
+        assert handlers.postcommit_stats['{}.fail'.format(__name__)] == {
+            'calls': 1, 'errors': 1,
+            'total_ms': mock.ANY, 'max_ms': mock.ANY,
+        }
+        with pytest.raises(ValueError):
+            handlers.run_postcommit_task(fail)
+
+    def test_failed_requests_drop_the_queue(self, background):
+        enqueue_postcommit_task(record, (1, ), {})
+        postcommit_after_request(mock.Mock(status_code=500))
+        assert len(postcommit_queue()) == 0
+        assert calls == []
@@ -0,0 +1,150 @@
+import mock
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from framework.auth import Auth
+from osf.models import AbstractNode, Node
+from osf_tests.factories import (
+    InstitutionFactory,
+    NodeFactory,
+    EmbargoFactory,
+    NodeLicenseRecordFactory,
+    ProjectFactory,
+    RegistrationFactory,
+    UserFactory,
+)
+from website.search import elastic_search
+from website.search_migration import reindex
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def bulk():
+    def parallel_bulk(client, actions, **kwargs):
+        indexed.extend(actions)
+        return [(True, {}) for _ in actions]
+    indexed = []
+    with mock.patch.object(reindex, 'parallel_bulk', parallel_bulk), \
+            mock.patch.object(reindex.elastic_search, 'client'):
+        yield indexed
+
+
+def make_project():
+    project = ProjectFactory(is_public=True)
+    auth = Auth(project.creator)
+    project.add_contributor(UserFactory(), auth=auth, visible=False)
+    project.add_tag('tardigrade', auth=auth)
+    project.affiliated_institutions.add(InstitutionFactory())
+    project.node_license = NodeLicenseRecordFactory()
+    project.save()
+    project.update_node_wiki('home', 'Hello *world*', auth)
+    component = NodeFactory(parent=project, creator=project.creator, is_public=True)
+    return project, component
+
+
+class TestSerializeNodes:
+
+    def test_matches_serialize_node(self):
+        nodes = make_project()
+        serialized = elastic_search.serialize_nodes(nodes)
+        for node in nodes:
+            category = elastic_search.get_doctype_from_node(node)
+            assert serialized[node.id] == (category, elastic_search.serialize_node(node, category))
+        project, component = nodes
+        assert serialized[component.id][1]['license'] == serialized[project.id][1]['license'] != {}
+        assert serialized[project.id][1]['wikis']['home'] == 'Hello world'
+
+    def test_query_count_does_not_grow_with_nodes(self):
+        ids = [node.id for node in make_project()]
+        with CaptureQueriesContext(connection) as few:
+            elastic_search.serialize_nodes(Node.objects.filter(id__in=ids))
+        for _ in range(3):
+            ids.extend(node.id for node in make_project())
+        with CaptureQueriesContext(connection) as many:
+            elastic_search.serialize_nodes(Node.objects.filter(id__in=ids))
+        assert len(many) == len(few)
+
+    def test_registration_components_inherit_sanctions(self):
+        project, component = make_project()
+        registration = RegistrationFactory(project=project, is_public=True)
+        registration.embargo = EmbargoFactory(user=project.creator)
+        registration.save()
+        nodes = [registration] + list(registration.nodes)
+        assert len(nodes) == 2
+
+        serialized = elastic_search.serialize_nodes(nodes)
+        for node in nodes:
+            assert serialized[node.id] == ('registration', elastic_search.serialize_node(node, 'registration'))
+            assert serialized[node.id][1]['is_pending_embargo'] is True
+
+    def test_registration_query_count_does_not_grow_with_depth(self):
+        def registration_tree(depth):
+            project = ProjectFactory(is_public=True)
+            parent = project
+            for _ in range(depth):
+                parent = NodeFactory(parent=parent, creator=project.creator, is_public=True)
+            registration = RegistrationFactory(project=project, is_public=True)
+            return [node.id for node in registration.node_and_primary_descendants()]
+
+        shallow, deep = registration_tree(1), registration_tree(4)
+        with CaptureQueriesContext(connection) as few:
+            elastic_search.serialize_nodes(AbstractNode.objects.filter(id__in=shallow))
+        with CaptureQueriesContext(connection) as many:
+            elastic_search.serialize_nodes(AbstractNode.objects.filter(id__in=deep))
+        assert len(many) == len(few)
+
+
+class TestReindexer:
+
+    def test_iter_pk_batches(self):
+        projects = [ProjectFactory(is_public=True) for _ in range(5)]
+        queryset = Node.objects.filter(id__in=[p.id for p in projects])
+        batches = list(reindex.iter_pk_batches(queryset, 2))
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert sum(batches, []) == sorted(p.id for p in projects)
+        assert list(reindex.iter_pk_batches(queryset, 2, after=batches[1][-1])) == batches[2:]
+
+    def test_serialize_batch_skips_unindexable_objects(self):
+        public = ProjectFactory(is_public=True)
+        private = ProjectFactory(is_public=False)
+        last_pk, actions = reindex.serialize_batch('node', 'test', [public.id, private.id])
+        assert last_pk == private.id
+        assert [action['_id'] for action in actions] == [public._id]
+        assert actions[0]['_index'] == 'test'
+        assert actions[0]['_type'] == 'project'
+        assert actions[0]['_source']['title'] == public.title
+
+    def test_reindex_records_and_resumes_from_checkpoint(self, bulk, tmpdir):
+        first, second = ProjectFactory(is_public=True), ProjectFactory(is_public=True)
+        checkpoint = reindex.Checkpoint(str(tmpdir.join('checkpoint.json')))
+        checkpoint.start('test', None)
+        checkpoint.set('node', first.id)
+
+        report = reindex.Reindexer('test', checkpoint=checkpoint, workers=0).reindex(['node'])
+
+        assert report['node']['indexed'] == 1
+        assert [action['_id'] for action in bulk] == [second._id]
+        assert reindex.Checkpoint(checkpoint.path).get('node') == second.id
+
+    def test_modified_since_ignores_checkpoint(self, bulk):
+        project = ProjectFactory(is_public=True)
+        checkpoint = reindex.Checkpoint()
+        checkpoint.set('node', project.id)
+        reindex.Reindexer('test', checkpoint=checkpoint, workers=0).reindex(
+            ['node'], modified_since=project.date_modified
+        )
+        assert project._id in [action['_id'] for action in bulk]
+
+    def test_users_cannot_be_selected_by_modification_date(self):
+        UserFactory()
+        with pytest.raises(ValueError):
+            reindex.get_queryset('user', modified_since=mock.Mock())
+
+    def test_checkpoint_clear(self, tmpdir):
+        checkpoint = reindex.Checkpoint(str(tmpdir.join('checkpoint.json')))
+        checkpoint.start('test_v2', '2017-01-01T00:00:00')
+        assert reindex.Checkpoint(checkpoint.path).index == 'test_v2'
+        checkpoint.clear()
+        assert reindex.Checkpoint(checkpoint.path).index is None
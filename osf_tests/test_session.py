@@ -1,5 +1,10 @@
+import datetime as dt
+
+import mock
 import pytest
 
+from framework import sessions
+from framework.sessions import store as store_module
 from framework.sessions import utils
 from tests.base import DbTestCase
 from osf_tests.factories import SessionFactory, UserFactory
@@ -75,3 +80,73 @@ class SessionUtilsTestCase(DbTestCase):
         assert Session.find().count() == 1
         utils.remove_session(session)
         assert Session.find().count() == 0
+
+
+@pytest.fixture(params=['database', 'cache'])
+def store(request):
+    with mock.patch.object(store_module.settings, 'SESSION_STORE', request.param):
+        yield store_module.get_store()
+
+
+@pytest.mark.django_db
+class TestSessionStore:
+
+    def test_save_and_load(self, store):
+        session = Session(data={'auth_user_id': 'abc12'})
+        store.save(session)
+        loaded = store.load(session._id)
+        assert loaded.data == {'auth_user_id': 'abc12'}
+        assert loaded.date_created is not None
+        assert store.load('nope') is None
+
+    def test_unchanged_sessions_are_not_saved(self, store):
+        session = Session(data={'auth_user_id': 'abc12'})
+        assert store.needs_save(session)
+        store.save(session)
+        loaded = store.load(session._id)
+        assert not store.needs_save(loaded)
+        loaded.data['visited'] = ['page']
+        assert store.needs_save(loaded)
+
+    def test_unchanged_sessions_are_touched(self, store):
+        session = Session(data={'auth_user_id': 'abc12'})
+        store.save(session)
+        loaded = store.load(session._id)
+        loaded.date_modified -= dt.timedelta(seconds=store_module.settings.SESSION_TOUCH_INTERVAL)
+        assert store.needs_save(loaded)
+
+    def test_delete_for_user(self, store):
+        user = UserFactory()
+        first, second = SessionFactory.build(user=user), SessionFactory.build(user=user)
+        other = SessionFactory.build(user=UserFactory())
+        for session in (first, second, other):
+            store.save(session)
+        assert store.get_latest_for_user(user._id)._id == second._id
+
+        store.delete_for_user(user._id)
+        assert store.load(first._id) is None
+        assert store.load(second._id) is None
+        assert store.get_latest_for_user(user._id) is None
+        assert store.load(other._id) is not None
+
+        # Logging in again after the sessions were removed works
+        store.save(first)
+        assert store.load(first._id) is not None
+
+    def test_delete(self, store):
+        session = Session()
+        store.save(session)
+        store.delete(session)
+        assert store.load(session._id) is None
+
+    def test_after_request_skips_unchanged_sessions(self, store, request_context):
+        session = Session(data={'auth_user_id': 'abc12'})
+        store.save(session)
+        sessions.set_session(store.load(session._id))
+        with mock.patch.object(store_module.DatabaseSessionStore, 'save') as mock_db_save, \
+                mock.patch.object(store_module.CacheSessionStore, 'save') as mock_cache_save:
+            sessions.after_request(mock.Mock(headers={}))
+            assert not mock_db_save.called and not mock_cache_save.called
+            sessions.session.data['auth_user_fullname'] = 'Freddie Mercury'
+            sessions.after_request(mock.Mock(headers={}))
+            assert mock_db_save.called or mock_cache_save.called
@@ -0,0 +1,102 @@
+import datetime
+
+import mock
+import pytest
+from django.utils import timezone
+
+from osf.models import ShareOutboxItem
+from osf_tests.factories import ProjectFactory, RegistrationFactory
+from tests.share_server import ShareServer
+from website import settings
+from website.share import tasks
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def share():
+    with ShareServer() as server, \
+            mock.patch.object(settings, 'SHARE_URL', server.url), \
+            mock.patch.object(settings, 'SHARE_API_TOKEN', 'Token'):
+        yield server
+
+
+def enqueue(*nodes):
+    for node in nodes:
+        ShareOutboxItem.enqueue(ShareOutboxItem.NODE, node.id)
+
+
+class TestShareOutbox:
+
+    def test_updates_are_coalesced(self, share):
+        project = ProjectFactory(is_public=True)
+        enqueue(project, project, project)
+        assert ShareOutboxItem.objects.count() == 1
+
+        tasks.flush_share_outbox()
+
+        assert len(share.documents) == 1
+        path, token, graph = share.documents[0]
+        assert (path, token) == ('/api/normalizeddata/', 'Token')
+        assert [work['uri'] for work in share.works('workidentifier')] == ['{}{}/'.format(settings.DOMAIN, project._id)]
+        assert not ShareOutboxItem.objects.exists()
+
+    @mock.patch.object(settings, 'SHARE_OUTBOX_BATCH_SIZE', 2)
+    def test_objects_are_sent_in_batches(self, share):
+        projects = [ProjectFactory(is_public=True) for _ in range(5)]
+        enqueue(*projects)
+
+        tasks.flush_share_outbox()
+
+        assert sorted(len(graph) for path, token, graph in share.documents) == [2, 4, 4]
+        assert len(share.works('project')) == 5
+
+    def test_registrations_are_sent_to_v2(self, share):
+        registration = RegistrationFactory(is_public=True)
+        # Saving the registration and its project marked both
+        ShareOutboxItem.objects.all().delete()
+        enqueue(registration)
+
+        tasks.flush_share_outbox()
+
+        assert [path for path, token, graph in share.documents] == ['/api/v2/normalizeddata/']
+        assert len(share.works('registration')) == 1
+
+    def test_failed_documents_are_retried_later(self, share):
+        project = ProjectFactory(is_public=True)
+        enqueue(project)
+        share.failing = True
+
+        tasks.flush_share_outbox()
+
+        item = ShareOutboxItem.objects.get()
+        assert item.attempts == 1
+        assert item.next_attempt > timezone.now()
+
+        share.failing = False
+        tasks.flush_share_outbox()
+        assert share.documents == []
+
+        ShareOutboxItem.objects.update(next_attempt=timezone.now() - datetime.timedelta(seconds=1))
+        tasks.flush_share_outbox()
+        assert len(share.works('project')) == 1
+        assert not ShareOutboxItem.objects.exists()
+
+    @mock.patch.object(settings, 'SHARE_OUTBOX_POOL_SIZE', 0)
+    def test_updates_during_a_flush_are_kept(self, share):
+        project = ProjectFactory(is_public=True)
+        enqueue(project)
+
+        def send_document(document):
+            enqueue(project)
+            return True
+
+        with mock.patch.object(tasks, 'send_document', send_document):
+            tasks.flush_share_outbox()
+        assert ShareOutboxItem.objects.filter(object_id=project.id).exists()
+
+    def test_deleted_objects_are_dropped(self, share):
+        ShareOutboxItem.enqueue(ShareOutboxItem.PREPRINT, 0)
+        tasks.flush_share_outbox()
+        assert share.documents == []
+        assert not ShareOutboxItem.objects.exists()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Compare the time and number of queries taken to copy the logs of a synthetic node with
+``NodeLog.clone_node_log`` (one load and save per log) and ``NodeLog.clone_node_logs``
+(chunked bulk inserts), as forks and registrations do. Everything is rolled back afterwards.
+
+    python -m scripts.benchmark_clone_logs [--logs 50000] [--chunk-size 1000]
+"""
+import argparse
+import logging
+import time
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from website.app import init_app
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class Rollback(Exception):
+    pass
+
+
+def build_node(logs):
+    from osf.models import NodeLog
+    from osf_tests.factories import ProjectFactory
+
+    node = ProjectFactory()
+    NodeLog.objects.bulk_create([
+        NodeLog(node=node, original_node=node, user=node.creator, action=NodeLog.TAG_ADDED, params={'tag': str(i)})
+        for i in range(logs)
+    ], batch_size=1000)
+    return node
+
+
+def measure(label, clone):
+    from osf_tests.factories import ProjectFactory
+
+    target = ProjectFactory()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.time()
+        clone(target)
+        elapsed = time.time() - start
+    logger.info('{}: {:.2f}s, {} queries'.format(label, elapsed, len(queries)))
+
+
+def main(logs, chunk_size):
+    from osf.models import NodeLog
+
+    try:
+        with transaction.atomic():
+            source = build_node(logs)
+            logger.info('Copying {} logs'.format(source.logs.count()))
+
+            def per_log(target):
+                for log in source.logs.all():
+                    log.clone_node_log(target._id)
+
+            measure('Per log', per_log)
+            measure('Bulk', lambda target: NodeLog.clone_node_logs(source, target, chunk_size=chunk_size))
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logs', type=int, default=50000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+    init_app(routes=False)
+    main(args.logs, args.chunk_size)
@@ -1,32 +1,35 @@
 # -*- coding: utf-8 -*-
+"""Remove sessions that have not been saved for a month from the session store
+(framework.sessions.store). Run nightly; run by hand with:
+
+    python -m scripts.clear_sessions [--dry]
+"""
 from __future__ import absolute_import
 
 import logging
-import datetime
+import sys
 
 from dateutil import relativedelta
 from django.utils import timezone
 
-from website.models import Session
+from framework.celery_tasks import app as celery_app
+from framework.sessions.store import get_store
+from website.app import init_app
+
+from scripts import utils as scripts_utils
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.WARN)
+logging.basicConfig(level=logging.INFO)
 
 
 def clear_sessions(max_date, dry_run=False):
     """Remove all sessions last modified before `max_date`.
     """
-    session_collection = Session._storage[0].store
-    query = {'date_modified': {'$lt': max_date}}
     if dry_run:
         logger.warn('Dry run mode')
-    logger.warn(
-        'Removing {0} stale sessions'.format(
-            session_collection.find(query).count()
-        )
-    )
-    if not dry_run:
-        session_collection.remove(query)
+    removed = get_store().clear_expired(max_date, dry_run=dry_run)
+    logger.warn('Removed {0} stale sessions'.format(removed))
+    return removed
 
 
 def clear_sessions_relative(months=1, dry_run=False):
@@ -35,4 +38,20 @@ def clear_sessions_relative(months=1, dry_run=False):
     logger.warn('Clearing sessions older than {0} months'.format(months))
     now = timezone.now()
     delta = relativedelta.relativedelta(months=months)
-    clear_sessions(now - delta, dry_run=dry_run)
+    return clear_sessions(now - delta, dry_run=dry_run)
+
+
+@celery_app.task(name='scripts.clear_sessions')
+def run_main(months=1, dry_run=True):
+    init_app(routes=False)
+    if not dry_run:
+        scripts_utils.add_file_logger(logger, __file__)
+    clear_sessions_relative(months=months, dry_run=dry_run)
+
+
+if __name__ == '__main__':
+    dry_run = '--dry' in sys.argv
+    init_app(routes=False)
+    if not dry_run:
+        scripts_utils.add_file_logger(logger, __file__)
+    clear_sessions_relative(dry_run=dry_run)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Store the materialized paths and depths of OsfStorage files and folders, which used to be
+computed from the folder tree on every access, or check stored ones against the tree.
+
+    python -m scripts.osfstorage.backfill_materialized_paths [--dry] [--verify]
+
+Runs a batch of OsfStorage roots at a time, each batch in its own transaction, so it can be
+stopped and rerun. ``--verify`` logs every file or folder whose stored path or depth is wrong
+and exits with status 1 if there are any.
+"""
+import logging
+import sys
+
+from django.db import connection, transaction
+
+from website.app import init_app
+from scripts import utils as script_utils
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+FILE_TYPE = 'osf.osfstoragefile'
+FOLDER_TYPE = 'osf.osfstoragefolder'
+
+# Paths and depths of everything under the roots, as OsfStorageFileNode._compute_materialized_path
+TREE_SQL = """
+    WITH RECURSIVE tree(id, path, depth) AS (
+      SELECT
+        id,
+        coalesce(name, '') || CASE WHEN type = %(folder)s THEN '/' ELSE '' END,
+        0
+      FROM osf_basefilenode
+      WHERE id IN %(roots)s
+      UNION ALL
+      SELECT
+        T.id,
+        R.path || coalesce(T.name, '') || CASE WHEN T.type = %(folder)s THEN '/' ELSE '' END,
+        R.depth + 1
+      FROM tree AS R
+        JOIN osf_basefilenode AS T ON T.parent_id = R.id
+      WHERE T.type IN (%(file)s, %(folder)s)
+    )
+"""
+
+MISMATCHED_SQL = TREE_SQL + """
+    SELECT F.id, F._materialized_path, tree.path, F.depth, tree.depth
+    FROM tree
+      JOIN osf_basefilenode AS F ON F.id = tree.id
+    WHERE F._materialized_path IS DISTINCT FROM tree.path OR F.depth IS DISTINCT FROM tree.depth
+"""
+
+UPDATE_SQL = TREE_SQL + """
+    UPDATE osf_basefilenode AS F
+    SET _materialized_path = tree.path, depth = tree.depth
+    FROM tree
+    WHERE F.id = tree.id
+    AND (F._materialized_path IS DISTINCT FROM tree.path OR F.depth IS DISTINCT FROM tree.depth)
+"""
+
+
+def iter_root_batches(batch_size=BATCH_SIZE):
+    """Yield tuples of up to ``batch_size`` OsfStorage root folder pks, in pk order."""
+    after = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT id FROM osf_basefilenode WHERE type = %s AND parent_id IS NULL AND id > %s ORDER BY id LIMIT %s',
+                [FOLDER_TYPE, after, batch_size]
+            )
+            roots = tuple(row[0] for row in cursor.fetchall())
+        if not roots:
+            return
+        yield roots
+        after = roots[-1]
+
+
+def _params(roots):
+    return {'roots': roots, 'file': FILE_TYPE, 'folder': FOLDER_TYPE}
+
+
+def find_mismatched(roots):
+    """Return (pk, stored path, path, stored depth, depth) for each file or folder under
+    ``roots`` whose stored path or depth is wrong.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(MISMATCHED_SQL, _params(roots))
+        return cursor.fetchall()
+
+
+def backfill(batch_size=BATCH_SIZE, dry_run=False):
+    """Store the paths and depths of every OsfStorage file and folder that has a wrong one.
+
+    :return int: Number of files and folders updated, or that would be with ``dry_run``
+    """
+    updated = 0
+    for roots in iter_root_batches(batch_size):
+        if dry_run:
+            updated += len(find_mismatched(roots))
+            continue
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(UPDATE_SQL, _params(roots))
+                updated += cursor.rowcount
+        logger.info('Updated {} files and folders, up to root {}'.format(updated, roots[-1]))
+    return updated
+
+
+def verify(batch_size=BATCH_SIZE):
+    """Log each OsfStorage file or folder whose stored path or depth is wrong.
+
+    :return int: Number of them
+    """
+    mismatched = 0
+    for roots in iter_root_batches(batch_size):
+        for pk, stored_path, path, stored_depth, depth in find_mismatched(roots):
+            logger.warning('File node {} has path {!r} at depth {}, expected {!r} at depth {}'.format(
+                pk, stored_path, stored_depth, path, depth
+            ))
+            mismatched += 1
+    logger.info('{} files and folders have wrong paths'.format(mismatched))
+    return mismatched
+
+
+if __name__ == '__main__':
+    dry_run = '--dry' in sys.argv
+    init_app(routes=False)
+    if '--verify' in sys.argv:
+        sys.exit(1 if verify() else 0)
+    if not dry_run:
+        script_utils.add_file_logger(logger, __file__)
+    logger.info('{} {} files and folders'.format('Would update' if dry_run else 'Updated', backfill(dry_run=dry_run)))
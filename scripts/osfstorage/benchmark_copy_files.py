@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Compare the time and number of queries taken to copy a synthetic OsfStorage tree with
+``website.files.utils.copy_files`` (one clone and save per file) and
+``addons.osfstorage.utils.copy_files`` (set-based). Everything is rolled back afterwards.
+
+    python -m scripts.osfstorage.benchmark_copy_files [--folders 100] [--files 100]
+
+builds a tree of ``--folders`` folders, each holding ``--files`` files with one version.
+"""
+import argparse
+import logging
+import time
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from website.app import init_app
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class Rollback(Exception):
+    pass
+
+
+def build_tree(root, folders, files):
+    from osf.models import FileVersion
+
+    source = root.append_folder('benchmark')
+    version = FileVersion.objects.create(identifier='1')
+    for i in range(folders):
+        folder = source.append_folder('folder {}'.format(i))
+        for j in range(files):
+            folder.append_file('file {}'.format(j), save=True).versions.add(version)
+    return source
+
+
+def measure(label, copy, *args, **kwargs):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.time()
+        copy(*args, **kwargs)
+        elapsed = time.time() - start
+    logger.info('{}: {:.2f}s, {} queries'.format(label, elapsed, len(queries)))
+
+
+def main(folders, files):
+    from addons.osfstorage import utils as osfstorage_utils
+    from osf_tests.factories import ProjectFactory
+    from website.files import utils as files_utils
+
+    try:
+        with transaction.atomic():
+            root = ProjectFactory().get_addon('osfstorage').get_root()
+            source = build_tree(root, folders, files)
+            logger.info('Copying {} folders and {} files'.format(folders + 1, folders * files))
+            measure('Per file', files_utils.copy_files, source, root.node, root, name='per file')
+            measure('Set-based', osfstorage_utils.copy_files, source, root.node, root, name='set based')
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--folders', type=int, default=100)
+    parser.add_argument('--files', type=int, default=100)
+    args = parser.parse_args()
+    init_app(routes=False)
+    main(args.folders, args.files)
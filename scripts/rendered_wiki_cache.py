@@ -0,0 +1,75 @@
+"""Maintain the cache of rendered wiki pages (addons.wiki.models.RenderedWikiPage).
+
+Run nightly, evicts renderings that have not been read for
+``addons.wiki.settings.RENDER_CACHE_MAX_AGE``. Run by hand with ``--backfill`` to
+render the current version of every wiki page that is not cached yet:
+
+    python -m scripts.rendered_wiki_cache --backfill [--dry]
+"""
+import logging
+import sys
+
+from django.db import transaction
+
+from framework.celery_tasks import app as celery_app
+from website.app import init_app
+
+from scripts import utils as scripts_utils
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+BATCH_SIZE = 500
+
+
+def evict(dry_run=True):
+    from addons.wiki.models import RenderedWikiPage
+
+    with transaction.atomic():
+        deleted = RenderedWikiPage.evict()
+        logger.info('Evicted {} rendered wiki pages'.format(deleted))
+        if dry_run:
+            transaction.set_rollback(True)
+
+
+def backfill(dry_run=True):
+    from addons.wiki.models import NodeWikiPage
+    from osf.models import AbstractNode
+
+    nodes = AbstractNode.objects.exclude(wiki_pages_current={}).order_by('id')
+    last_id, checked = 0, 0
+    while True:
+        batch = list(nodes.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        page_ids = [page_id for node in batch for page_id in node.wiki_pages_current.values()]
+        pages = NodeWikiPage.objects.filter(guids___id__in=page_ids).select_related('node')
+        with transaction.atomic():
+            for page in pages:
+                # Only renders pages whose current content is not cached yet
+                page.get_rendered(page.node)
+                checked += 1
+            if dry_run:
+                transaction.set_rollback(True)
+        logger.info('Checked {} wiki pages, up to node {}'.format(checked, last_id))
+    logger.info('Backfill complete: {} wiki pages checked'.format(checked))
+
+
+@celery_app.task(name='scripts.rendered_wiki_cache')
+def run_main(dry_run=True):
+    init_app(routes=False)
+    if not dry_run:
+        scripts_utils.add_file_logger(logger, __file__)
+    evict(dry_run=dry_run)
+
+
+if __name__ == '__main__':
+    dry_run = '--dry' in sys.argv
+    init_app(routes=False)
+    if not dry_run:
+        scripts_utils.add_file_logger(logger, __file__)
+    if '--backfill' in sys.argv:
+        backfill(dry_run=dry_run)
+    else:
+        evict(dry_run=dry_run)
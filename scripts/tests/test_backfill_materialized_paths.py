@@ -0,0 +1,32 @@
+from nose.tools import *  # noqa
+
+from addons.osfstorage.models import OsfStorageFile
+from osf.models import BaseFileNode
+from osf_tests.factories import ProjectFactory
+from scripts.osfstorage.backfill_materialized_paths import backfill, verify
+from tests.base import OsfTestCase
+
+
+class TestBackfillMaterializedPaths(OsfTestCase):
+
+    def setUp(self):
+        super(TestBackfillMaterializedPaths, self).setUp()
+        root = ProjectFactory().get_addon('osfstorage').get_root()
+        self.file = root.append_folder('Cloud').append_file('Carp')
+        self.other = ProjectFactory().get_addon('osfstorage').get_root().append_file('Tuna')
+        # As saved before paths were stored
+        BaseFileNode.objects.filter(type__in=['osf.osfstoragefile', 'osf.osfstoragefolder']).update(
+            _materialized_path='', depth=None
+        )
+
+    def test_verify(self):
+        assert_equal(verify(), 5)
+
+    def test_backfill(self):
+        assert_equal(backfill(dry_run=True), 5)
+        assert_equal(verify(), 5)
+        assert_equal(backfill(batch_size=1), 5)
+        assert_equal(verify(), 0)
+        assert_equal(backfill(), 0)
+        carp = OsfStorageFile.load(self.file._id)
+        assert_equal((carp._materialized_path, carp.depth), ('/Cloud/Carp', 2))
@@ -1,13 +1,14 @@
+import mock
+from dateutil import relativedelta
 from django.utils import timezone
 from nose.tools import *  # noqa
 from tests.base import OsfTestCase
 
-class TestClearSessions(OsfTestCase):
+from osf.models import Session
+from scripts.clear_sessions import clear_sessions, clear_sessions_relative
+
 
-    @classmethod
-    def setUpClass(cls):
-        super(TestClearSessions, cls).setUpClass()
-        cls.session_collection = Session._storage[0].store
+class TestClearSessions(OsfTestCase):
 
     def setUp(self):
         super(TestClearSessions, self).setUp()
@@ -20,33 +21,24 @@ class TestClearSessions(OsfTestCase):
         self.sessions = [Session() for _ in range(len(self.dates))]
         for session in self.sessions:
             session.save()
-        # Manually set `date_created` fields in MongoDB.
-        for idx, date in enumerate(self.dates):
-            self.session_collection.update(
-                {'_id': self.sessions[idx]._id},
-                {'$set': {'date_modified': date}},
-            )
-        Session._clear_caches()
-        assert_equal(
-            Session.find().count(),
-            3,
-        )
-
-    def tearDown(self):
-        super(TestClearSessions, self).tearDown()
-        Session.remove()
+        # Bypass auto_now to backdate `date_modified`
+        for session, date in zip(self.sessions, self.dates):
+            Session.objects.filter(pk=session.pk).update(date_modified=date)
+        assert_equal(Session.objects.count(), 3)
 
     def test_clear_sessions(self):
         clear_sessions(self.dates[1])
-        assert_equal(
-            Session.find().count(),
-            2,
-        )
+        assert_equal(Session.objects.count(), 2)
 
     def test_clear_sessions_relative(self):
         clear_sessions_relative(3)
-        assert_equal(
-            Session.find().count(),
-            2,
-        )
+        assert_equal(Session.objects.count(), 2)
+
+    def test_clear_sessions_dry_run(self):
+        assert_equal(clear_sessions_relative(1, dry_run=True), 2)
+        assert_equal(Session.objects.count(), 3)
 
+    @mock.patch('framework.sessions.store.settings.SESSION_SWEEP_BATCH_SIZE', 1)
+    def test_clear_sessions_in_batches(self):
+        assert_equal(clear_sessions_relative(1), 2)
+        assert_equal(list(Session.objects.values_list('pk', flat=True)), [self.sessions[0].pk])
@@ -274,8 +274,11 @@ def elasticsearch(ctx):
         print('Your system is not recognized, you will have to start elasticsearch manually')
 
 @task
-def migrate_search(ctx, delete=False, index=settings.ELASTIC_INDEX):
-    """Migrate the search-enabled models."""
+def migrate_search(ctx, delete=False, index=settings.ELASTIC_INDEX, resume=False, workers=None, chunk_size=None):
+    """Migrate the search-enabled models.
+
+    Pass --resume to continue an interrupted migration from its checkpoint.
+    """
     from website.app import init_app
     init_app(routes=False, set_backends=False)
     from website.search_migration.migrate import migrate
@@ -286,7 +289,11 @@ def migrate_search(ctx, delete=False, index=settings.ELASTIC_INDEX):
     for logger in SILENT_LOGGERS:
         logging.getLogger(logger).setLevel(logging.ERROR)
 
-    migrate(delete, index=index)
+    migrate(
+        delete, index=index, resume=resume,
+        workers=int(workers) if workers is not None else None,
+        chunk_size=int(chunk_size) if chunk_size is not None else None,
+    )
 
 
 @task
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""A local stand-in for the Akismet API, so that spam checks can be tested without the
+network. Point ``settings.AKISMET_API_URL`` at ``server.url``:
+
+    with AkismetServer() as server, mock.patch.object(settings, 'AKISMET_API_URL', server.url):
+        ...
+
+Content containing ``AkismetServer.SPAM`` is judged spam; everything else is ham. Requests
+are recorded in ``server.requests`` as ``(endpoint, form data)`` pairs. While ``server.failing``
+is set, every request gets an error response.
+"""
+import urlparse
+
+from tests.stub_server import StubHandler, StubServer
+
+
+class AkismetHandler(StubHandler):
+
+    def do_POST(self):
+        server = self.server.stub
+        data = {key: values[0] for key, values in urlparse.parse_qs(self.read_body()).items()}
+        endpoint = self.path.rsplit('/', 1)[-1]
+        server.requests.append((endpoint, data))
+
+        if server.failing:
+            return self.respond(500, 'Internal Server Error')
+        if endpoint == 'verify-key':
+            return self.respond(200, 'valid')
+        if endpoint == 'comment-check':
+            is_spam = AkismetServer.SPAM in data.get('comment_content', '')
+            return self.respond(200, 'true' if is_spam else 'false', {'X-akismet-pro-tip': 'discard'} if is_spam else {})
+        return self.respond(200, 'Thanks for making the web a better place.')
+
+
+class AkismetServer(StubServer):
+
+    handler_class = AkismetHandler
+    SPAM = 'viagra-test-123'
+
+    def __init__(self):
+        super(AkismetServer, self).__init__()
+        self.requests = []
+
+    def comment_checks(self):
+        return [data for endpoint, data in self.requests if endpoint == 'comment-check']
@@ -20,6 +20,7 @@ from addons.wiki.models import NodeWikiPage
 from django.test import TestCase as DjangoTestCase
 from faker import Factory
 from framework.auth import User
+from framework.auth import cas
 from framework.auth.core import Auth
 from framework.celery_tasks.handlers import celery_before_request
 from framework.django.handlers import handlers as django_handlers
@@ -126,6 +127,10 @@ class DbTestCase(unittest.TestCase):
         cls._original_bcrypt_log_rounds = settings.BCRYPT_LOG_ROUNDS
         settings.BCRYPT_LOG_ROUNDS = 4
 
+        # Page counts are flushed by the tests, not written from another connection
+        cls._original_page_counter_flush_thread = settings.PAGE_COUNTER_FLUSH_THREAD
+        settings.PAGE_COUNTER_FLUSH_THREAD = False
+
         # teardown_database(database=database_proxy._get_current_object())
 
         # TODO: With `database` as a `LocalProxy`, we should be able to simply
@@ -144,6 +149,7 @@ class DbTestCase(unittest.TestCase):
         # settings.DB_NAME = cls._original_db_name
         settings.ENABLE_EMAIL_SUBSCRIPTIONS = cls._original_enable_email_subscriptions
         settings.BCRYPT_LOG_ROUNDS = cls._original_bcrypt_log_rounds
+        settings.PAGE_COUNTER_FLUSH_THREAD = cls._original_page_counter_flush_thread
 
 
 class AppTestCase(unittest.TestCase):
@@ -265,6 +271,7 @@ class ApiTestCase(DbTestCase, ApiAppTestCase, SearchTestCase, MockRequestTestCas
     def setUp(self):
         super(ApiTestCase, self).setUp()
         settings.USE_EMAIL = False
+        cas.profile_cache.clear()
 
 class ApiAddonTestCase(ApiTestCase):
     """Base `TestCase` for tests that require interaction with addons.
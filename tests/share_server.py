@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""A local stand-in for SHARE's NormalizedData endpoints, so that SHARE updates can be tested
+without the network. Point ``settings.SHARE_URL`` at ``server.url``:
+
+    with ShareServer() as server, mock.patch.object(settings, 'SHARE_URL', server.url):
+        ...
+
+Accepted documents are recorded in ``server.documents`` as ``(path, token, @graph)``. While
+``server.failing`` is set, every request gets an error response.
+"""
+import json
+
+from tests.stub_server import StubHandler, StubServer
+
+
+class ShareHandler(StubHandler):
+
+    def do_POST(self):
+        server = self.server.stub
+        body = json.loads(self.read_body())
+        if server.failing:
+            return self.respond_json(503, {'errors': [{'detail': 'Unavailable'}]})
+        token = self.headers.getheader('authorization', '').replace('Bearer ', '', 1)
+        server.documents.append((self.path, token, body['data']['attributes']['data']['@graph']))
+        return self.respond_json(202, {'data': {'type': 'NormalizedData', 'id': str(len(server.documents))}})
+
+    def respond_json(self, status, data):
+        self.respond(status, json.dumps(data), {'Content-Type': 'application/vnd.api+json'})
+
+
+class ShareServer(StubServer):
+
+    handler_class = ShareHandler
+
+    def __init__(self):
+        super(ShareServer, self).__init__()
+        self.documents = []
+        # SHARE_URL ends with a slash
+        self.url += '/'
+
+    def works(self, type_):
+        """Return the serialized graph nodes of ``type_`` in all documents, in the order they were received."""
+        return [node for path, token, graph in self.documents for node in graph if node['@type'] == type_]
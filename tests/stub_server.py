@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Base classes for local HTTP stand-ins of external services, so that code talking to them can
+be tested without the network. A stand-in runs in a thread for the duration of a ``with`` block:
+
+    with SomeServer() as server, mock.patch.object(settings, 'SOME_URL', server.url):
+        ...
+
+Subclasses set ``handler_class`` to a ``StubHandler`` that implements the service's endpoints;
+handlers reach the stand-in as ``self.server.stub``. While ``server.failing`` is set, handlers
+are expected to answer with an error response.
+"""
+import threading
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.getheader('content-length') or 0))
+
+    def respond(self, status, body='', headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(object):
+
+    handler_class = StubHandler
+
+    def __init__(self):
+        self.failing = False
+        self._server = HTTPServer(('127.0.0.1', 0), self.handler_class)
+        self._server.stub = self
+        self.url = 'http://127.0.0.1:{}'.format(self._server.server_port)
+
+    def __enter__(self):
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -399,6 +399,17 @@ class TestFileMoved(NotificationTestCase):
         self.event.perform()
         assert_equal(3, mock_store.call_count)
 
+    @mock.patch('website.notifications.tasks.notify_file_event')
+    def test_perform_notifies_from_task(self, mock_notify):
+        self.event.perform()
+        mock_notify.assert_called_once_with(
+            action='addon_file_moved',
+            user_id=self.user_2._id,
+            node_id=self.private_node._id,
+            timestamp=self.event.timestamp.isoformat(),
+            payload=self.event.payload,
+        )
+
     @mock.patch('website.notifications.emails.store_emails')
     def test_remove_user_sent_once(self, mock_store):
         # Move Event: Tests removed user is removed once. Regression
@@ -4,6 +4,8 @@ import mock
 import pytz
 from babel import dates, Locale
 from schema import Schema, And, Use, Or
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from osf.modm_compat import Q
@@ -13,6 +15,7 @@ from nose.tools import *  # noqa PEP8 asserts
 from framework.auth import Auth
 from osf.models import Node, Comment, NotificationDigest, NotificationSubscription, Guid, OSFUser
 
+from website.notifications import tasks
 from website.notifications.tasks import get_users_emails, send_users_email, group_by_node, remove_notifications
 from website.notifications import constants
 from website.notifications import emails
@@ -1232,6 +1235,40 @@ class TestCompileSubscriptions(NotificationTestCase):
         subs = emails.compile_subscriptions(node5, 'file_updated')
         assert_equal(subs, {'email_transactional': [], 'email_digest': [self.user_1._id], 'none': []})
 
+    def test_event_subscription_overrides_node(self):
+        self.shared_sub.email_transactional.add(self.user_1, self.user_2)
+        event_sub = factories.NotificationSubscriptionFactory(
+            _id=self.shared_node._id + '_xyz42_file_updated',
+            node=self.shared_node,
+            event_name='xyz42_file_updated'
+        )
+        event_sub.none.add(self.user_2)
+        subs = emails.compile_subscriptions(self.shared_node, 'file_updated', 'xyz42_file_updated')
+        assert_equal(subs, {'email_transactional': [self.user_1._id], 'email_digest': [], 'none': [self.user_2._id]})
+
+    def test_admin_on_parent_can_read_child(self):
+        user = factories.UserFactory()
+        self.base_project.add_contributor(user, permissions=['read', 'write', 'admin'])
+        self.private_sub.email_digest.add(user)
+        subs = emails.compile_subscriptions(self.private_node, 'file_updated')
+        assert_equal(subs, {'email_transactional': [], 'email_digest': [user._id], 'none': []})
+
+    def test_query_count_does_not_grow_with_subscribers(self):
+        node = factories.NodeFactory(parent=self.shared_node)
+        self.base_sub.email_transactional.add(self.user_1)
+        with CaptureQueriesContext(connection) as few:
+            emails.compile_subscriptions(node, 'file_updated')
+        for _ in range(3):
+            user = factories.UserFactory()
+            self.base_project.add_contributor(user, permissions=['read', 'write', 'admin'])
+            self.base_sub.email_transactional.add(user)
+            self.shared_sub.email_digest.add(user)
+        with CaptureQueriesContext(connection) as many:
+            subs = emails.compile_subscriptions(node, 'file_updated')
+        assert_equal(len(subs['email_transactional']), 1)
+        assert_equal(len(subs['email_digest']), 3)
+        assert_equal(len(many), len(few))
+
 
 class TestMoveSubscription(NotificationTestCase):
     def setUp(self):
@@ -1555,6 +1592,26 @@ class TestSendEmails(NotificationTestCase):
         node_lineage = emails.get_node_lineage(self.node)
         assert_equal(node_lineage, [self.project._id, self.node._id])
 
+    @mock.patch('website.mails.render_message', return_value='message')
+    def test_store_emails_renders_once_per_timezone(self, mock_render):
+        recipients = [factories.UserFactory(timezone='Etc/UTC') for _ in range(3)]
+        recipients.append(factories.UserFactory(timezone='America/New_York'))
+        recipient_ids = [recipient._id for recipient in recipients] + [self.user._id]
+        emails.store_emails(recipient_ids, 'email_transactional', 'comments', self.user, self.node, timezone.now())
+        assert_equal(mock_render.call_count, 2)
+        digests = NotificationDigest.objects.filter(event='comments')
+        assert_equal(
+            sorted(digests.values_list('user_id', flat=True)),
+            sorted(recipient.id for recipient in recipients)
+        )
+        assert_true(all(digest.node_lineage == [self.project._id, self.node._id] for digest in digests))
+
+    @mock.patch('website.notifications.emails.notify')
+    def test_event_notifies_after_request(self, mock_notify):
+        timestamp = timezone.now()
+        tasks.notify('comments', self.user._id, self.node._id, timestamp.isoformat(), url='/')
+        mock_notify.assert_called_once_with('comments', self.user, self.node, timestamp, url='/')
+
     def test_localize_timestamp(self):
         timestamp = timezone.now()
         self.user.timezone = 'America/New_York'
@@ -1743,7 +1800,42 @@ class TestSendDigest(OsfTestCase):
         assert_equal(kwargs['name'], user.fullname)
         message = group_by_node(user_groups[last_user_index]['info'])
         assert_equal(kwargs['message'], message)
-        assert_equal(kwargs['callback'], remove_notifications(email_notification_ids=email_notification_ids))
+        assert_false(NotificationDigest.objects.filter(_id__in=email_notification_ids).exists())
+
+    @mock.patch('website.notifications.tasks.settings.NOTIFICATION_DIGEST_CHUNK_SIZE', 1)
+    @mock.patch('website.mails.send_mail')
+    def test_send_users_email_in_chunks(self, mock_send_mail):
+        send_type = 'email_transactional'
+        for _ in range(3):
+            factories.NotificationDigestFactory(
+                send_type=send_type,
+                event='comment_replies',
+                timestamp=timezone.now(),
+                message='Hello',
+                node_lineage=[factories.ProjectFactory()._id]
+            )
+        assert_equal([len(chunk) for chunk in tasks.iter_users_emails(send_type, 2)], [2, 1])
+        send_users_email(send_type)
+        assert_equal(mock_send_mail.call_count, 3)
+        assert_false(NotificationDigest.objects.filter(send_type=send_type).exists())
+
+    @mock.patch('website.mails.send_mail')
+    def test_send_users_email_keeps_digests_that_failed(self, mock_send_mail):
+        send_type = 'email_transactional'
+        d = factories.NotificationDigestFactory(
+            send_type=send_type,
+            event='comment_replies',
+            timestamp=timezone.now(),
+            message='Hello',
+            node_lineage=[factories.ProjectFactory()._id]
+        )
+        mock_send_mail.side_effect = IOError
+        send_users_email(send_type)
+        assert_true(NotificationDigest.objects.filter(_id=d._id).exists())
+        # The next run picks them up again
+        mock_send_mail.side_effect = None
+        send_users_email(send_type)
+        assert_false(NotificationDigest.objects.filter(_id=d._id).exists())
 
     def test_remove_sent_digest_notifications(self):
         d = factories.NotificationDigestFactory(
@@ -1,15 +1,22 @@
 from __future__ import absolute_import
-from datetime import datetime
+from datetime import datetime, timedelta
 
+import mock
+from django.core.cache import cache
 from django.utils import timezone
 from nose.tools import *  # noqa PEP8 asserts
 from modularodm.exceptions import ValidationError
 
 from framework.auth import Auth
 
+from osf.models import AbstractNode, spam
+from tests.akismet_server import AkismetServer
 from tests.base import OsfTestCase
-from osf_tests.factories import UserFactory, CommentFactory
+from osf_tests.factories import UserFactory, CommentFactory, ProjectFactory
+from website import settings
 from website.project.spam.model import SpamStatus
+from website.project.tasks import check_node_spam
+from website.util.akismet import AkismetClientError
 
 
 class TestSpamMixin(OsfTestCase):
@@ -135,3 +142,90 @@ class TestSpamMixin(OsfTestCase):
         self.comment.reports[self.comment.user._id] = {'foo': 'bar'}
         with assert_raises(ValidationError):
             self.comment.save()
+
+
+class TestSpamCheck(OsfTestCase):
+
+    HEADERS = {'Remote-Addr': '127.0.0.1', 'User-Agent': 'test'}
+
+    def setUp(self):
+        super(TestSpamCheck, self).setUp()
+        self.akismet = AkismetServer().__enter__()
+        for name, value in (('AKISMET_API_URL', self.akismet.url), ('SPAM_CHECK_ENABLED', True)):
+            patcher = mock.patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        cache.clear()
+        spam._clients.clear()
+        self.user = UserFactory(date_confirmed=timezone.now())
+        self.project = ProjectFactory(is_public=True, description='About tardigrades')
+
+    def tearDown(self):
+        self.akismet.__exit__()
+        super(TestSpamCheck, self).tearDown()
+
+    def test_spam_is_flagged(self):
+        self.project.title = 'Buy {}'.format(AkismetServer.SPAM)
+        assert_true(self.project.check_spam(self.user, ['title'], self.HEADERS))
+        assert_equal(self.project.spam_status, SpamStatus.FLAGGED)
+        assert_equal(self.project.spam_pro_tip, 'discard')
+
+    def test_checked_content_is_not_sent_again(self):
+        other = ProjectFactory(is_public=True, description=self.project.description)
+        assert_false(self.project.check_spam(self.user, ['description'], self.HEADERS))
+        assert_false(other.check_spam(self.user, ['description'], self.HEADERS))
+        assert_equal(len(self.akismet.comment_checks()), 1)
+
+    def test_trusted_users_are_not_checked(self):
+        self.user.date_confirmed = timezone.now() - timedelta(days=30)
+        with mock.patch.object(settings, 'SPAM_CHECK_TRUSTED_USER_AGE', timedelta(days=7)):
+            assert_false(self.project.check_spam(self.user, ['description'], self.HEADERS))
+            self.user.add_system_tag('spam_flagged')
+            assert_false(self.project.check_spam(self.user, ['description'], self.HEADERS))
+        assert_equal(len(self.akismet.comment_checks()), 1)
+
+    def test_unreachable_akismet(self):
+        self.akismet.failing = True
+        with assert_raises(AkismetClientError):
+            self.project.check_spam(self.user, ['description'], self.HEADERS)
+
+    def test_task_saves_verdict(self):
+        self.project.title = 'Buy {}'.format(AkismetServer.SPAM)
+        self.project.save()
+        check_node_spam(self.project._id, self.user._id, ['title'], self.HEADERS)
+        self.project.reload()
+        assert_equal(self.project.spam_status, SpamStatus.FLAGGED)
+
+    def test_task_saves_only_the_verdict(self):
+        self.project.title = 'Buy {}'.format(AkismetServer.SPAM)
+        self.project.save()
+        # Edited after the check was queued
+        AbstractNode.objects.filter(id=self.project.id).update(description='Edited meanwhile')
+        with mock.patch.object(settings, 'SPAM_FLAGGED_MAKE_NODE_PRIVATE', True):
+            check_node_spam(self.project._id, self.user._id, ['title'], self.HEADERS)
+        self.project.reload()
+        assert_equal(self.project.spam_status, SpamStatus.FLAGGED)
+        assert_false(self.project.is_public)
+        assert_equal(self.project.description, 'Edited meanwhile')
+
+    @mock.patch('website.project.tasks.check_node_spam')
+    def test_saves_that_cannot_be_spam_are_not_queued(self, mock_check):
+        with mock.patch('osf.models.node.get_request_and_user_id', return_value=(mock.Mock(META={'REMOTE_ADDR': '127.0.0.1'}), self.user._id)):
+            self.project.category = 'data'
+            self.project.save()
+            assert_false(mock_check.called)
+
+            with mock.patch.object(settings, 'SPAM_CHECK_PUBLIC_ONLY', True):
+                private = ProjectFactory(is_public=False)
+                private.title = 'Buy {}'.format(AkismetServer.SPAM)
+                private.save()
+            assert_false(mock_check.called)
+
+            self.project.title = 'Buy {}'.format(AkismetServer.SPAM)
+            self.project.save()
+            assert_equal(mock_check.call_count, 1)
+
+        with mock.patch('osf.models.node.get_request_and_user_id', return_value=(mock.Mock(META={}), self.user._id)):
+            self.project.title = 'Buy more {}'.format(AkismetServer.SPAM)
+            self.project.save()
+        assert_equal(mock_check.call_count, 1)
@@ -25,6 +25,7 @@ from framework.mongo import handlers as mongo_handlers
 from framework.postcommit_tasks import handlers as postcommit_handlers
 from framework.sentry import sentry
 from framework.transactions import handlers as transaction_handlers
+from osf.utils import identity_map
 # Imports necessary to connect signals
 from website.archiver import listeners  # noqa
 from website.files.models import FileNode
@@ -67,6 +68,9 @@ def attach_handlers(app, settings):
     add_handlers(app, celery_task_handlers.handlers)
     add_handlers(app, transaction_handlers.handlers)
     add_handlers(app, postcommit_handlers.handlers)
+    # Attached after the postcommit handlers so that the identity map is already
+    # discarded (after_request handlers run in reverse) when postcommit tasks run
+    add_handlers(app, identity_map.handlers)
 
     # Attach handler for checking view-only link keys.
     # NOTE: This must be attached AFTER the TokuMX to avoid calling
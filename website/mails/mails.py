@@ -74,7 +74,7 @@ def render_message(tpl_name, **context):
 
 
 def send_mail(to_addr, mail, mimetype='plain', from_addr=None, mailer=None,
-            username=None, password=None, callback=None, **context):
+            username=None, password=None, callback=None, celery=True, **context):
     """Send an email from the OSF.
     Example: ::
 
@@ -86,6 +86,7 @@ def send_mail(to_addr, mail, mimetype='plain', from_addr=None, mailer=None,
     :param Mail mail: The mail object
     :param str mimetype: Either 'plain' or 'html'
     :param function callback: celery task to execute after send_mail completes
+    :param bool celery: Send from a celery task if celery is in use, rather than before returning
     :param **context: Context vars for the message template
 
     .. note:
@@ -115,7 +116,7 @@ def send_mail(to_addr, mail, mimetype='plain', from_addr=None, mailer=None,
     )
 
     if settings.USE_EMAIL:
-        if settings.USE_CELERY:
+        if settings.USE_CELERY and celery:
             return mailer.apply_async(kwargs=kwargs, link=callback)
         else:
             ret = mailer(**kwargs)
@@ -1,6 +1,9 @@
+import collections
+
 from babel import dates, core, Locale
 
 from osf.models import AbstractNode, OSFUser, NotificationDigest, NotificationSubscription
+from osf.models.validators import validate_subscription_type
 
 from website import mails
 from website.notifications import constants
@@ -78,57 +81,96 @@ def store_emails(recipient_ids, notification_type, event, user, node, timestamp,
 
     if notification_type == 'none':
         return
+    validate_subscription_type(notification_type)
 
     template = event + '.html.mako'
     context['user'] = user
     node_lineage_ids = get_node_lineage(node) if node else []
 
-    for user_id in recipient_ids:
-        if user_id == user._id:
-            continue
-        recipient = OSFUser.load(user_id)
-        context['localized_timestamp'] = localize_timestamp(timestamp, recipient)
-        message = mails.render_message(template, **context)
+    # The message only differs by the recipient's localized timestamp, so it is rendered once
+    # per timezone and locale
+    recipients = collections.defaultdict(list)
+    for recipient in OSFUser.objects.filter(guids___id__in=recipient_ids).exclude(id=user.id).only('id', 'timezone', 'locale'):
+        recipients[(recipient.timezone, recipient.locale)].append(recipient)
 
-        digest = NotificationDigest(
-            timestamp=timestamp,
-            send_type=notification_type,
-            event=event,
-            user=recipient,
-            message=message,
-            node_lineage=node_lineage_ids
+    digests = []
+    for group in recipients.values():
+        context['localized_timestamp'] = localize_timestamp(timestamp, group[0])
+        message = mails.render_message(template, **context)
+        digests.extend(
+            NotificationDigest(
+                timestamp=timestamp,
+                send_type=notification_type,
+                event=event,
+                user_id=recipient.id,
+                message=message,
+                node_lineage=node_lineage_ids
+            )
+            for recipient in group
         )
-        digest.save()
+    NotificationDigest.objects.bulk_create(digests)
 
 
 def compile_subscriptions(node, event_type, event=None, level=0):
-    """Recurse through node and parents for subscriptions.
+    """Find the users subscribed to an event on a node, by notification type.
+
+    Subscriptions to ``event_type`` on the node's parents apply to the node, and subscriptions
+    on a component override those on its parents; a subscription to ``event`` (e.g. a
+    particular file's updates) overrides both. Each subscription counts only for users who can
+    read its node, and only users who can read ``node`` are returned.
+
+    Lineage, subscriptions and permissions are fetched with a fixed number of queries.
 
     :param node: current node
     :param event_type: Generally node_subscriptions_available
     :param event: Particular event such a file_updated that has specific file subs
-    :param level: How deep the recursion is
+    :param level: Unused, kept for compatibility
     :return: a dict of notification types with lists of users.
     """
-    subscriptions = check_node(node, event_type)
+    lineage = utils.get_lineage(node)
+    layers = [(pk, utils.to_subscription_key(guid, event_type)) for pk, guid in lineage]
     if event:
-        subscriptions = check_node(node, event)  # Gets particular event subscriptions
-        parent_subscriptions = compile_subscriptions(node, event_type, level=level + 1)  # get node and parent subs
-    elif node.parent_id:
-        parent_subscriptions = \
-            compile_subscriptions(AbstractNode.load(node.parent_id), event_type, level=level + 1)
-    else:
-        parent_subscriptions = check_node(None, event_type)
-    for notification_type in parent_subscriptions:
-        p_sub_n = parent_subscriptions[notification_type]
-        p_sub_n.extend(subscriptions[notification_type])
-        for nt in subscriptions:
-            if notification_type != nt:
-                p_sub_n = list(set(p_sub_n).difference(set(subscriptions[nt])))
-        if level == 0:
-            p_sub_n, removed = utils.separate_users(node, p_sub_n)
-        parent_subscriptions[notification_type] = p_sub_n
-    return parent_subscriptions
+        layers.append((node.pk, utils.to_subscription_key(node._id, event)))
+
+    subscribed = get_subscribers([key for _, key in layers])
+    user_ids = {}
+    for by_type in subscribed.values():
+        for users in by_type.values():
+            user_ids.update(users)
+    readers = utils.get_readers(lineage, user_ids.keys())
+
+    compiled = {notification_type: set() for notification_type in constants.NOTIFICATION_TYPES}
+    for node_pk, key in layers:
+        layer = {
+            notification_type: set(subscribed[key][notification_type]) & readers[node_pk]
+            for notification_type in constants.NOTIFICATION_TYPES
+        }
+        for notification_type in compiled:
+            overridden = set()
+            for nt in layer:
+                if nt != notification_type:
+                    overridden |= layer[nt]
+            compiled[notification_type] = (compiled[notification_type] | layer[notification_type]) - overridden
+    return {
+        notification_type: sorted(user_ids[pk] for pk in users & readers[node.pk])
+        for notification_type, users in compiled.items()
+    }
+
+
+def get_subscribers(keys):
+    """Return the users of the subscriptions with ids ``keys``, with one query per notification type.
+
+    :return: dict of subscription id to dict of notification type to dict of user pk to user id
+    """
+    subscribed = collections.defaultdict(lambda: collections.defaultdict(dict))
+    for notification_type in constants.NOTIFICATION_TYPES:
+        through = getattr(NotificationSubscription, notification_type).through
+        rows = through.objects.filter(notificationsubscription___id__in=keys).values_list(
+            'notificationsubscription___id', 'osfuser_id', 'osfuser__guids___id'
+        )
+        for key, user_pk, user_id in rows:
+            subscribed[key][notification_type][user_pk] = user_id
+    return subscribed
 
 
 def check_node(node, event):
@@ -157,13 +199,7 @@ def get_node_lineage(node):
     """ Get a list of node ids in order from the node to top most project
         e.g. [parent._id, node._id]
     """
-    lineage = [node._id]
-
-    while node.parent_id:
-        node = node.parent_node
-        lineage = [node._id] + lineage
-
-    return lineage
+    return [guid for _, guid in utils.get_lineage(node)]
 
 
 def get_settings_url(uid, user):
@@ -3,7 +3,7 @@
 
 from django.utils import timezone
 
-from website.notifications import emails
+from website.notifications import tasks
 
 
 event_registry = {}
@@ -32,12 +32,12 @@ class Event(object):
         self.timestamp = timezone.now()
 
     def perform(self):
-        """Call emails.notify to notify users of an action"""
-        emails.notify(
+        """Notify users of an action once the request has been committed"""
+        tasks.notify(
             event=self.event_type,
-            user=self.user,
-            node=self.node,
-            timestamp=self.timestamp,
+            user_id=self.user._id,
+            node_id=self.node._id,
+            timestamp=self.timestamp.isoformat(),
             message=self.html_message,
             gravatar_url=self.gravatar_url,
             url=self.url
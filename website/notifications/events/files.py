@@ -11,6 +11,7 @@ import markupsafe
 
 from website.notifications import emails
 from website.notifications.constants import NOTIFICATION_TYPES
+from website.notifications import tasks
 from website.notifications import utils
 from website.notifications.events.base import (
     register, Event, event_registry, RegistryError
@@ -186,6 +187,19 @@ class ComplexFileEvent(FileEvent):
 
         return url.url
 
+    def perform_in_task(self):
+        """Call the event's ``notify_users`` in ``tasks.notify_file_event`` once the request has
+        been committed, like ``Event.perform``, to work out who to notify of a move or copy
+        between nodes and store their emails.
+        """
+        tasks.notify_file_event(
+            action=self.action,
+            user_id=self.user._id,
+            node_id=self.node._id,
+            timestamp=self.timestamp.isoformat(),
+            payload=self.payload,
+        )
+
 
 @register(NodeLog.FILE_RENAMED)
 class AddonFileRenamed(ComplexFileEvent):
@@ -213,6 +227,14 @@ class AddonFileMoved(ComplexFileEvent):
     """Actual class called when a file is moved."""
 
     def perform(self):
+        """Notify users of the move, from a task if the file moved to another node."""
+        # Do this is the two nodes are the same, no one needs to know specifics of permissions
+        if self.node == self.source_node:
+            super(AddonFileMoved, self).perform()
+            return
+        self.perform_in_task()
+
+    def notify_users(self):
         """Format and send messages to different user groups.
 
         Users fall into three categories: moved, warned, and removed
@@ -224,10 +246,6 @@ class AddonFileMoved(ComplexFileEvent):
         This will be **much** more useful when individual files have their
          own subscription.
         """
-        # Do this is the two nodes are the same, no one needs to know specifics of permissions
-        if self.node == self.source_node:
-            super(AddonFileMoved, self).perform()
-            return
         # File
         if self.payload['destination']['kind'] != u'folder':
             moved, warn, rm_users = event_utils.categorize_users(self.user, self.event_type, self.source_node,
@@ -275,17 +293,21 @@ class AddonFileMoved(ComplexFileEvent):
 class AddonFileCopied(ComplexFileEvent):
     """Actual class called when a file is copied"""
     def perform(self):
+        """Notify users of the copy, from a task if the file was copied to another node."""
+        if self.node == self.source_node:
+            super(AddonFileCopied, self).perform()
+            return
+        self.perform_in_task()
+
+    def notify_users(self):
         """Format and send messages to different user groups.
 
-        This is similar to the FileMoved perform method. The main
+        This is similar to the FileMoved notify_users method. The main
          difference is the moved and earned user groups are added
          together because they both don't have a subscription to a
          newly copied file.
         """
         remove_message = self.html_message + ' You do not have permission in the new component.'
-        if self.node == self.source_node:
-            super(AddonFileCopied, self).perform()
-            return
         if self.payload['destination']['kind'] != u'folder':
             moved, warn, rm_users = event_utils.categorize_users(self.user, self.event_type, self.source_node,
                                                                  self.event_type, self.node)
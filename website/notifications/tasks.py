@@ -1,45 +1,157 @@
 """
 Tasks for making even transactional emails consolidated.
 """
+import logging
+
+from dateutil.parser import parse as parse_date
 from django.db import connection
 from osf.models import (
+    AbstractNode,
     OSFUser as User,
     NotificationDigest,
 )
+from osf.utils.concurrency import ThrottledPool, advisory_lock
 from framework.celery_tasks import app as celery_app
+from framework.postcommit_tasks.handlers import run_postcommit
 from framework.sentry import log_exception
-from modularodm import Q
-from website import mails
+from website import mails, settings
+from website.notifications import emails
 from website.notifications.utils import NotificationsDict
 
+logger = logging.getLogger(__name__)
+
+
+@run_postcommit(once_per_request=False, celery=True)
+@celery_app.task(name='website.notifications.tasks.notify', max_retries=0)
+def notify(event, user_id, node_id, timestamp, **context):
+    """Store the emails for an event outside of the request that triggered it.
+
+    :param event: event that triggered the notification
+    :param user_id: id of the user who triggered notification
+    :param node_id: id of the node the event happened on
+    :param timestamp: ISO 8601 time the event happened
+    :param context: JSON serializable variables specific to templates
+    """
+    emails.notify(event, User.load(user_id), AbstractNode.load(node_id), parse_date(timestamp), **context)
+
+
+@run_postcommit(once_per_request=False, celery=True)
+@celery_app.task(name='website.notifications.tasks.notify_file_event', max_retries=0)
+def notify_file_event(action, user_id, node_id, timestamp, payload):
+    """Notify users of a file moved or copied to another node outside of the request that moved it.
+
+    Whose subscriptions move and who is warned or removed depends on permissions on both nodes,
+    which takes a query or more per subscriber.
+
+    :param action: NodeLog action the event is registered under, e.g. addon_file_moved
+    :param user_id: id of the user who moved the file
+    :param node_id: id of the node the file was moved to
+    :param timestamp: ISO 8601 time the file was moved
+    :param payload: the waterbutler payload of the event
+    """
+    # Importing the file events registers them, and they import this module
+    from website.notifications.events.files import event_registry
+    event = event_registry[action](User.load(user_id), AbstractNode.load(node_id), action, payload=payload)
+    event.timestamp = parse_date(timestamp)
+    event.notify_users()
+
 
 @celery_app.task(name='website.notifications.tasks.send_users_email', max_retries=0)
 def send_users_email(send_type):
     """Find pending Emails and amalgamates them into a single Email.
 
+    Users' digests are loaded ``settings.NOTIFICATION_DIGEST_CHUNK_SIZE`` users at a time and
+    mailed by a ``DigestMailer``. Digests are removed once their email is sent, so a run that
+    stops partway can simply be started again. Runs for the same send_type don't overlap.
+
     :param send_type
     :return:
     """
-    grouped_emails = get_users_emails(send_type)
-    if not grouped_emails:
-        return
-    for group in grouped_emails:
-        user = User.load(group['user_id'])
+    with advisory_lock('send_users_email:{}'.format(send_type)) as acquired:
+        if not acquired:
+            logger.warning('Digests of type {} are already being sent'.format(send_type))
+            return
+        mailer = DigestMailer(settings.NOTIFICATION_DIGEST_MAILER_POOL_SIZE, settings.NOTIFICATION_DIGEST_MAILER_RATE)
+        try:
+            for grouped_emails in iter_users_emails(send_type, settings.NOTIFICATION_DIGEST_CHUNK_SIZE):
+                users = User.objects.filter(guids___id__in=[group['user_id'] for group in grouped_emails])
+                users = {user._id: user for user in users.prefetch_related('guids')}
+                sent = mailer.send([(users.get(group['user_id']), group) for group in grouped_emails])
+                remove_notifications(email_notification_ids=sent)
+        finally:
+            mailer.close()
+
+
+def send_digest(user, group):
+    """Mail ``user`` the messages of a group from ``get_users_emails``."""
+    sorted_messages = group_by_node(group['info'])
+    if sorted_messages:
+        mails.send_mail(
+            to_addr=user.username,
+            mimetype='html',
+            mail=mails.DIGEST,
+            name=user.fullname,
+            message=sorted_messages,
+            celery=False,
+        )
+
+
+class DigestMailer(object):
+    """Sends digests from a ``ThrottledPool`` of ``pool_size`` threads, at most ``rate`` a second."""
+
+    def __init__(self, pool_size, rate):
+        self.pool = ThrottledPool(pool_size, rate)
+
+    def _send(self, args):
+        user, group = args
         if not user:
             log_exception()
-            continue
-        info = group['info']
-        notification_ids = [message['_id'] for message in info]
-        sorted_messages = group_by_node(info)
-        if sorted_messages:
-            mails.send_mail(
-                to_addr=user.username,
-                mimetype='html',
-                mail=mails.DIGEST,
-                name=user.fullname,
-                message=sorted_messages,
-                callback=remove_notifications(email_notification_ids=notification_ids)
+            return []
+        try:
+            send_digest(user, group)
+        except Exception:
+            logger.exception('Failed to send digest to {}'.format(group['user_id']))
+            log_exception()
+            return []
+        return [message['_id'] for message in group['info']]
+
+    def send(self, groups):
+        """Send a digest for each (user, group) pair.
+
+        :return list: Ids of the digests that were sent
+        """
+        return sum(self.pool.map(self._send, groups), [])
+
+    def close(self):
+        self.pool.close()
+
+
+USERS_EMAILS_SQL = """
+    SELECT json_build_object(
+            'user_id', osf_guid._id,
+            'info', json_agg(
+                json_build_object(
+                    'message', nd.message,
+                    'node_lineage', nd.node_lineage,
+                    '_id', nd._id
+                )
             )
+        ), osf_guid.id
+    FROM osf_notificationdigest AS nd
+      LEFT JOIN osf_guid ON nd.user_id = osf_guid.object_id
+    WHERE send_type = %s
+    AND osf_guid.content_type_id = (SELECT id FROM django_content_type WHERE model = 'osfuser')
+    AND osf_guid.id > %s
+    GROUP BY osf_guid.id
+    ORDER BY osf_guid.id ASC
+    LIMIT %s
+"""
+
+
+def _get_users_emails(send_type, after=0, limit=None):
+    with connection.cursor() as cursor:
+        cursor.execute(USERS_EMAILS_SQL, [send_type, after, limit])
+        return cursor.fetchall()
 
 
 def get_users_emails(send_type):
@@ -62,33 +174,20 @@ def get_users_emails(send_type):
                 'user_id': ...
               }]
     """
+    return [group for group, _ in _get_users_emails(send_type)]
 
-    sql = """
-    SELECT json_build_object(
-            'user_id', osf_guid._id,
-            'info', json_agg(
-                json_build_object(
-                    'message', nd.message,
-                    'node_lineage', nd.node_lineage,
-                    '_id', nd._id
-                )
-            )
-        )
-    FROM osf_notificationdigest AS nd
-      LEFT JOIN osf_guid ON nd.user_id = osf_guid.object_id
-    WHERE send_type = %s
-    AND osf_guid.content_type_id = (SELECT id FROM django_content_type WHERE model = 'osfuser')
-    GROUP BY osf_guid.id
-    ORDER BY osf_guid.id ASC
-    """
 
-    with connection.cursor() as cursor:
-        cursor.execute(sql, [send_type, ])
-        rows = list(sum(cursor.fetchall(), ()))
-        if len(rows) > 0:
-            return rows
-        else:
-            return []
+def iter_users_emails(send_type, chunk_size):
+    """Like ``get_users_emails``, but yield lists of at most ``chunk_size`` users' emails,
+    each loaded with its own query.
+    """
+    after = 0
+    while True:
+        rows = _get_users_emails(send_type, after, chunk_size)
+        if not rows:
+            return
+        yield [group for group, _ in rows]
+        after = rows[-1][1]
 
 
 def group_by_node(notifications):
@@ -109,5 +208,4 @@ def remove_notifications(email_notification_ids=None):
     :param email_notification_ids:
     :return:
     """
-    for email_id in email_notification_ids:
-        NotificationDigest.remove(Q('_id', 'eq', email_id))
+    NotificationDigest.objects.filter(_id__in=email_notification_ids).delete()
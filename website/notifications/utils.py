@@ -89,6 +89,47 @@ def remove_subscription_task(node_id):
         parent.save()
 
 
+def get_lineage(node):
+    """Return (pk, guid) pairs for ``node`` and its parents, from the top-level project down."""
+    NodeClosure = apps.get_model('osf.NodeClosure')
+    lineage = collections.OrderedDict(
+        NodeClosure.objects.filter(descendant=node).order_by('-depth').values_list('ancestor_id', 'ancestor__guids___id')
+    )
+    lineage[node.pk] = node._id
+    return lineage.items()
+
+
+def get_readers(lineage, user_pks):
+    """Find which of ``user_pks`` can read each node in ``lineage``, with one query.
+
+    A user can read a node if they are a reader on it or an admin on it or any of its parents,
+    as in ``AbstractNode.has_permission``.
+
+    :param lineage: (pk, guid) pairs from the top-level project down, as from ``get_lineage``
+    :param user_pks: Iterable of user primary keys
+    :return: dict of node pk to set of user pks
+    """
+    Contributor = apps.get_model('osf.Contributor')
+    node_pks = [pk for pk, _ in lineage]
+    readers = {pk: set() for pk in node_pks}
+    admins = {pk: set() for pk in node_pks}
+    user_pks = set(user_pks)
+    if user_pks:
+        contributors = Contributor.objects.filter(
+            node_id__in=node_pks, user_id__in=user_pks
+        ).values_list('node_id', 'user_id', 'read', 'admin')
+        for node_pk, user_pk, read, admin in contributors:
+            if read:
+                readers[node_pk].add(user_pk)
+            if admin:
+                admins[node_pk].add(user_pk)
+    inherited = set()
+    for pk in node_pks:
+        inherited |= admins[pk]
+        readers[pk] |= inherited
+    return readers
+
+
 def separate_users(node, user_ids):
     """Separates users into ones with permissions and ones without given a list.
 
@@ -97,14 +138,16 @@ def separate_users(node, user_ids):
     :return: list of subbed, list of removed user ids
     """
     OSFUser = apps.get_model('osf.OSFUser')
+    guids = [user_id for user_id in user_ids if isinstance(user_id, basestring)]
+    user_pks = dict(OSFUser.objects.filter(guids___id__in=guids).values_list('guids___id', 'id')) if guids else {}
+    for user in user_ids:
+        if user is not None and not isinstance(user, basestring):
+            user_pks[user] = user.pk
+    readers = get_readers(get_lineage(node), user_pks.values())[node.pk]
     removed = []
     subbed = []
     for user_id in user_ids:
-        try:
-            user = OSFUser.load(user_id)
-        except TypeError:
-            user = user_id
-        if node.has_permission(user, 'read'):
+        if user_pks.get(user_id) in readers:
             subbed.append(user_id)
         else:
             removed.append(user_id)
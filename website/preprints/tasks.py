@@ -1,8 +1,6 @@
 import logging
 import urlparse
 
-import requests
-
 from framework.celery_tasks import app as celery_app
 
 from website import settings
@@ -13,26 +11,13 @@ logger = logging.getLogger(__name__)
 
 @celery_app.task(ignore_results=True)
 def on_preprint_updated(preprint_id):
-    # WARNING: Only perform Read-Only operations in an asynchronous task, until Repeatable Read/Serializable
-    # transactions are implemented in View and Task application layers.
-    from osf.models import PreprintService
+    """Mark a preprint to be sent to SHARE by the next outbox flush, see website.share.tasks."""
+    from osf.models import PreprintService, ShareOutboxItem
     preprint = PreprintService.load(preprint_id)
 
     if settings.SHARE_URL:
-        if not preprint.provider.access_token:
-            raise ValueError('No access_token for {}. Unable to send {} to SHARE.'.format(preprint.provider, preprint))
-        resp = requests.post('{}api/v2/normalizeddata/'.format(settings.SHARE_URL), json={
-            'data': {
-                'type': 'NormalizedData',
-                'attributes': {
-                    'tasks': [],
-                    'raw': None,
-                    'data': {'@graph': format_preprint(preprint)}
-                }
-            }
-        }, headers={'Authorization': 'Bearer {}'.format(preprint.provider.access_token), 'Content-Type': 'application/vnd.api+json'})
-        logger.debug(resp.content)
-        resp.raise_for_status()
+        ShareOutboxItem.enqueue(ShareOutboxItem.PREPRINT, preprint.id)
+
 
 def format_preprint(preprint):
     preprint_graph = GraphNode('preprint', **{
@@ -1,11 +1,12 @@
 from django.apps import apps
 import logging
 import urlparse
-import requests
 
 from framework.celery_tasks import app as celery_app
+from framework.postcommit_tasks.handlers import run_postcommit
 
 from website import settings
+from website.util.akismet import AkismetClientError
 from website.util.share import GraphNode, format_contributor
 
 
@@ -30,50 +31,55 @@ def on_node_updated(node_id, user_id, first_save, saved_fields, request_headers=
         need_update = False
 
     if need_update:
-        node.update_search()
+        node.update_search(saved_fields=saved_fields)
 
         if settings.SHARE_URL:
-            if not settings.SHARE_API_TOKEN:
-                return logger.warning('SHARE_API_TOKEN not set. Could not send %s to SHARE.'.format(node))
-            if node.is_registration:
-                on_registration_updated(node)
-            else:
-                resp = requests.post('{}api/normalizeddata/'.format(settings.SHARE_URL), json={
-                    'data': {
-                        'type': 'NormalizedData',
-                        'attributes': {
-                            'tasks': [],
-                            'raw': None,
-                            'data': {'@graph': [{
-                                '@id': '_:123',
-                                '@type': 'workidentifier',
-                                'creative_work': {'@id': '_:789', '@type': 'project'},
-                                'uri': '{}{}/'.format(settings.DOMAIN, node._id),
-                            }, {
-                                '@id': '_:789',
-                                '@type': 'project',
-                                'is_deleted': not node.is_public or node.is_deleted or node.is_spammy,
-                            }]}
-                        }
-                    }
-                }, headers={'Authorization': 'Bearer {}'.format(settings.SHARE_API_TOKEN), 'Content-Type': 'application/vnd.api+json'})
-                logger.debug(resp.content)
-                resp.raise_for_status()
+            ShareOutboxItem = apps.get_model('osf.ShareOutboxItem')
+            ShareOutboxItem.enqueue(ShareOutboxItem.NODE, node.id)
+
+
+@run_postcommit(once_per_request=False, celery=True)
+@celery_app.task(name='website.project.tasks.check_node_spam', bind=True, max_retries=5)
+def check_node_spam(self, node_id, user_id, saved_fields, request_headers):
+    """Check the fields of a node saved by a user for spam, outside of the request that saved them.
+    Retried with exponential backoff while Akismet can't be reached.
+    """
+    AbstractNode = apps.get_model('osf.AbstractNode')
+    OSFUser = apps.get_model('osf.OSFUser')
+    node = AbstractNode.load(node_id)
+    user = OSFUser.load(user_id)
+    if not node or not user:
+        return
+    was_public = node.is_public
+    try:
+        is_spam = node.check_spam(user, saved_fields, request_headers)
+    except AkismetClientError as exc:
+        if self.request.called_directly:
+            # Run inline (DEBUG_MODE), where there is no worker to retry
+            return logger.exception('Error performing SPAM check')
+        raise self.retry(exc=exc, countdown=settings.SPAM_CHECK_RETRY_DELAY * 2 ** self.request.retries)
+    if is_spam:
+        # Only write the verdict, and the privacy flag_spam may have changed, so that edits made to the
+        # node since it was loaded are kept. The hidden MADE_PRIVATE log is saved by flag_spam itself.
+        update_fields = ['spam_status', 'spam_pro_tip', 'spam_data', 'date_modified']
+        if node.is_public != was_public:
+            update_fields.extend(['is_public', 'keenio_read_key'])
+        # Skip AbstractNode.save so that saving the verdict doesn't check the node again
+        super(AbstractNode, node).save(update_fields=update_fields)
 
 
 def on_registration_updated(node):
-    resp = requests.post('{}api/v2/normalizeddata/'.format(settings.SHARE_URL), json={
-        'data': {
-            'type': 'NormalizedData',
-            'attributes': {
-                'tasks': [],
-                'raw': None,
-                'data': {'@graph': format_registration(node)}
-            }
-        }
-    }, headers={'Authorization': 'Bearer {}'.format(settings.SHARE_API_TOKEN), 'Content-Type': 'application/vnd.api+json'})
-    logger.debug(resp.content)
-    resp.raise_for_status()
+    """Mark ``node``, a node or registration, to be sent to SHARE by the next outbox flush."""
+    ShareOutboxItem = apps.get_model('osf.ShareOutboxItem')
+    ShareOutboxItem.enqueue(ShareOutboxItem.NODE, node.id)
+
+
+def format_node(node):
+    project = GraphNode('project', is_deleted=not node.is_public or node.is_deleted or node.is_spammy)
+    return [
+        GraphNode('workidentifier', creative_work=project, uri='{}{}/'.format(settings.DOMAIN, node._id)).serialize(),
+        project.serialize(),
+    ]
 
 
 def format_registration(node):
@@ -863,27 +863,61 @@ def get_recent_logs(node, **kwargs):
     return {'logs': logs}
 
 
+def _can_view(node, auth, permissions):
+    """Equivalent of ``node.can_view(auth)`` that uses permissions resolved by
+    ``AbstractNode.objects.permissions_for`` when they are available.
+    """
+    if auth.private_key or node.id not in permissions:
+        return node.can_view(auth)
+    return node.is_public or READ in permissions[node.id]
+
+
+def _find_readable_descendants(node, auth, permissions):
+    """Same as ``AbstractNode.find_readable_descendants``, but checks permissions
+    against the precomputed ``permissions`` map.
+    """
+    new_branches = []
+    for child in node.nodes_primary.filter(is_deleted=False):
+        if _can_view(child, auth, permissions):
+            yield child
+        else:
+            new_branches.append(child)
+
+    for branch in new_branches:
+        for descendant in _find_readable_descendants(branch, auth, permissions):
+            yield descendant
+
+
 def _get_readable_descendants(auth, node, permission=None):
     descendants = []
     all_readable = True
-    for child in node.get_nodes(is_deleted=False):
+    children = node.get_nodes(is_deleted=False)
+    AbstractNode = apps.get_model('osf.AbstractNode')
+    permissions = AbstractNode.objects.permissions_for(auth.user, [child.id for child in children] + list(
+        AbstractNode.objects.get_children(node).values_list('id', flat=True)
+    ))
+    linked_node_ids = set(node.linked_nodes.values_list('id', flat=True))
+    can_write_parent = None
+    for child in children:
         if permission:
             perm = permission.lower().strip()
-            if not child.has_permission(auth.user, perm):
+            if perm not in permissions[child.id]:
                 all_readable = False
                 continue
         # User can view child
-        if child.can_view(auth):
+        if _can_view(child, auth, permissions):
             descendants.append(child)
         # Child is a node link and user has write permission
-        elif node.linked_nodes.filter(id=child.id).exists():
-            if node.has_permission(auth.user, 'write'):
+        elif child.id in linked_node_ids:
+            if can_write_parent is None:
+                can_write_parent = node.has_permission(auth.user, 'write')
+            if can_write_parent:
                 descendants.append(child)
             else:
                 all_readable = False
         else:
             all_readable = False
-            for descendant in child.find_readable_descendants(auth):
+            for descendant in _find_readable_descendants(child, auth, permissions):
                 descendants.append(descendant)
     return descendants, all_readable
 
@@ -893,21 +927,35 @@ def node_child_tree(user, nodes):
     :param nodes: list of parent project node objects
     :return: treebeard-formatted data
     """
+    AbstractNode = apps.get_model('osf.AbstractNode')
+    NodeClosure = apps.get_model('osf.NodeClosure')
+    node_ids = [node.id for node in nodes]
+    parent_ids = [node.parent_node.id for node in nodes if node.parent_node]
+    descendant_ids = NodeClosure.objects.filter(ancestor_id__in=node_ids).values_list('descendant_id', flat=True)
+    permissions = AbstractNode.objects.permissions_for(user, node_ids + parent_ids + list(descendant_ids))
+    return _node_child_tree(user, nodes, permissions)
+
+def _node_child_tree(user, nodes, permissions, parent=None):
     items = []
 
     for node in nodes:
         assert node, '{} is not a valid Node.'.format(node._id)
 
-        can_read = node.has_permission(user, READ)
-        can_read_children = node.has_permission_on_children(user, 'read')
-        if not can_read and not can_read_children:
+        can_read = READ in permissions[node.id]
+        children = node.get_nodes(**{'is_deleted': False, 'is_node_link': False})
+        # List project/node if user has at least 'read' permissions (contributor or admin viewer) or if
+        # user is contributor on a component of the project/node
+        children_tree = _node_child_tree(user, children, permissions, parent=node)
+        # Children are only listed when readable, so any entry means the user can read some descendant
+        if not can_read and not children_tree:
             continue
 
+        admin_ids = set(node.contributor_set.filter(admin=True).values_list('user_id', flat=True))
         contributors = []
         for contributor in node.contributors:
             contributors.append({
                 'id': contributor._id,
-                'is_admin': node.has_permission(contributor, ADMIN),
+                'is_admin': contributor.id in admin_ids,
                 'is_confirmed': contributor.is_confirmed
             })
 
@@ -916,11 +964,7 @@ def node_child_tree(user, nodes):
             'name': affiliated_institution.name
         } for affiliated_institution in node.affiliated_institutions.all()]
 
-        children = node.get_nodes(**{'is_deleted': False, 'is_node_link': False})
-        children_tree = []
-        # List project/node if user has at least 'read' permissions (contributor or admin viewer) or if
-        # user is contributor on a component of the project/node
-        children_tree.extend(node_child_tree(user, children))
+        node_parent = parent or node.parent_node
 
         item = {
             'node': {
@@ -930,17 +974,17 @@ def node_child_tree(user, nodes):
                 'is_public': node.is_public,
                 'contributors': contributors,
                 'visible_contributors': list(node.visible_contributor_ids),
-                'is_admin': node.has_permission(user, ADMIN),
+                'is_admin': ADMIN in permissions[node.id],
                 'affiliated_institutions': affiliated_institutions
             },
             'user_id': user._id,
             'children': children_tree,
-            'kind': 'folder' if not node.parent_node or not node.parent_node.has_permission(user, 'read') else 'node',
+            'kind': 'folder' if not node_parent or READ not in permissions[node_parent.id] else 'node',
             'nodeType': node.project_or_component,
             'category': node.category,
             'permissions': {
                 'view': can_read,
-                'is_admin': node.has_permission(user, 'read')
+                'is_admin': can_read
             }
         }
 
@@ -3,8 +3,10 @@
 
 from __future__ import division
 
+import collections
 import copy
 import functools
+import itertools
 import logging
 import math
 import re
@@ -15,11 +17,10 @@ import six
 
 from django.apps import apps
 from django.core.paginator import Paginator
+from django.db.models import QuerySet
 from elasticsearch import (ConnectionError, Elasticsearch, NotFoundError,
                            RequestError, TransportError, helpers)
 from framework.celery_tasks import app as celery_app
-from framework.mongo.utils import paginated
-from modularodm import Q
 from osf.models import AbstractNode as Node
 from osf.models import OSFUser as User
 from osf.models import FileNode
@@ -295,6 +296,15 @@ def load_parent(parent_id):
 
 COMPONENT_CATEGORIES = set(settings.NODE_CATEGORY_MAP.keys())
 
+# Node fields that are copied into the search documents of the node's files
+FILE_SEARCH_UPDATE_FIELDS = {
+    'title',
+    'is_public',
+    'is_deleted',
+    'retraction',
+    'is_retracted',
+}
+
 def get_doctype_from_node(node):
     if node.is_registration:
         return 'registration'
@@ -307,11 +317,11 @@ def get_doctype_from_node(node):
         return node.category
 
 @celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
-def update_node_async(self, node_id, index=None, bulk=False):
+def update_node_async(self, node_id, index=None, bulk=False, saved_fields=None):
     AbstractNode = apps.get_model('osf.AbstractNode')
     node = AbstractNode.load(node_id)
     try:
-        update_node(node=node, index=index, bulk=bulk, async=True)
+        update_node(node=node, index=index, bulk=bulk, async=True, saved_fields=saved_fields)
     except Exception as exc:
         self.retry(exc=exc)
 
@@ -324,63 +334,204 @@ def update_user_async(self, user_id, index=None):
     except Exception as exc:
         self.retry(exc)
 
-def serialize_node(node, category):
-    NodeWikiPage = apps.get_model('addons_wiki.NodeWikiPage')
-
-    elastic_document = {}
-    parent_id = node.parent_id
-
+# Properties of registrations that depend on sanctions inherited from their ancestors
+SANCTION_STATE_FIELDS = (
+    'is_pending_registration', 'is_retracted', 'is_pending_retraction', 'is_pending_embargo', 'embargo_end_date'
+)
+
+def _serialize_node(node, category, contributors, tags, institutions, license_record, wikis,
+                    wiki_text=None, sanction_state=None):
+    wiki_text = wiki_text or (lambda wiki: wiki.raw_text(node))
+    if sanction_state is None:
+        sanction_state = {field: getattr(node, field) for field in SANCTION_STATE_FIELDS}
+    embargo_end_date = sanction_state['embargo_end_date']
     try:
         normalized_title = six.u(node.title)
     except TypeError:
         normalized_title = node.title
     normalized_title = unicodedata.normalize('NFKD', normalized_title).encode('ascii', 'ignore')
-    elastic_document = {
+    return {
         'id': node._id,
         'contributors': [
             {
                 'fullname': x['fullname'],
                 'url': '/{}/'.format(x['guids___id']) if x['is_active'] else None
             }
-            for x in node._contributors.filter(contributor__visible=True).order_by('contributor___order')
-            .values('fullname', 'guids___id', 'is_active')
+            for x in contributors
         ],
         'title': node.title,
         'normalized_title': normalized_title,
         'category': category,
         'public': node.is_public,
-        'tags': list(node.tags.filter(system=False).values_list('name', flat=True)),
+        'tags': tags,
         'description': node.description,
         'url': node.url,
         'is_registration': node.is_registration,
-        'is_pending_registration': node.is_pending_registration,
-        'is_retracted': node.is_retracted,
-        'is_pending_retraction': node.is_pending_retraction,
-        'embargo_end_date': node.embargo_end_date.strftime('%A, %b. %d, %Y') if node.embargo_end_date else False,
-        'is_pending_embargo': node.is_pending_embargo,
+        'is_pending_registration': sanction_state['is_pending_registration'],
+        'is_retracted': sanction_state['is_retracted'],
+        'is_pending_retraction': sanction_state['is_pending_retraction'],
+        'embargo_end_date': embargo_end_date.strftime('%A, %b. %d, %Y') if embargo_end_date else False,
+        'is_pending_embargo': sanction_state['is_pending_embargo'],
         'registered_date': node.registered_date,
-        'wikis': {},
-        'parent_id': parent_id,
+        'wikis': {} if sanction_state['is_retracted'] else {wiki.page_name: wiki_text(wiki) for wiki in wikis},
+        'parent_id': node.parent_id,
         'date_created': node.date_created,
-        'license': serialize_node_license_record(node.license),
-        'affiliated_institutions': list(node.affiliated_institutions.values_list('name', flat=True)),
+        'license': serialize_node_license_record(license_record),
+        'affiliated_institutions': institutions,
         'boost': int(not node.is_registration) + 1,  # This is for making registered projects less relevant
         'extra_search_terms': clean_splitters(node.title),
     }
-    if not node.is_retracted:
-        for wiki in NodeWikiPage.objects.filter(guids___id__in=node.wiki_pages_current.values()):
-            elastic_document['wikis'][wiki.page_name] = wiki.raw_text(node)
 
-    return elastic_document
+def serialize_node(node, category):
+    NodeWikiPage = apps.get_model('addons_wiki.NodeWikiPage')
+
+    return _serialize_node(
+        node, category,
+        contributors=node._contributors.filter(contributor__visible=True).order_by('contributor___order')
+        .values('fullname', 'guids___id', 'is_active'),
+        tags=list(node.tags.filter(system=False).values_list('name', flat=True)),
+        institutions=list(node.affiliated_institutions.values_list('name', flat=True)),
+        license_record=node.license,
+        wikis=NodeWikiPage.objects.filter(guids___id__in=node.wiki_pages_current.values()),
+    )
+
+def serialize_nodes(nodes):
+    """Serialize many nodes at once. Unlike ``serialize_node``, the number of queries
+    does not grow with the number of nodes: contributors, tags, institutions, licenses,
+    wiki pages and their cached renderings, and the sanctions that registrations inherit
+    from their ancestors are each fetched for all of the nodes in one query. Only wiki
+    pages that were never rendered on their node are rendered one by one.
+
+    :param nodes: QuerySet or iterable of nodes
+    :return: OrderedDict of node id -> (category, document)
+    """
+    Contributor = apps.get_model('osf.Contributor')
+    NodeClosure = apps.get_model('osf.NodeClosure')
+    NodeWikiPage = apps.get_model('addons_wiki.NodeWikiPage')
+    RenderedWikiPage = apps.get_model('addons_wiki.RenderedWikiPage')
+    Tag = apps.get_model('osf.Tag')
+
+    if not isinstance(nodes, QuerySet):
+        nodes = Node.objects.filter(id__in=[node.id for node in nodes])
+    nodes = list(
+        nodes.select_related('node_license__node_license', *SANCTION_FIELDS)
+        .prefetch_related('guids', '_parents__parent__guids')
+    )
+    node_ids = [node.id for node in nodes]
+    sanction_states = get_sanction_states([node for node in nodes if node.is_registration])
+
+    contributors = collections.defaultdict(list)
+    for contributor in Contributor.objects.filter(node_id__in=node_ids, visible=True).order_by('_order').values(
+            'node_id', 'user__fullname', 'user__guids___id', 'user__is_active'):
+        contributors[contributor['node_id']].append({
+            'fullname': contributor['user__fullname'],
+            'guids___id': contributor['user__guids___id'],
+            'is_active': contributor['user__is_active'],
+        })
+
+    tags = collections.defaultdict(list)
+    for node_id, name in Tag.objects.filter(abstractnode_tagged__in=node_ids, system=False).values_list('abstractnode_tagged', 'name'):
+        tags[node_id].append(name)
+
+    institutions = collections.defaultdict(list)
+    for node_id, name in Institution.objects.filter(nodes__in=node_ids).values_list('nodes', 'name'):
+        institutions[node_id].append(name)
+
+    # Components without a license of their own inherit the one of their closest ancestor
+    licenses = {node.id: node.node_license for node in nodes if node.node_license_id}
+    inherited = (
+        NodeClosure.objects.filter(
+            descendant_id__in=[node_id for node_id in node_ids if node_id not in licenses],
+            ancestor__node_license__isnull=False
+        ).select_related('ancestor__node_license__node_license').order_by('descendant_id', 'depth')
+    )
+    for closure in inherited:
+        licenses.setdefault(closure.descendant_id, closure.ancestor.node_license)
+
+    wiki_ids = {node.id: node.wiki_pages_current.values() for node in nodes}
+    wikis = {
+        wiki._id: wiki
+        for wiki in NodeWikiPage.objects.filter(guids___id__in=set(itertools.chain(*wiki_ids.values()))).prefetch_related('guids')
+    }
+    node_wikis = {node.id: [wikis[wiki_id] for wiki_id in wiki_ids[node.id] if wiki_id in wikis] for node in nodes}
+    renderings = RenderedWikiPage.get_cached([
+        (wiki, node) for node in nodes for wiki in node_wikis[node.id]
+        if not (node.id in sanction_states and sanction_states[node.id]['is_retracted'])
+    ])
+
+    def wiki_text(node):
+        def get_text(wiki):
+            rendered = renderings.get((wiki.pk, node.pk))
+            return rendered.raw_text if rendered else wiki.raw_text(node)
+        return get_text
+
+    serialized = collections.OrderedDict()
+    for node in nodes:
+        category = get_doctype_from_node(node)
+        serialized[node.id] = category, _serialize_node(
+            node, category,
+            contributors=contributors[node.id],
+            tags=tags[node.id],
+            institutions=institutions[node.id],
+            license_record=licenses.get(node.id),
+            wikis=node_wikis[node.id],
+            wiki_text=wiki_text(node),
+            sanction_state=sanction_states.get(node.id),
+        )
+    return serialized
+
+# Sanctions of a registration that apply to its components unless they have their own
+SANCTION_FIELDS = ('retraction', 'embargo', 'registration_approval')
+
+def get_sanction_states(registrations):
+    """Return the ``SANCTION_STATE_FIELDS`` of ``registrations``, with one query for the sanctions
+    they inherit, instead of walking up the registration tree one parent at a time per property.
+
+    :return dict: registration id -> dict of field -> value, as the properties would return it
+    """
+    NodeClosure = apps.get_model('osf.NodeClosure')
+    sanctions = {node.id: {field: getattr(node, field) for field in SANCTION_FIELDS} for node in registrations}
+    inheriting = [node_id for node_id, own in sanctions.items() if None in own.values()]
+    if inheriting:
+        # The closest ancestor with a sanction of a kind is the one the properties would find
+        closures = NodeClosure.objects.filter(descendant_id__in=inheriting).select_related(
+            *['ancestor__{}'.format(field) for field in SANCTION_FIELDS]
+        ).order_by('descendant_id', 'depth')
+        for closure in closures:
+            nearest = sanctions[closure.descendant_id]
+            for field in SANCTION_FIELDS:
+                if nearest[field] is None:
+                    nearest[field] = getattr(closure.ancestor, field)
+
+    states = {}
+    for node_id, nearest in sanctions.items():
+        retraction, embargo, approval = (nearest[field] for field in SANCTION_FIELDS)
+        states[node_id] = {
+            'is_pending_registration': approval.is_pending_approval if approval else False,
+            'is_retracted': retraction.is_approved if retraction else False,
+            'is_pending_retraction': retraction.is_pending_approval if retraction else False,
+            'is_pending_embargo': embargo.is_pending_approval if embargo else False,
+            'embargo_end_date': embargo.embargo_end_date if embargo else False,
+        }
+    return states
+
+def is_node_indexable(node):
+    return not (node.is_deleted or not node.is_public or node.archiving or (node.is_spammy and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH))
+
+def files_need_update(saved_fields):
+    return saved_fields is None or bool(FILE_SEARCH_UPDATE_FIELDS.intersection(saved_fields))
 
 @requires_search
-def update_node(node, index=None, bulk=False, async=False):
-    from addons.osfstorage.models import OsfStorageFile
+def update_node(node, index=None, bulk=False, async=False, saved_fields=None):
+    """Index or remove ``node``'s search document. The documents of its files are
+    updated as well, unless ``saved_fields`` is given and does not include any field
+    that is copied into them.
+    """
     index = index or INDEX
-    for file_ in paginated(OsfStorageFile, Q('node', 'eq', node)):
-        update_file(file_, index=index)
+    if files_need_update(saved_fields):
+        bulk_update_files(node, index=index)
 
-    if node.is_deleted or not node.is_public or node.archiving or (node.is_spammy and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH):
+    if not is_node_indexable(node):
         delete_doc(node._id, node, index=index)
     else:
         category = get_doctype_from_node(node)
@@ -390,27 +541,52 @@ def update_node(node, index=None, bulk=False, async=False):
         else:
             client().index(index=index, doc_type=category, id=node._id, body=elastic_document, refresh=True)
 
+@requires_search
+def update_nodes(nodes, index=None, saved_fields=None):
+    """Bulk version of ``update_node``. Nodes that should not be in the index are removed from it."""
+    index = index or INDEX
+    indexable = []
+    for node in nodes:
+        if files_need_update(saved_fields):
+            bulk_update_files(node, index=index)
+        if is_node_indexable(node):
+            indexable.append(node)
+        else:
+            delete_doc(node._id, node, index=index)
+    return bulk_update_nodes(None, indexable, index=index)
+
 def bulk_update_nodes(serialize, nodes, index=None):
     """Updates the list of input projects
 
-    :param function Node-> dict serialize:
+    :param function Node-> dict serialize: Partial document to upsert for each node,
+        or None to index complete documents built by ``serialize_nodes``
     :param Node[] nodes: Projects, components or registrations
     :param str index: Index of the nodes
     :return:
     """
     index = index or INDEX
-    actions = []
-    for node in nodes:
-        serialized = serialize(node)
-        if serialized:
-            actions.append({
-                '_op_type': 'update',
-                '_index': index,
-                '_id': node._id,
-                '_type': get_doctype_from_node(node),
-                'doc': serialized,
-                'doc_as_upsert': True,
-            })
+    if serialize is None:
+        documents = [
+            (document['id'], category, document)
+            for category, document in serialize_nodes(nodes).values()
+        ]
+    else:
+        documents = []
+        for node in nodes:
+            serialized = serialize(node)
+            if serialized:
+                documents.append((node._id, get_doctype_from_node(node), serialized))
+    actions = [
+        {
+            '_op_type': 'update',
+            '_index': index,
+            '_id': _id,
+            '_type': category,
+            'doc': document,
+            'doc_as_upsert': True,
+        }
+        for _id, category, document in documents
+    ]
     if actions:
         return helpers.bulk(client(), actions)
 
@@ -436,17 +612,7 @@ def update_contributors_async(self, user_id):
     for page_num in p.page_range:
         bulk_update_contributors(p.page(page_num).object_list)
 
-@requires_search
-def update_user(user, index=None):
-
-    index = index or INDEX
-    if not user.is_active:
-        try:
-            client().delete(index=index, doc_type='user', id=user._id, refresh=True, ignore=[404])
-        except NotFoundError:
-            pass
-        return
-
+def serialize_user(user):
     names = dict(
         fullname=user.fullname,
         given_name=user.given_name,
@@ -481,23 +647,55 @@ def update_user(user, index=None):
         'boost': 2,  # TODO(fabianvf): Probably should make this a constant or something
     }
 
-    client().index(index=index, doc_type='user', body=user_doc, id=user._id, refresh=True)
+    return user_doc
 
 @requires_search
-def update_file(file_, index=None, delete=False):
+def update_user(user, index=None):
+
     index = index or INDEX
+    if not user.is_active:
+        try:
+            client().delete(index=index, doc_type='user', id=user._id, refresh=True, ignore=[404])
+        except NotFoundError:
+            pass
+        return
+
+    client().index(index=index, doc_type='user', body=serialize_user(user), id=user._id, refresh=True)
 
+@requires_search
+def bulk_update_files(node, index=None):
+    """Index the search documents of all of ``node``'s OsfStorage files, or remove
+    them if they should not be in the index, with a single bulk request.
+    """
+    from addons.osfstorage.models import OsfStorageFile
+    index = index or INDEX
+    actions = []
+    for file_ in OsfStorageFile.objects.filter(node=node).prefetch_related('tags'):
+        file_.node = node
+        if is_file_indexable(file_):
+            actions.append({
+                '_op_type': 'index',
+                '_index': index,
+                '_type': 'file',
+                '_id': file_._id,
+                '_source': serialize_file(file_),
+            })
+        else:
+            actions.append({
+                '_op_type': 'delete',
+                '_index': index,
+                '_type': 'file',
+                '_id': file_._id,
+            })
+    if actions:
+        # Deleting documents that were never indexed is not an error
+        return helpers.bulk(client(), actions, raise_on_error=False, refresh=True)
+
+def is_file_indexable(file_):
     # TODO: Can remove 'not file_.name' if we remove all base file nodes with name=None
-    if not file_.name or not file_.node.is_public or delete or file_.node.is_deleted or file_.node.archiving:
-        client().delete(
-            index=index,
-            doc_type='file',
-            id=file_._id,
-            refresh=True,
-            ignore=[404]
-        )
-        return
+    return bool(file_.name) and file_.node.is_public and not file_.node.is_deleted and not file_.node.archiving
 
+def serialize_file(file_):
     # We build URLs manually here so that this function can be
     # run outside of a Flask request context (e.g. in a celery task)
     file_deep_url = '/{node_id}/files/{provider}{path}/'.format(
@@ -515,7 +713,7 @@ def update_file(file_, index=None, delete=False):
         'id': file_._id,
         'deep_url': file_deep_url,
         'guid_url': guid_url,
-        'tags': list(file_.tags.filter(system=False).values_list('name', flat=True)),
+        'tags': [tag.name for tag in file_.tags.all() if not tag.system],
         'name': file_.name,
         'category': 'file',
         'node_url': node_url,
@@ -526,10 +724,26 @@ def update_file(file_, index=None, delete=False):
         'extra_search_terms': clean_splitters(file_.name),
     }
 
+    return file_doc
+
+@requires_search
+def update_file(file_, index=None, delete=False):
+    index = index or INDEX
+
+    if delete or not is_file_indexable(file_):
+        client().delete(
+            index=index,
+            doc_type='file',
+            id=file_._id,
+            refresh=True,
+            ignore=[404]
+        )
+        return
+
     client().index(
         index=index,
         doc_type='file',
-        body=file_doc,
+        body=serialize_file(file_),
         id=file_._id,
         refresh=True
     )
@@ -28,7 +28,8 @@ def search(query, index=None, doc_type=None, raw=None):
 def update_node(node, index=None, bulk=False, async=True, saved_fields=None):
     kwargs = {
         'index': index,
-        'bulk': bulk
+        'bulk': bulk,
+        'saved_fields': list(saved_fields) if saved_fields is not None else None,
     }
     if async:
         node_id = node._id
@@ -44,6 +45,11 @@ def update_node(node, index=None, bulk=False, async=True, saved_fields=None):
         index = index or settings.ELASTIC_INDEX
         return search_engine.update_node(node, **kwargs)
 
+@requires_search
+def update_nodes(nodes, index=None, saved_fields=None):
+    index = index or settings.ELASTIC_INDEX
+    search_engine.update_nodes(nodes, index=index, saved_fields=saved_fields)
+
 @requires_search
 def bulk_update_nodes(serialize, nodes, index=None):
     index = index or settings.ELASTIC_INDEX
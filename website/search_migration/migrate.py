@@ -5,58 +5,47 @@ from __future__ import absolute_import
 
 import logging
 
+from dateutil.parser import parse as parse_date
 from django.utils import timezone
 from elasticsearch import helpers
 from modularodm.query.querydialect import DefaultQueryDialect as Q
 
 import website.search.search as search
-from framework.auth import User
-from framework.mongo.utils import paginated
 from scripts import utils as script_utils
 from website import settings
 from website.app import init_app
 from website.institutions.model import Institution
-from website.models import Node
 from website.search.elastic_search import client as es_client
 from website.search.search import update_institution
+from website.search_migration.reindex import Checkpoint, Reindexer
 
 logger = logging.getLogger(__name__)
 
-def migrate_nodes(index, query=None):
-    logger.info('Migrating nodes to index: {}'.format(index))
-    node_query = Q('is_public', 'eq', True) & Q('is_deleted', 'eq', False)
-    if query:
-        node_query = query & node_query
-    total = Node.find(node_query).count()
-    increment = 200
-    total_pages = (total // increment) + 1
-    pages = paginated(Node, query=node_query, increment=increment, each=False, include=['contributor__user__guids'])
+def migrate_nodes(reindexer, modified_since=None):
+    """Index public nodes and their files."""
+    logger.info('Migrating nodes to index: {}'.format(reindexer.index))
+    report = reindexer.reindex(['node', 'file'], modified_since=modified_since)
+    logger.info('Nodes migrated: {}'.format(report['node']['indexed']))
 
-    for page_number, page in enumerate(pages):
-        logger.info('Updating page {} / {}'.format(page_number + 1, total_pages))
-        Node.bulk_update_search(page, index=index)
 
-    logger.info('Nodes migrated: {}'.format(total))
-
-
-def migrate_users(index):
-    logger.info('Migrating users to index: {}'.format(index))
-    n_migr = 0
-    n_iter = 0
-    users = paginated(User, query=None, each=True)
-    for user in users:
-        if user.is_active:
-            search.update_user(user, index=index)
-            n_migr += 1
-        n_iter += 1
-
-    logger.info('Users iterated: {0}\nUsers migrated: {1}'.format(n_iter, n_migr))
+def migrate_users(reindexer):
+    logger.info('Migrating users to index: {}'.format(reindexer.index))
+    report = reindexer.reindex(['user'])
+    logger.info('Users migrated: {}'.format(report['user']['indexed']))
 
 def migrate_institutions(index):
     for inst in Institution.find(Q('is_deleted', 'ne', True)):
         update_institution(inst, index)
 
-def migrate(delete, index=None, app=None):
+def migrate(delete, index=None, app=None, resume=False, **reindexer_kwargs):
+    """Reindex every search-enabled model into a new version of ``index`` and point
+    the ``index`` alias at it.
+
+    :param bool delete: Delete the previous version of the index afterwards
+    :param bool resume: Continue an interrupted migration from its checkpoint
+        (``settings.ELASTIC_REINDEX_CHECKPOINT``) instead of starting a new index
+    :param reindexer_kwargs: Tuning passed on to ``Reindexer``
+    """
     index = index or settings.ELASTIC_INDEX
     app = app or init_app('website.settings', set_backends=True, routes=True)
 
@@ -67,22 +56,33 @@ def migrate(delete, index=None, app=None):
     ctx = app.test_request_context()
     ctx.push()
 
-    new_index = set_up_index(index)
-    start_time = timezone.now()
+    checkpoint = Checkpoint(settings.ELASTIC_REINDEX_CHECKPOINT)
+    if resume and checkpoint.index:
+        new_index = checkpoint.index
+        start_time = parse_date(checkpoint.started)
+        logger.info('Resuming migration into {} started at {}'.format(new_index, start_time))
+    else:
+        new_index = set_up_index(index)
+        start_time = timezone.now()
+        checkpoint.start(new_index, start_time.isoformat())
+
+    reindexer = Reindexer(new_index, checkpoint=checkpoint, **reindexer_kwargs)
 
     if settings.ENABLE_INSTITUTIONS:
         migrate_institutions(new_index)
-    migrate_nodes(new_index)
-    migrate_users(new_index)
+    migrate_nodes(reindexer)
+    migrate_users(reindexer)
 
     set_up_alias(index, new_index)
 
     # migrate nodes modified since start
-    migrate_nodes(new_index, query=Q('date_modified', 'gte', start_time))
+    migrate_nodes(reindexer, modified_since=start_time)
 
     if delete:
         delete_old(new_index)
 
+    checkpoint.clear()
+
     ctx.pop()
 
 def set_up_index(idx):
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+'''Streaming bulk reindexer for Search-enabled Models.
+
+Documents are read in primary key order, one keyset batch at a time, serialized
+by a pool of worker processes and sent to Elasticsearch with concurrent bulk
+requests. At most ``max_pending`` serialized batches are held in memory; reading
+stops until the indexer catches up. The last indexed primary key of each document
+type is recorded in a checkpoint so an interrupted reindex can be resumed.
+'''
+from __future__ import absolute_import, division
+
+import collections
+import json
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing.pool import ThreadPool
+
+from django.db import connections
+from elasticsearch import helpers
+
+from website import settings
+from website.search import elastic_search
+
+logger = logging.getLogger(__name__)
+
+
+def _node_queryset():
+    from osf.models import Node
+    return Node.objects.filter(is_public=True, is_deleted=False)
+
+
+def _serialize_nodes(nodes):
+    indexable = [node for node in nodes if elastic_search.is_node_indexable(node)]
+    for category, document in elastic_search.serialize_nodes(indexable).values():
+        yield document['id'], category, document
+
+
+def _file_queryset():
+    from addons.osfstorage.models import OsfStorageFile
+    return OsfStorageFile.objects.filter(
+        node__type='osf.node', node__is_public=True, node__is_deleted=False
+    ).select_related('node')
+
+
+def _serialize_files(files):
+    for file_ in files:
+        if elastic_search.is_file_indexable(file_):
+            yield file_._id, 'file', elastic_search.serialize_file(file_)
+
+
+def _user_queryset():
+    from osf.models import OSFUser
+    return OSFUser.objects.filter(is_active=True)
+
+
+def _serialize_users(users):
+    for user in users:
+        yield user._id, 'user', elastic_search.serialize_user(user)
+
+
+# get_queryset: returns the objects that may be indexed
+# serialize: queryset -> (_id, ES type, document) for each object that should be indexed
+# modified_field: lookup that selects recently modified objects, or None if there is none
+Source = collections.namedtuple('Source', ['get_queryset', 'serialize', 'modified_field'])
+
+SOURCES = collections.OrderedDict([
+    ('node', Source(_node_queryset, _serialize_nodes, 'date_modified')),
+    ('file', Source(_file_queryset, _serialize_files, 'node__date_modified')),
+    ('user', Source(_user_queryset, _serialize_users, None)),
+])
+
+
+def get_queryset(doc_type, modified_since=None):
+    source = SOURCES[doc_type]
+    queryset = source.get_queryset()
+    if modified_since is not None:
+        if not source.modified_field:
+            raise ValueError('Cannot select {} documents by modification date'.format(doc_type))
+        queryset = queryset.filter(**{'{}__gte'.format(source.modified_field): modified_since})
+    return queryset
+
+
+def iter_pk_batches(queryset, chunk_size, after=None):
+    """Yield lists of primary keys from ``queryset`` in ascending order, ``chunk_size``
+    at a time, starting after ``after``. Each batch is a separate keyset query, so
+    memory use stays constant and rows added during the reindex are picked up.
+    """
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    while True:
+        page = queryset.filter(pk__gt=after) if after is not None else queryset
+        pks = list(page[:chunk_size])
+        if not pks:
+            return
+        yield pks
+        after = pks[-1]
+
+
+def serialize_batch(doc_type, index, pks, modified_since=None):
+    """Serialize the objects of ``doc_type`` in ``pks`` into bulk index actions.
+
+    :return: (last primary key in the batch, list of actions)
+    """
+    serialize = SOURCES[doc_type].serialize
+    actions = [
+        {
+            '_op_type': 'index',
+            '_index': index,
+            '_type': es_type,
+            '_id': _id,
+            '_source': document,
+        }
+        for _id, es_type, document in serialize(get_queryset(doc_type, modified_since).filter(pk__in=pks))
+    ]
+    return pks[-1], actions
+
+
+def _serialize_batch(args):
+    return serialize_batch(*args)
+
+
+def _init_worker():
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+
+
+def _parallel_bulk(client, actions, thread_count=4, chunk_size=500, **kwargs):
+    """Equivalent of ``elasticsearch.helpers.parallel_bulk``, which is not available in
+    the elasticsearch client we pin. Yields ``(ok, item)`` for every action.
+    """
+    chunks = [actions[i:i + chunk_size] for i in range(0, len(actions), chunk_size)]
+    if not chunks:
+        return
+    pool = ThreadPool(min(thread_count, len(chunks)))
+    try:
+        for results in pool.imap(
+            lambda chunk: list(helpers.streaming_bulk(client, chunk, chunk_size=chunk_size, **kwargs)),
+            chunks
+        ):
+            for result in results:
+                yield result
+    finally:
+        pool.close()
+        pool.join()
+
+parallel_bulk = getattr(helpers, 'parallel_bulk', _parallel_bulk)
+
+
+class Checkpoint(object):
+    """Progress of a reindex, persisted as JSON at ``path`` after every batch.
+    With no ``path`` the checkpoint only lives in memory.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.data = {'index': None, 'started': None, 'positions': {}}
+        if path and os.path.exists(path):
+            with open(path) as fp:
+                self.data = json.load(fp)
+
+    @property
+    def index(self):
+        return self.data['index']
+
+    @property
+    def started(self):
+        return self.data['started']
+
+    def start(self, index, started):
+        self.data = {'index': index, 'started': started, 'positions': {}}
+        self.save()
+
+    def get(self, doc_type):
+        return self.data['positions'].get(doc_type)
+
+    def set(self, doc_type, pk):
+        self.data['positions'][doc_type] = pk
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = '{}.tmp'.format(self.path)
+        with open(tmp_path, 'w') as fp:
+            json.dump(self.data, fp)
+        os.rename(tmp_path, self.path)
+
+    def clear(self):
+        self.data = {'index': None, 'started': None, 'positions': {}}
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ProgressReport(object):
+    """Logs indexing progress and throughput at most every ``interval`` seconds."""
+
+    def __init__(self, doc_type, total, interval=10):
+        self.doc_type = doc_type
+        self.total = total
+        self.interval = interval
+        self.indexed = 0
+        self.skipped = 0
+        self.errors = 0
+        self.started = self.reported = time.time()
+
+    @property
+    def rate(self):
+        elapsed = time.time() - self.started
+        return self.indexed / elapsed if elapsed else 0
+
+    def update(self, indexed, skipped, errors):
+        self.indexed += indexed
+        self.skipped += skipped
+        self.errors += errors
+        if time.time() - self.reported >= self.interval:
+            self.log()
+
+    def log(self):
+        self.reported = time.time()
+        done = self.indexed + self.skipped + self.errors
+        remaining = (self.total - done) / self.rate if self.rate and self.total > done else 0
+        logger.info('{}: {} / {} processed ({:.0%}), {} indexed, {} errors, {:.0f} docs/s, ~{:.0f}s remaining'.format(
+            self.doc_type, done, self.total, done / self.total if self.total else 1,
+            self.indexed, self.errors, self.rate, remaining
+        ))
+
+    def as_dict(self):
+        return {
+            'indexed': self.indexed,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'seconds': time.time() - self.started,
+        }
+
+
+class Reindexer(object):
+    """Streams the documents of one or more doc types (see ``SOURCES``) into ``index``.
+
+    :param str index: Index to write to
+    :param Checkpoint checkpoint: Where to resume from and record progress
+    :param int chunk_size: Objects per serialization batch and actions per bulk request
+    :param int workers: Serializer processes; 0 serializes in the calling process
+    :param int thread_count: Concurrent bulk requests
+    :param int max_pending: Serialized batches allowed to wait for indexing
+    """
+
+    def __init__(self, index, checkpoint=None, chunk_size=None, workers=None, thread_count=None, max_pending=None):
+        self.index = index
+        self.checkpoint = checkpoint or Checkpoint()
+        self.chunk_size = chunk_size or settings.ELASTIC_REINDEX_CHUNK_SIZE
+        self.workers = settings.ELASTIC_REINDEX_WORKERS if workers is None else workers
+        self.thread_count = thread_count or settings.ELASTIC_REINDEX_THREADS
+        self.max_pending = max_pending or settings.ELASTIC_REINDEX_MAX_PENDING
+
+    def reindex(self, doc_types=None, modified_since=None):
+        """Index every document of ``doc_types``, resuming after the checkpointed position.
+        If ``modified_since`` is given, only objects modified since then are indexed
+        and the checkpoint is neither read nor written.
+
+        :return: dict of doc type -> progress counts
+        """
+        report = collections.OrderedDict()
+        for doc_type in (doc_types or SOURCES.keys()):
+            report[doc_type] = self.reindex_doc_type(doc_type, modified_since=modified_since)
+        return report
+
+    def reindex_doc_type(self, doc_type, modified_since=None):
+        queryset = get_queryset(doc_type, modified_since)
+        after = self.checkpoint.get(doc_type) if modified_since is None else None
+        if after is not None:
+            progress = ProgressReport(doc_type, queryset.filter(pk__gt=after).count())
+        else:
+            progress = ProgressReport(doc_type, queryset.count())
+        logger.info('Indexing {} {} documents into {}{}'.format(
+            progress.total, doc_type, self.index, ' (resuming after pk {})'.format(after) if after is not None else ''
+        ))
+
+        batches = (
+            (doc_type, self.index, pks, modified_since)
+            for pks in iter_pk_batches(queryset, self.chunk_size, after=after)
+        )
+        for batch_size, last_pk, actions in self._serialize(batches):
+            errors = self._bulk(actions)
+            progress.update(len(actions) - errors, batch_size - len(actions), errors)
+            if modified_since is None:
+                self.checkpoint.set(doc_type, last_pk)
+
+        progress.log()
+        return progress.as_dict()
+
+    def _serialize(self, batches):
+        """Yield ``(batch size, last pk, actions)`` for each batch, in order.
+
+        Batches are serialized by the worker pool; once ``max_pending`` of them are
+        in flight no more are read until the oldest one has been consumed.
+        """
+        if not self.workers:
+            for args in batches:
+                last_pk, actions = serialize_batch(*args)
+                yield len(args[2]), last_pk, actions
+            return
+
+        connections.close_all()
+        pool = multiprocessing.Pool(self.workers, initializer=_init_worker)
+        pending = collections.deque()
+        try:
+            for args in batches:
+                pending.append((len(args[2]), pool.apply_async(_serialize_batch, (args, ))))
+                if len(pending) >= self.max_pending:
+                    batch_size, result = pending.popleft()
+                    yield (batch_size, ) + result.get()
+            while pending:
+                batch_size, result = pending.popleft()
+                yield (batch_size, ) + result.get()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _bulk(self, actions):
+        """Index ``actions`` and return the number that failed."""
+        errors = 0
+        for ok, item in parallel_bulk(
+            elastic_search.client(), actions,
+            thread_count=self.thread_count, chunk_size=self.chunk_size, raise_on_error=False
+        ):
+            if not ok:
+                errors += 1
+                logger.error('Failed to index {}'.format(item))
+        return errors
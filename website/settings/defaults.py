@@ -89,6 +89,12 @@ SEARCH_ENGINE = 'elastic'  # Can be 'elastic', or None
 ELASTIC_URI = 'localhost:9200'
 ELASTIC_TIMEOUT = 10
 ELASTIC_INDEX = 'website'
+# Tuning for `invoke migrate_search` (see website.search_migration.reindex)
+ELASTIC_REINDEX_CHUNK_SIZE = 500  # documents per bulk request and per serialization batch
+ELASTIC_REINDEX_WORKERS = 4  # serializer processes; 0 serializes in the calling process
+ELASTIC_REINDEX_THREADS = 4  # concurrent bulk requests
+ELASTIC_REINDEX_MAX_PENDING = 8  # serialized batches allowed to wait for indexing
+ELASTIC_REINDEX_CHECKPOINT = os.path.join(APP_PATH, '.search_migration_checkpoint.json')
 
 # Sessions
 COOKIE_NAME = 'osf'
@@ -100,6 +106,14 @@ OSF_SESSION_TIMEOUT = 30 * 24 * 60 * 60  # 30 days in seconds
 SECRET_KEY = 'CHANGEME'
 SESSION_COOKIE_SECURE = SECURE_MODE
 SESSION_COOKIE_HTTPONLY = True
+# Where sessions are kept, see framework.sessions.store: 'database' or 'cache'
+SESSION_STORE = 'database'
+# Django cache used by the 'cache' session store
+SESSION_CACHE_ALIAS = 'default'
+# Sessions whose data didn't change are saved at most this often (seconds), to keep them from expiring
+SESSION_TOUCH_INTERVAL = 60 * 60
+# Sessions deleted per query by scripts.clear_sessions
+SESSION_SWEEP_BATCH_SIZE = 1000
 
 # local path to private key and cert for local development using https, overwrite in local.py
 OSF_SERVER_KEY = None
@@ -139,12 +153,25 @@ NO_LOGIN_OSF4M_WAIT_TIME = timedelta(weeks=6)
 NEW_PUBLIC_PROJECT_WAIT_TIME = timedelta(hours=24)
 WELCOME_OSF4M_WAIT_TIME_GRACE = timedelta(days=12)
 
+# Notification digests
+NOTIFICATION_DIGEST_CHUNK_SIZE = 500  # users whose digests are loaded at a time
+NOTIFICATION_DIGEST_MAILER_POOL_SIZE = 10  # 0 sends from the celery worker's thread
+NOTIFICATION_DIGEST_MAILER_RATE = 50  # mails a second, 0 for no limit
+
 # TODO: Override in local.py
 MAILGUN_API_KEY = None
 
 # Use Celery for file rendering
 USE_CELERY = True
 
+# How tasks queued with run_postcommit/enqueue_postcommit_task are run after a request:
+# 'inline' runs them before the response is returned (waiting up to 5 seconds),
+# 'background' hands them to a long-lived pool of POSTCOMMIT_EXECUTOR_POOL_SIZE threads
+POSTCOMMIT_EXECUTOR = 'inline'
+POSTCOMMIT_EXECUTOR_POOL_SIZE = 10
+# Postcommit tasks that take longer than this (in ms) are logged
+POSTCOMMIT_SLOW_TASK_MS = 1000
+
 # File rendering timeout (in ms)
 MFR_TIMEOUT = 30000
 
@@ -261,6 +288,12 @@ KEEN = {
     },
 }
 
+# Page view and download counts are buffered in memory and written by a background thread this
+# often (seconds), or once this many pages have pending counts, see osf.models.analytics.PageCounterBuffer
+PAGE_COUNTER_FLUSH_THREAD = True
+PAGE_COUNTER_FLUSH_INTERVAL = 10
+PAGE_COUNTER_MAX_PENDING = 1000
+
 SENTRY_DSN = None
 SENTRY_DSN_JS = None
 
@@ -310,8 +343,19 @@ EZID_FORMAT = '{namespace}osf.io/{guid}'
 SHARE_REGISTRATION_URL = ''
 SHARE_URL = None
 SHARE_API_TOKEN = None  # Required to send project updates to SHARE
+SHARE_OUTBOX_BATCH_SIZE = 100  # objects sent to SHARE in one NormalizedData document
+SHARE_OUTBOX_POOL_SIZE = 4  # documents sent at once, 0 sends from the celery worker's thread
+SHARE_OUTBOX_RETRY_DELAY = 60  # seconds before a failed document is sent again, doubled per attempt
 
 CAS_SERVER_URL = 'http://localhost:8080'
+# Seconds a validated OAuth2 access token is cached before CAS is asked again, see framework.auth.cas.ProfileCache.
+# 0 disables the cache.
+CAS_PROFILE_CACHE_TTL = 60
+# Seconds a token that CAS rejected is remembered as invalid
+CAS_PROFILE_CACHE_NEGATIVE_TTL = 10
+CAS_PROFILE_CACHE_MAX_SIZE = 10000
+# Django cache shared by all processes, where token revocations are recorded
+CAS_PROFILE_CACHE_ALIAS = 'default'
 MFR_SERVER_URL = 'http://localhost:7778'
 
 ###### ARCHIVER ###########
@@ -401,6 +445,7 @@ CELERY_IMPORTS = (
     'website.archiver.tasks',
     'website.search.search',
     'website.project.tasks',
+    'website.share.tasks',
     'scripts.populate_new_and_noteworthy_projects',
     'scripts.populate_popular_projects_and_registrations',
     'scripts.refresh_addon_tokens',
@@ -414,6 +459,8 @@ CELERY_IMPORTS = (
     'scripts.analytics.run_keen_snapshots',
     'scripts.analytics.run_keen_events',
     'scripts.generate_sitemap',
+    'scripts.rendered_wiki_cache',
+    'scripts.clear_sessions',
 )
 
 # Modules that need metrics and release requirements
@@ -444,6 +491,10 @@ else:
             'schedule': crontab(minute=0, hour=0),
             'args': ('email_digest',),
         },
+        'share_outbox': {
+            'task': 'website.share.tasks.flush_share_outbox',
+            'schedule': crontab(minute='*'),  # Every minute
+        },
         'refresh_addons': {
             'task': 'scripts.refresh_addon_tokens',
             'schedule': crontab(minute=0, hour= 2),  # Daily 2:00 a.m
@@ -510,7 +561,17 @@ else:
         'generate_sitemap': {
             'task': 'scripts.generate_sitemap',
             'schedule': crontab(minute=0, hour=0),  # Daily 12:00 a.m.
-        }
+        },
+        'rendered_wiki_cache': {
+            'task': 'scripts.rendered_wiki_cache',
+            'schedule': crontab(minute=0, hour=5),  # Daily 5:00 a.m.
+            'kwargs': {'dry_run': False},
+        },
+        'clear_sessions': {
+            'task': 'scripts.clear_sessions',
+            'schedule': crontab(minute=0, hour=6),  # Daily 6:00 a.m.
+            'kwargs': {'dry_run': False},
+        },
     }
 
     # Tasks that need metrics and release requirements
@@ -1767,8 +1828,16 @@ RECAPTCHA_VERIFY_URL = 'https://www.google.com/recaptcha/api/siteverify'
 
 # akismet spam check
 AKISMET_APIKEY = None
+# Base URL of an Akismet compatible service to use instead of Akismet, e.g. a local stand-in
+AKISMET_API_URL = None
 SPAM_CHECK_ENABLED = False
 SPAM_CHECK_PUBLIC_ONLY = True
+# Seconds to remember the verdict on content that was already checked
+SPAM_CHECK_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+# Users confirmed for longer than this, and never flagged for spam, are not checked. None checks everyone.
+SPAM_CHECK_TRUSTED_USER_AGE = None
+# Seconds before the first retry of a failed spam check; doubled for each further retry
+SPAM_CHECK_RETRY_DELAY = 60
 SPAM_ACCOUNT_SUSPENSION_ENABLED = False
 SPAM_ACCOUNT_SUSPENSION_THRESHOLD = timedelta(hours=24)
 SPAM_FLAGGED_MAKE_NODE_PRIVATE = False
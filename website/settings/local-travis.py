@@ -21,9 +21,13 @@ API_DOMAIN = PROTOCOL + 'localhost:8000/'
 ENABLE_INSTITUTIONS = True
 
 SEARCH_ENGINE = 'elastic'
+# Serializer processes would not see data inside test transactions
+ELASTIC_REINDEX_WORKERS = 0
 
 USE_EMAIL = False
 USE_CELERY = False
+# Mailer threads would not see data inside test transactions
+NOTIFICATION_DIGEST_MAILER_POOL_SIZE = 0
 
 # Email
 MAIL_SERVER = 'localhost:1025'  # For local testing
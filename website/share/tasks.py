@@ -0,0 +1,147 @@
+"""
+Tasks for sending the metadata of nodes, registrations and preprints to SHARE in batches.
+"""
+import datetime
+import logging
+from collections import OrderedDict
+
+import requests
+from django.utils import timezone
+
+from framework.celery_tasks import app as celery_app
+from framework.sentry import log_exception
+from osf.models import AbstractNode, PreprintService, ShareOutboxItem
+from osf.utils.concurrency import ThrottledPool, advisory_lock
+from website import settings
+from website.preprints.tasks import format_preprint
+from website.project.tasks import format_node, format_registration
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name='website.share.tasks.flush_share_outbox', max_retries=0)
+def flush_share_outbox():
+    """Send everything in the SHARE outbox that is due.
+
+    Objects are sent ``settings.SHARE_OUTBOX_BATCH_SIZE`` to a NormalizedData document, from
+    ``settings.SHARE_OUTBOX_POOL_SIZE`` threads. Items are removed once sent; items of a failed
+    document are tried again after ``settings.SHARE_OUTBOX_RETRY_DELAY`` seconds, doubled for
+    every failed attempt. Flushes don't overlap.
+    """
+    if not settings.SHARE_URL:
+        return
+    with advisory_lock('flush_share_outbox') as acquired:
+        if not acquired:
+            logger.warning('The SHARE outbox is already being flushed')
+            return
+        chunk_size = settings.SHARE_OUTBOX_BATCH_SIZE * (settings.SHARE_OUTBOX_POOL_SIZE or 1)
+        with ThrottledPool(settings.SHARE_OUTBOX_POOL_SIZE) as pool:
+            last_id = 0
+            while True:
+                items = list(
+                    ShareOutboxItem.objects.filter(id__gt=last_id, next_attempt__lte=timezone.now()).order_by('id')[:chunk_size]
+                )
+                if not items:
+                    return
+                last_id = items[-1].id
+                # Items marked again after this were possibly read before the change
+                read_at = timezone.now()
+                documents = build_documents(items)
+                for (url, token, graph, batch), sent in zip(documents, pool.map(send_document, documents)):
+                    if sent:
+                        remove_items(batch, read_at)
+                    else:
+                        retry_items(batch)
+
+
+def build_documents(items):
+    """Group the graphs of the objects of ``items`` by where they are sent.
+
+    Items whose object no longer exists, or can't be sent, are removed.
+
+    :return list: (url, token, @graph, items) tuples of at most ``settings.SHARE_OUTBOX_BATCH_SIZE`` items
+    """
+    nodes = AbstractNode.objects.in_bulk([item.object_id for item in items if item.kind == ShareOutboxItem.NODE])
+    preprints = PreprintService.objects.select_related('node', 'provider').in_bulk(
+        [item.object_id for item in items if item.kind == ShareOutboxItem.PREPRINT]
+    )
+    groups = OrderedDict()
+    dropped = []
+    for item in items:
+        if item.kind == ShareOutboxItem.NODE:
+            obj = nodes.get(item.object_id)
+            if obj is None or not settings.SHARE_API_TOKEN:
+                dropped.append(item)
+                continue
+            key = ('api/v2/normalizeddata/' if obj.is_registration else 'api/normalizeddata/', settings.SHARE_API_TOKEN)
+            format_graph = format_registration if obj.is_registration else format_node
+        else:
+            obj = preprints.get(item.object_id)
+            if obj is None or not obj.provider.access_token:
+                dropped.append(item)
+                continue
+            key, format_graph = ('api/v2/normalizeddata/', obj.provider.access_token), format_preprint
+        try:
+            graph = format_graph(obj)
+        except Exception:
+            logger.exception('Failed to format {} for SHARE'.format(unicode(item)))
+            log_exception()
+            retry_items([item])
+            continue
+        groups.setdefault(key, []).append((graph, item))
+
+    if dropped:
+        logger.warning('Not sending {} to SHARE: deleted or no access token'.format(', '.join(map(unicode, dropped))))
+        ShareOutboxItem.objects.filter(id__in=[item.id for item in dropped]).delete()
+
+    documents = []
+    for (path, token), entries in groups.items():
+        for i in range(0, len(entries), settings.SHARE_OUTBOX_BATCH_SIZE):
+            batch = entries[i:i + settings.SHARE_OUTBOX_BATCH_SIZE]
+            documents.append((
+                '{}{}'.format(settings.SHARE_URL, path),
+                token,
+                [serialized for entry_graph, _ in batch for serialized in entry_graph],
+                [item for _, item in batch],
+            ))
+    return documents
+
+
+def send_document(document):
+    """POST a NormalizedData document to SHARE.
+
+    :return bool: Whether SHARE accepted it
+    """
+    url, token, graph, items = document
+    try:
+        resp = requests.post(url, json={
+            'data': {
+                'type': 'NormalizedData',
+                'attributes': {
+                    'tasks': [],
+                    'raw': None,
+                    'data': {'@graph': graph}
+                }
+            }
+        }, headers={'Authorization': 'Bearer {}'.format(token), 'Content-Type': 'application/vnd.api+json'}, timeout=30)
+        logger.debug(resp.content)
+        resp.raise_for_status()
+    except requests.RequestException:
+        logger.exception('Failed to send {} objects to SHARE'.format(len(items)))
+        log_exception()
+        return False
+    return True
+
+
+def remove_items(items, read_at):
+    ShareOutboxItem.objects.filter(id__in=[item.id for item in items], date_modified__lte=read_at).delete()
+
+
+def retry_items(items):
+    now = timezone.now()
+    for item in items:
+        delay = settings.SHARE_OUTBOX_RETRY_DELAY * 2 ** min(item.attempts, 10)
+        ShareOutboxItem.objects.filter(id=item.id).update(
+            attempts=item.attempts + 1,
+            next_attempt=now + datetime.timedelta(seconds=delay),
+        )
@@ -15,13 +15,25 @@ class AkismetClient(object):
     API_PROTOCOL = 'https://'
     API_HOST = 'rest.akismet.com'
 
-    def __init__(self, apikey, website, verify=False):
+    def __init__(self, apikey, website, verify=False, api_url=None):
+        """
+        :param str api_url: Base URL of an Akismet compatible service to use instead of
+            Akismet, e.g. a local stand-in for tests
+        """
         self.apikey = apikey
         self.website = website
+        self.api_url = api_url
         self._apikey_is_valid = None
         if verify:
             self._verify_apikey()
 
+    def _url(self, endpoint, keyed=True):
+        if self.api_url:
+            return '{}/1.1/{}'.format(self.api_url.rstrip('/'), endpoint)
+        if keyed:
+            return '{}{}.{}/1.1/{}'.format(self.API_PROTOCOL, self.apikey, self.API_HOST, endpoint)
+        return '{}{}/1.1/{}'.format(self.API_PROTOCOL, self.API_HOST, endpoint)
+
     @property
     def _default_headers(self):
         return {
@@ -33,7 +45,7 @@ class AkismetClient(object):
             return self._apikey_is_valid
         else:
             res = requests.post(
-                '{}{}/1.1/verify-key'.format(self.API_PROTOCOL, self.API_HOST),
+                self._url('verify-key', keyed=False),
                 data={
                     'key': self.apikey,
                     'blog': self.website
@@ -70,7 +82,7 @@ class AkismetClient(object):
 
         try:
             res = requests.post(
-                '{}{}.{}/1.1/comment-check'.format(self.API_PROTOCOL, self.apikey, self.API_HOST),
+                self._url('comment-check'),
                 data=data,
                 headers=self._default_headers,
                 timeout=5
@@ -93,7 +105,7 @@ class AkismetClient(object):
         data['user_agent'] = user_agent
 
         res = requests.post(
-            '{}{}.{}/1.1/submit-spam'.format(self.API_PROTOCOL, self.apikey, self.API_HOST),
+            self._url('submit-spam'),
             data=data,
             headers=self._default_headers
         )
@@ -113,7 +125,7 @@ class AkismetClient(object):
         data['user_agent'] = user_agent
 
         res = requests.post(
-            '{}{}.{}/1.1/submit-ham'.format(self.API_PROTOCOL, self.apikey, self.API_HOST),
+            self._url('submit-ham'),
             data=data,
             headers=self._default_headers
         )